@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Локальный mock-сервер API ТК для бенчмарков сбора (Байкал, ПЭК, ДЛ, БСД)"""
+
+import json
+import multiprocessing as mp
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+BSD_LOGIN_HTML = '<form><input name="_token" value="bench"></form>'
+BSD_ORDERS_HTML = (
+    '<table><tbody id="orders-table-body"></tbody></table>'
+    '<ul class="pagination">'
+    + ''.join(f'<li><a href="/cabinet/orders?page={n}">{n}</a></li>' for n in range(1, 6))
+    + '</ul>'
+)
+
+
+class MockCarrierServer:
+    """
+    Отвечает фиксированными JSON/HTML на эндпоинты всех API-ТК с искусственной
+    задержкой latency (сек.) на каждый запрос.
+
+    Сервер живет в отдельном процессе, чтобы его потоки не попадали в замер
+    пикового числа потоков клиента.
+
+    :param orders: сколько заказов отдавать в списках Байкала и ПЭК
+    :param latency: задержка ответа, имитирует RTT до ТК
+    """
+
+    def __init__(self, orders=300, latency=0.2):
+        self.orders = orders
+        self.latency = latency
+        self._requests = mp.Value('i', 0)
+        self.url = None
+
+    @property
+    def requests(self):
+        return self._requests.value
+
+    @staticmethod
+    def _route(orders, path):
+        if path == "/v2/order/list":
+            return {"orderList": [{"number": f"BK-{i}"} for i in range(orders)]}
+        if path == "/v2/order/detail":
+            return {"tracking": "BK", "status": "empty", "cargoList": []}
+        if path == "/pecom/cargos/list/":
+            return {"cargos": [{"code": f"PC-{i}"} for i in range(orders)]}
+        if path == "/pecom/cargos/status/":
+            return {"cargos": []}
+        if path == "/v3/orders.json":
+            return {"orders": []}
+        if path == "/login":
+            return BSD_LOGIN_HTML
+        if path == "/cabinet/orders":
+            return BSD_ORDERS_HTML
+        return None
+
+    @classmethod
+    def _serve(cls, orders, latency, counter, port_queue):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with counter.get_lock():
+                    counter.value += 1
+                time.sleep(latency)
+                body = cls._route(orders, urlparse(self.path).path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                is_html = isinstance(body, str)
+                raw = (body if is_html else json.dumps(body)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html" if is_html else "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        httpd.daemon_threads = True
+        port_queue.put(httpd.server_port)
+        httpd.serve_forever()
+
+    def point_clients(self, pecom, dellin, baikal, viteka):
+        """Перенаправляет URL клиентов api_classes на mock-сервер"""
+        baikal.url_cargos_list = f"{self.url}/v2/order/list"
+        baikal.url_cargos_detail = f"{self.url}/v2/order/detail"
+        pecom.url_cargos_list = f"{self.url}/pecom/cargos/list/"
+        pecom.url_cargos_status = f"{self.url}/pecom/cargos/status/"
+        dellin.url_orders = f"{self.url}/v3/orders.json"
+        dellin.sessionID = "bench"
+        viteka.url_login = f"{self.url}/login"
+        viteka.url_orders = f"{self.url}/cabinet/orders"
+
+    def __enter__(self):
+        port_queue = mp.Queue()
+        self._proc = mp.Process(
+            target=self._serve,
+            args=(self.orders, self.latency, self._requests, port_queue),
+            daemon=True,
+        )
+        self._proc.start()
+        self.url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+        return self
+
+    def __exit__(self, *exc):
+        self._proc.terminate()
+        self._proc.join()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""Генераторы синтетических выгрузок ТК для бенчмарков"""
+
+import io
+import random
+
+MAGIC_HEADER = [
+    'Номер груза', 'Количество мест', 'Вес, кг', 'Обьем, м3', 'Сумма, руб.',
+    'Отправитель', 'Получатель', 'Маршрут перевозки', 'Статус',
+    'Ориентировочная дата прибытия', 'Статус оплаты', 'Плательщик',
+]
+
+COMPANIES = [
+    'ООО "Ромашка"', 'ИП Иванов Иван Иванович', 'ЮЖНЫЙ ФОРПОСТ ООО',
+    'Общество с ограниченной ответственностью «Вектор»', 'АО "Торговый дом Север"',
+    'ООО "Компания Лтд"', 'ПАО "Группа компаний Восток"', 'ИП Петрова (склад 2)',
+]
+CITIES = [
+    'г. Москва', 'Санкт-Петербург', 'Астрахань', 'г. Екатеринбург (терминал Запад)',
+    'Новосибирск', 'Краснодарский край, Краснодар', 'Ростов-на-Дону', 'Казань',
+]
+MAGIC_STATUSES = ['В пути', 'Прибыл в город назначения', 'На доставке', 'Доставлен']
+
+
+def magic_rows(count, seed=1):
+    """Строки выгрузки: ~3% пустых ячеек (оплата, получатель, дата) и итоговая строка без номера"""
+    rnd = random.Random(seed)
+
+    def maybe(value):
+        return None if rnd.random() < 0.03 else value
+
+    total_places = 0
+    for i in range(count):
+        places = rnd.randint(1, 20)
+        total_places += places
+        yield [
+            f"МТ-{100000 + i}",
+            places,
+            round(rnd.uniform(1, 900), 1),
+            round(rnd.uniform(0.01, 5), 3),
+            f"{rnd.randint(300, 90000):,}".replace(',', ' ') + ",00",
+            rnd.choice(COMPANIES),
+            maybe(rnd.choice(COMPANIES)),
+            f"{rnd.choice(CITIES)} - {rnd.choice(CITIES)}",
+            rnd.choice(MAGIC_STATUSES),
+            maybe(f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.2026"),
+            maybe(rnd.choice(['Оплачено', 'Не оплачено'])),
+            rnd.choice(COMPANIES),
+        ]
+    # Кабинет добавляет в конец итог: номера груза нет, в грузы попасть не должен
+    yield [None, total_places, None, None, None, None, None, None, "ИТОГО", None, None, None]
+
+
+def magic_excel(count, seed=1):
+    """xlsx-выгрузка Magic Trans на count строк (bytes)"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(MAGIC_HEADER)
+    for row in magic_rows(count, seed):
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+VITEKA_STATUSES = [
+    'В пути', 'Прибыл на склад 12.03.26', 'Выдан получателю 01.02.2026',
+    'Ожидается отправка', 'Груз на складе<br><small>прибытие 05.04.26</small>',
+]
+
+
+def viteka_row(i, rnd):
+    """Одна строка #orders-table-body кабинета БСД (12 колонок)"""
+    order = f'СП{rnd.randint(10, 99)}-{100000 + i}' if rnd.random() > 0.05 else f'{900000 + i}'
+    pay = rnd.choice(['Оплачена', 'Не оплачена', 'В обработке'])
+    return (
+        '<tr class="order-row">'
+        f'<td><a href="/cabinet/orders/{i}">{order}</a><!-- id {i} --><br><small>Заявка {i}</small></td>'
+        f'<td><span class="badge">{rnd.choice(VITEKA_STATUSES)}</span></td>'
+        f'<td>{rnd.randint(1, 28):02d}.03.2026</td>'
+        '<td><div><span class="lbl">Кол-во мест:</span> <span>'
+        f'{rnd.randint(1, 30)}</span></div><div><span class="lbl">Вес:</span><span>{round(rnd.uniform(1, 900), 1)}кг</span></div>'
+        f'<div><span class="lbl">Объем:</span><span>{round(rnd.uniform(0.01, 5), 2)}м3</span></div></td>'
+        f'<td>{rnd.choice(CITIES)}</td><td>{rnd.choice(CITIES)}</td>'
+        f'<td>{rnd.choice(COMPANIES)}</td>'
+        f'<td>ЮЖНЫЙ ФОРПОСТ ООО <button type="button">ИЗМЕНИТЬ ПОЛУЧАТЕЛЯ</button>'
+        f'<form method="post"><input type="hidden" name="id" value="{i}"><script>bind({i});</script></form></td>'
+        f'<td><span class="pay">{pay}</span></td><td>—</td><td>&nbsp;</td>'
+        f'<td>{rnd.randint(300, 90000):,}'.replace(',', '&nbsp;') + ',00&nbsp;₽</td>'
+        '</tr>'
+    )
+
+
+def viteka_pages(rows, per_page=50, seed=1):
+    """HTML-страницы кабинета БСД, в сумме rows строк заказов"""
+    rnd = random.Random(seed)
+    pages = []
+    for start in range(0, rows, per_page):
+        body = ''.join(viteka_row(i, rnd) for i in range(start, min(start + per_page, rows)))
+        pages.append(
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Заказы</title>'
+            '<style>.badge{color:red}</style><script src="/app.js"></script></head><body>'
+            '<nav><span>Кабинет</span><a href="/cabinet">Главная</a></nav>'
+            '<table class="table"><thead><tr><th>Номер</th><th>Статус</th></tr></thead>'
+            f'<tbody id="orders-table-body">{body}</tbody></table>'
+            '<ul class="pagination"><li><a href="/cabinet/orders?page=2">2</a></li></ul>'
+            '</body></html>'
+        )
+    return pages
+
+
+# --- API-ТК в форме ответов (для bench_parsers) ---
+
+CARRIER_STATUSES = ['В пути', 'Принят к перевозке', 'Прибыл в город назначения', 'Готов к выдаче', 'Выдан']
+
+
+def counterparty(rnd, pool=300):
+    """Контрагент из ограниченного круга (как в жизни: сотни имен на тысячи грузов) и его ИНН"""
+    k = rnd.randrange(pool)
+    name = COMPANIES[k] if k < len(COMPANIES) else f'ООО "Клиент {k}"'
+    return name, f"77{k:08d}"
+
+
+def baikal_details(count, seed=1):
+    """Ответы order/detail Байкала на count заказов (~2% пустых)"""
+    rnd = random.Random(seed)
+    orders = []
+    for i in range(count):
+        if rnd.random() < 0.02:
+            orders.append({"tracking": f"BK-{i}", "status": "empty", "cargoList": []})
+            continue
+        consignor, consignor_inn = counterparty(rnd)
+        consignee, consignee_inn = counterparty(rnd)
+        payer_inn = rnd.choice([consignor_inn, consignee_inn, "7700000000"])
+        total_sum = float(rnd.randint(300, 90000))
+        cargo_list = [{
+            "consignor": {"name": consignor, "inn": consignor_inn},
+            "consignee": {"name": consignee, "inn": consignee_inn},
+            "services": [{"name": "Перевозка", "payer": {"inn": payer_inn}}],
+            "cargo": {
+                "places": rnd.randint(1, 10),
+                "weight": str(round(rnd.uniform(1, 300), 1)),
+                "volume": str(round(rnd.uniform(0.01, 2), 3)),
+            },
+            "total": {"sum": total_sum, "paid": rnd.choice([0, total_sum])},
+            "dateArrivalPlane": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T00:00:00",
+            "departure": {"name": rnd.choice(CITIES)},
+            "destination": {"name": rnd.choice(CITIES)},
+        } for _ in range(rnd.randint(1, 3))]
+        orders.append({
+            "tracking": f"{rnd.randint(10, 99)}-{1000000 + i}",
+            "orderstatus": rnd.choice(CARRIER_STATUSES),
+            "paidStatus": "Оплачено",
+            "cargoList": cargo_list,
+        })
+    return orders
+
+
+def dellin_orders(count, seed=1):
+    """Ответ v3/orders Деловых Линий на count заказов"""
+    rnd = random.Random(seed)
+    orders = []
+    for i in range(count):
+        sender, sender_inn = counterparty(rnd)
+        receiver, receiver_inn = counterparty(rnd)
+        total_sum = round(rnd.uniform(300, 90000), 2)
+        derival = rnd.choice(CITIES)
+        orders.append({
+            "orderId": 26000000 + i,
+            "stateName": rnd.choice(CARRIER_STATUSES),
+            "progressPercent": rnd.randint(0, 100),
+            "isPaid": rnd.random() > 0.3,
+            "totalSum": total_sum,
+            "documents": [{"type": "shipping", "debtSum": rnd.choice([0, total_sum]), "totalSum": total_sum}],
+            "freight": {
+                "places": rnd.randint(1, 20),
+                "weight": str(round(rnd.uniform(1, 900), 1)),
+                "volume": str(round(rnd.uniform(0.01, 5), 2)),
+            },
+            "sender": {"name": sender, "inn": sender_inn},
+            "receiver": {"name": receiver, "inn": receiver_inn},
+            "payer": {"inn": rnd.choice([sender_inn, receiver_inn])},
+            "orderDates": {"arrivalToOspReceiver": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"},
+            # У части заказов нет terminalCity - только city
+            "derival": {"terminalCity": derival} if rnd.random() > 0.2 else {"city": derival},
+            "arrival": {"terminalCity": rnd.choice(CITIES)},
+        })
+    return {"orders": orders}
+
+
+def pecom_status(count, seed=1):
+    """Ответ cargos/status ПЭК на count грузов"""
+    rnd = random.Random(seed)
+    cargos = []
+    for i in range(count):
+        payer_type = rnd.choice([1, 2])
+        items = [{
+            "name": "Перевозка",
+            "price": round(rnd.uniform(100, 30000), 2),
+            "payerType": payer_type if rnd.random() > 0.1 else 3 - payer_type,
+            "payToReceive": rnd.random() < 0.2,
+        } for _ in range(rnd.randint(1, 4))]
+        cargos.append({
+            "cargo": {
+                "cargoBarCode": f"{rnd.randint(10, 99)}{3000000000 + i}",
+                "amount": rnd.randint(1, 20),
+                "weight": round(rnd.uniform(1, 900), 1),
+                "volume": round(rnd.uniform(0.01, 5), 2),
+            },
+            "info": {
+                "cargoStatus": rnd.choice(CARRIER_STATUSES),
+                "arrivalPlanDateTime": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:00:00",
+            },
+            "services": {"sum": rnd.choice([0, sum(s["price"] for s in items)]), "debt": rnd.choice([0, 0, 500]), "items": items},
+            "sender": {"sender": counterparty(rnd)[0], "branch": rnd.choice(CITIES)},
+            "receiver": {"receiver": counterparty(rnd)[0], "branch": {"city": rnd.choice(CITIES)}},
+        })
+    return {"cargos": cargos}
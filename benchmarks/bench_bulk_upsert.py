@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк записи грузов в БД: прежний путь (upsert_cargo - соединение и
+commit на каждый груз) против CargoDB.bulk_upsert (executemany в одной
+транзакции).
+
+Запуск из корня проекта:
+    python benchmarks/bench_bulk_upsert.py --rows 10000
+
+Меряет вставку в пустую БД и повторную запись тех же грузов с новым
+статусом (ветка ON CONFLICT), сверяет содержимое таблиц после обоих путей
+и проверяет, что битая строка в пачке не мешает записи остальных.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_cargo_record import fields
+from cargo import Cargo
+import database
+
+COLUMNS = "id, tk, sender, recipient, route, places, weight, volume, status, arrival, payment, " \
+          "total_price, payer_type, is_archived, fingerprint, state"
+
+
+def fresh_db(tmp, name):
+    database.DB_PATH = os.path.join(tmp, f"{name}.db")
+    return database.CargoDB()
+
+
+def dump(db):
+    with db.get_connection() as conn:
+        return conn.execute(f"SELECT {COLUMNS} FROM cargo ORDER BY id").fetchall()
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    items = [Cargo(**fields(i, rnd)) for i in range(args.rows)]
+    updated = [Cargo(**{**fields(i, rnd), "status": "ПРИБЫЛ В ТК"}) for i in range(args.rows)]
+    tmp = tempfile.mkdtemp()
+
+    old_db = fresh_db(tmp, "old")
+    old_insert = timed(lambda: [old_db.upsert_cargo(item, 0) for item in items])
+    old_update = timed(lambda: [old_db.upsert_cargo(item, 0) for item in updated])
+
+    new_db = fresh_db(tmp, "new")
+    new_insert = timed(lambda: new_db.bulk_upsert(items, 0))
+    new_update = timed(lambda: new_db.bulk_upsert(updated, 0))
+
+    if dump(old_db) != dump(new_db):
+        print("❌ Содержимое таблиц после двух путей расходится")
+        sys.exit(1)
+    print(f"✅ Таблицы совпадают ({args.rows} грузов)")
+
+    # Битая строка: tk NOT NULL
+    err_db = fresh_db(tmp, "errors")
+    broken = items[:100] + [Cargo(tk=None, id="BROKEN-1")] + items[100:200]
+    errors = err_db.bulk_upsert(broken, 0)
+    with err_db.get_connection() as conn:
+        written = conn.execute("SELECT COUNT(*) FROM cargo").fetchone()[0]
+    if [cargo_id for cargo_id, _ in errors] != ["BROKEN-1"] or written != 200:
+        print(f"❌ Ошибка строки оборвала пачку: ошибок {errors}, записано {written}")
+        sys.exit(1)
+    print("✅ Битая строка отчитана отдельно, остальные 200 записаны")
+
+    print(f"\n{'путь':<14}{'вставка, с':>12}{'обновление, с':>15}{'строк/сек':>12}")
+    print(f"{'upsert_cargo':<14}{old_insert:>12.2f}{old_update:>15.2f}{args.rows / old_insert:>12.0f}")
+    print(f"{'bulk_upsert':<14}{new_insert:>12.2f}{new_update:>15.2f}{args.rows / new_insert:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
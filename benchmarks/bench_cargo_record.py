@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк представления груза: прежний словарь на 12 ключей со строкой
+params против cargo.Cargo (__slots__, места/вес/объем числами).
+
+Запуск из корня проекта:
+    python benchmarks/bench_cargo_record.py --count 100000
+
+Печатает память на груз (tracemalloc) и время подготовки параметров
+для записи в БД: разбор строки params тремя регулярками (как в прежнем
+CargoDB._parse_params) против чтения числовых полей.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _synthetic import CITIES, COMPANIES
+from cargo import Cargo, parse_params
+
+
+def fields(i, rnd):
+    return {
+        "tk": "БСД",
+        "id": f"СП26-{100000 + i}",
+        "sender": rnd.choice(COMPANIES).upper(),
+        "recipient": "ЮЖНЫЙ ФОРПОСТ",
+        "route": f"{rnd.choice(CITIES).upper()} -> {rnd.choice(CITIES).upper()}",
+        "status": "В ПУТИ",
+        "places": rnd.randint(1, 30),
+        "weight": round(rnd.uniform(1, 900), 1),
+        "volume": round(rnd.uniform(0.01, 5), 2),
+        "arrival": "2026-03-12",
+        "payment": "Оплачено",
+        "total_price": float(rnd.randint(300, 90000)),
+        "payer_type": "recipient",
+        "is_manual": False,
+    }
+
+
+def legacy_record(f):
+    # Так собирали запись парсеры: числа сразу упаковывались в строку
+    return {
+        "tk": f["tk"], "id": f["id"], "sender": f["sender"], "recipient": f["recipient"],
+        "route": f["route"], "status": f["status"],
+        "params": f"{f['places']}М | {f['weight']}КГ | {f['volume']}М3",
+        "arrival": f["arrival"], "payment": f["payment"], "total_price": f["total_price"],
+        "payer_type": f["payer_type"], "is_manual": f["is_manual"],
+    }
+
+
+def build(factory, raw):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    items = [factory(f) for f in raw]
+    wall = time.perf_counter() - t0
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, wall, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    raw = [fields(i, rnd) for i in range(args.count)]
+
+    dicts, dict_build_s, dict_mem = build(legacy_record, raw)
+    records, rec_build_s, rec_mem = build(lambda f: Cargo(**f), raw)
+
+    t0 = time.perf_counter()
+    legacy_params = [parse_params(item["params"]) for item in dicts]
+    legacy_db_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new_params = [(item.places, item.weight, item.volume) for item in records]
+    new_db_s = time.perf_counter() - t0
+
+    if legacy_params != new_params:
+        print("❌ Числа из строки params и из полей Cargo расходятся")
+        sys.exit(1)
+    print(f"✅ Параметры совпадают на {args.count} грузах")
+
+    print(f"\n{'вариант':<10}{'байт/груз':>11}{'сборка, с':>11}{'места/вес/объем для БД, с':>28}")
+    print(f"{'dict':<10}{dict_mem / args.count:>11.0f}{dict_build_s:>11.3f}{legacy_db_s:>28.3f}")
+    print(f"{'Cargo':<10}{rec_mem / args.count:>11.0f}{rec_build_s:>11.3f}{new_db_s:>28.3f}")
+
+
+if __name__ == '__main__':
+    main()
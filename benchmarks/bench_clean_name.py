@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк clean_name: прежняя цепочка replace/re.sub против
+скомпилированного NameNormalizer (без кэша и с LRU-кэшем).
+
+Запуск из корня проекта:
+    python benchmarks/bench_clean_name.py --calls 200000 --unique 500
+
+Корпус - имена и города из синтетических выгрузок плюс "трудные" строки
+(перекрывающиеся правила, удаления, склеивающие текст). Перед замером
+проверяется побайтное совпадение результатов со старой реализацией.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import settings as st
+from _synthetic import CITIES, COMPANIES
+from normalizer import NameNormalizer
+
+
+def legacy_clean_name(text, is_city=False):
+    """Прежняя реализация main_parser.clean_name"""
+    if not text or not isinstance(text, str): return "???"
+
+    cleaned = text.replace('"', '').replace('«', '').replace('»', '').replace("'", "")
+    cleaned = re.sub(r'\(.*?\)', '', cleaned).lower()
+
+    if is_city:
+        city_trash = ["г. ", "город ", "пгт. ", "поселок ", "область", "обл.", " край", " р-н", " мо", " г "]
+        for trash in city_trash:
+            cleaned = cleaned.replace(trash, "")
+        city_replacements = {
+            "восток": "ВСТ", "запад": "ЗПД", "север": "СЕВ", "юг": "ЮГ",
+            "терминал": "ТЕРМ", "склад": "СКЛ", "центральный": "ЦЕНТР",
+            "юго-запад": "Ю-З", "северо-восток": "С-В"
+        }
+        for long, short in city_replacements.items():
+            cleaned = cleaned.replace(long, short)
+        for full, short in st.CITY_MAP.items():
+            if full in cleaned:
+                cleaned = cleaned.replace(full, short)
+    else:
+        org_replacements = {
+            "общество с ограниченной ответственностью": "ООО",
+            "индивидуальный предприниматель": "ИП",
+            "акционерное общество": "АО",
+            "публичное акционерное общество": "ПАО",
+            "торговый дом": "ТД",
+            "группа компаний": "ГК",
+            "производственное объединение": "ПО"
+        }
+        for long, short in org_replacements.items():
+            cleaned = cleaned.replace(long, short)
+        noise_words = ["компания", "корпорация", "предприятие", "лтд", "ltd"]
+        for word in noise_words:
+            cleaned = re.sub(rf'\b{word}\b', '', cleaned)
+
+    return " ".join(cleaned.split()).strip().upper()
+
+
+EDGE_CASES = [
+    ("Юго-Запад", True), ("Северо-Восток терминал", True), ("Владивосток", True),
+    ("гг. ород Самара", True), ("обл.асть", True), ("Московская обл.", True),
+    ("Железнодорожный мкр (Балашиха)", True), ("Нижний Новгород, склад Центральный", True),
+    ("москвастрахань", True), ("ПГТ. Поселок Юг", True), ("", True), (None, True),
+    ("Публичное акционерное общество «Ростов»", False), ("Акционерное обществообщество с ограниченной ответственностью", False),
+    ("ООО Компания-Лтд (ltd)", False), ("Предприятие'Корпорация'", False), ("компаниялтд", False),
+    ("ТД Торговый дом Группа компаний", False), ("  ИП   Сидоров  ", False), (123, False),
+]
+
+
+def build_corpus(unique, seed=1):
+    """unique разных пар (строка, город?): исходные имена с номерами/суффиксами"""
+    rnd = random.Random(seed)
+    corpus = list(EDGE_CASES)
+    while len(corpus) < unique:
+        if rnd.random() < 0.5:
+            corpus.append((f"{rnd.choice(COMPANIES)} {rnd.choice(['', 'филиал', 'Компания'])} {rnd.randint(1, 99)}", False))
+        else:
+            corpus.append((f"{rnd.choice(CITIES)} {rnd.choice(['', 'терминал', 'склад Юг', 'р-н'])}", True))
+    return corpus
+
+
+def bench(fn, calls):
+    t0 = time.perf_counter()
+    for text, is_city in calls:
+        fn(text, is_city)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--unique", type=int, default=500)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.unique)
+    cold = NameNormalizer(cache_size=0)
+    for text, is_city in corpus:
+        old, new = legacy_clean_name(text, is_city), cold(text, is_city)
+        if old != new:
+            print(f"❌ Расхождение на {text!r} (город={is_city}): {old!r} != {new!r}")
+            sys.exit(1)
+    print(f"✅ Результаты совпадают на {len(corpus)} строках")
+
+    rnd = random.Random(2)
+    calls = [rnd.choice(corpus) for _ in range(args.calls)]
+    warm = NameNormalizer()
+
+    rows = [
+        ("legacy", bench(legacy_clean_name, calls)),
+        ("compiled", bench(cold, calls)),
+        ("compiled+lru", bench(warm, calls)),
+    ]
+    base = rows[0][1]
+    print(f"\n{'вариант':<14}{'время, с':>10}{'вызовов/с':>14}{'ускорение':>11}")
+    for name, sec in rows:
+        print(f"{name:<14}{sec:>10.3f}{args.calls / sec:>14,.0f}{base / sec:>10.1f}x")
+
+    cache = warm.stats()
+    print(f"\nКэш: hit rate {cache['hit_rate']:.1%}, записей {cache['size']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сбора API-ТК: старый ThreadPoolExecutor против asyncio-движка.
+
+Запуск из корня проекта:
+    python benchmarks/bench_collect.py --orders 300 --latency 0.2
+
+Показывает время и пиковое число дополнительных (кроме главного) потоков
+процесса для обоих путей. Mock-сервер работает в отдельном процессе.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import tempfile
+import time
+
+# Кэш детализации Байкала выключен: оба пути должны делать полный набор запросов
+os.environ["BAIKAL_CACHE_FILE"] = os.path.join(tempfile.mkdtemp(), "baikal_detail_cache.json")
+os.environ["BAIKAL_CACHE_MAX_AGE_HOURS"] = "0"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _mock_server import MockCarrierServer
+from api_classes import BaikalApiV2, DellinApiV1, PecomApiV1, VitekaApiV1
+
+
+class PeakThreads:
+    """Семплирует threading.active_count() в фоне и запоминает максимум"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # -1: сам семплер не считаем
+            self.peak = max(self.peak, threading.active_count() - 1)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def make_clients(server):
+    clients = (
+        PecomApiV1("bench", "bench"),
+        DellinApiV1("bench"),
+        BaikalApiV2("bench"),
+        VitekaApiV1("bench", "bench"),
+    )
+    server.point_clients(*clients)
+    return clients
+
+
+def run(name, fn, server):
+    clients = make_clients(server)
+    base_threads = threading.active_count() - 1
+    start_requests = server.requests
+    with PeakThreads() as pt:
+        t0 = time.perf_counter()
+        data = fn(*clients)
+        wall = time.perf_counter() - t0
+    return {
+        "path": name,
+        "wall_s": round(wall, 3),
+        "peak_threads": pt.peak - base_threads,
+        "requests": server.requests - start_requests,
+        "baikal_orders": len(data.get("Baikal") or []),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    import json_write as jw
+    from new_api_engine import collect_api_data
+
+    with MockCarrierServer(orders=args.orders, latency=args.latency) as server:
+        rows = [
+            run("threads", jw.collect_api_threaded, server),
+            run("async", collect_api_data, server),
+        ]
+
+    print(f"\n{'путь':<10}{'время, с':>10}{'потоков':>10}{'запросов':>10}{'Байкал':>8}")
+    for r in rows:
+        print(f"{r['path']:<10}{r['wall_s']:>10}{r['peak_threads']:>10}{r['requests']:>10}{r['baikal_orders']:>8}")
+
+
+if __name__ == '__main__':
+    main()
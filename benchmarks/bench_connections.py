@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк соединений SQLite: прежний CargoDB.get_connection (новый
+sqlite3.connect с timeout=30 на каждый вызов, журнал отката) против
+db_pool (WAL, прагмы один раз, соединение переиспользуется).
+
+Запуск из корня проекта:
+    python benchmarks/bench_connections.py --calls 5000 --cargos 20000
+
+Меряет: короткие запросы "соединение + SELECT по id" подряд (как прежний
+restore_ghosts и обработчики Flask) и ожидание читателя, пока парсер
+держит открытую пишущую транзакцию.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_cargo_record import fields
+from cargo import Cargo
+import database
+
+
+def legacy_connect():
+    return sqlite3.connect(database.DB_PATH, timeout=30)
+
+
+def lookups(connect, ids, readonly):
+    t0 = time.perf_counter()
+    for cargo_id in ids:
+        conn = connect(readonly)
+        conn.execute("SELECT updated_at FROM cargo WHERE id = ?", (cargo_id,)).fetchone()
+        conn.close()
+    return time.perf_counter() - t0
+
+
+def reader_wait(writer_connect, reader_connect, hold):
+    """
+    Сколько читатель ждал, пока другой поток hold секунд держит пишущую
+    транзакцию в фазе записи на диск (EXCLUSIVE, как при commit большой пачки)
+    """
+    started = threading.Event()
+
+    def writer():
+        conn = writer_connect()
+        conn.execute("BEGIN EXCLUSIVE")
+        conn.execute("UPDATE cargo SET updated_at = updated_at")
+        started.set()
+        time.sleep(hold)
+        conn.commit()
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    started.wait()
+    t0 = time.perf_counter()
+    conn = reader_connect()
+    conn.execute("SELECT COUNT(*) FROM cargo").fetchone()
+    conn.close()
+    waited = time.perf_counter() - t0
+    thread.join()
+    return waited
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--cargos", type=int, default=20000)
+    parser.add_argument("--hold", type=float, default=1.0, help="длина пишущей транзакции, с")
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    items = [Cargo(**fields(i, rnd)) for i in range(args.cargos)]
+    ids = [rnd.choice(items).id for _ in range(args.calls)]
+    tmp = tempfile.mkdtemp()
+
+    database.DB_PATH = os.path.join(tmp, "pooled.db")
+    db = database.CargoDB()
+    db.save_cargos([], items)
+
+    # Прежний режим: копия той же базы в журнале отката, соединение на каждый вызов
+    legacy_path = os.path.join(tmp, "legacy.db")
+    with db.get_connection() as src, sqlite3.connect(legacy_path) as dst:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode = DELETE")
+    database.DB_PATH = legacy_path
+    legacy_s = lookups(lambda readonly: legacy_connect(), ids, False)
+    legacy_wait = reader_wait(legacy_connect, legacy_connect, args.hold)
+
+    database.DB_PATH = os.path.join(tmp, "pooled.db")
+    pooled_s = lookups(lambda readonly: db.get_connection(readonly), ids, True)
+    pooled_wait = reader_wait(db.get_connection, lambda: db.get_connection(readonly=True), args.hold)
+
+    with db.get_connection(readonly=True) as conn:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    print(f"Журнал пула: {mode}; пишущая транзакция держится {args.hold:.1f} с")
+    print(f"\n{'вариант':<10}{'вызовов/сек':>13}{'ожидание читателя, с':>23}")
+    print(f"{'connect':<10}{args.calls / legacy_s:>13.0f}{legacy_wait:>23.3f}")
+    print(f"{'db_pool':<10}{args.calls / pooled_s:>13.0f}{pooled_wait:>23.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк постоянного архива: прежний history_archive.json (чтение целиком,
+дозапись, перезапись с indent=4, сортировка strptime для отчета) против
+таблицы history (INSERT OR IGNORE + последние N по индексу).
+
+Запуск из корня проекта:
+    python benchmarks/bench_history.py --history 100000 --new 50
+
+Печатает время одного запуска (дописать --new грузов и собрать архив для
+отчета) для обоих вариантов при архиве в --history записей.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_cargo_record import fields
+from cargo import Cargo
+import database
+
+
+def legacy_run(path, new_items):
+    """update_permanent_archive + сортировка истории из прежнего finalize_run"""
+    with open(path, 'r', encoding='utf-8') as f:
+        old_history = json.load(f)
+    existing_ids = {str(item.get('id')) for item in old_history if item.get('id')}
+    for item in new_items:
+        if item.id in existing_ids:
+            continue
+        item.archived_at = datetime.now().strftime('%d.%m.%Y')
+        old_history.append(item.to_dict())
+        existing_ids.add(item.id)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(old_history, f, ensure_ascii=False, indent=4)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        full_history = json.load(f)
+    full_history.sort(key=lambda x: datetime.strptime(x.get('archived_at', '01.01.2020'), '%d.%m.%Y'), reverse=True)
+    return len(full_history)
+
+
+def table_run(db, new_items, limit):
+    db.append_history(new_items)
+    return len(db.latest_history(limit)), db.history_count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", type=int, default=100000)
+    parser.add_argument("--new", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=0, help="HISTORY_REPORT_LIMIT: 0 - весь архив, как в отчете")
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    old = [Cargo(**fields(i, rnd)) for i in range(args.history)]
+    new = [Cargo(**fields(args.history + i, rnd)) for i in range(args.new)]
+
+    tmp = tempfile.mkdtemp()
+    json_path = os.path.join(tmp, "history_archive.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump([{**item.to_dict(), "archived_at": "01.03.2026"} for item in old], f, ensure_ascii=False, indent=4)
+
+    database.DB_PATH = os.path.join(tmp, "cargo_system.db")
+    database.HISTORY_FILE = json_path
+    t0 = time.perf_counter()
+    db = database.CargoDB()   # разовый перенос JSON в таблицу
+    import_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    legacy_total = legacy_run(json_path, [Cargo(**fields(args.history + i, random.Random(i))) for i in range(args.new)])
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    shown, table_total = table_run(db, new, args.limit)
+    table_s = time.perf_counter() - t0
+
+    if legacy_total != table_total:
+        print(f"❌ Размер архива расходится: {legacy_total} / {table_total}")
+        sys.exit(1)
+    print(f"✅ В архиве {table_total} записей, в отчет уходит {shown}")
+    print(f"Разовый перенос JSON в таблицу: {import_s:.2f} с")
+    print(f"\n{'вариант':<10}{'запуск, с':>11}")
+    print(f"{'json':<10}{legacy_s:>11.3f}")
+    print(f"{'history':<10}{table_s:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
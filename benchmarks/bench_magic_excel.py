@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк разбора Excel-выгрузки Magic Trans: старый путь (файл на диске +
+openpyxl + iterrows) против нового (bytes в памяти + calamine + колонки).
+
+Запуск из корня проекта:
+    python benchmarks/bench_magic_excel.py --rows 50000
+
+Проверяет, что оба пути дают одинаковые записи, и печатает время и пик
+памяти (tracemalloc) для каждого.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _synthetic import magic_excel
+from api_classes import MagicTransAPI
+
+
+def legacy_parse_excel(content):
+    """Прежняя реализация MagicTransAPI._parse_excel (с записью на диск)"""
+    import pandas as pd
+
+    file_path = os.path.join(tempfile.mkdtemp(), "magic_tmp.xlsx")
+    with open(file_path, 'wb') as f:
+        f.write(content)
+
+    df = pd.read_excel(file_path, engine='openpyxl')
+    results = []
+    for _, row in df.iterrows():
+        cargo_id = str(row.get('Номер груза', '')).strip()
+        if not cargo_id or cargo_id == 'nan':
+            continue
+        p_str = f"{row.get('Количество мест', 0)}М | {row.get('Вес, кг', 0)}КГ | {row.get('Обьем, м3', 0)}М3"
+        raw_price = str(row.get('Сумма, руб.', '0')).replace(',', '.').replace(' ', '')
+        total_price = float(''.join(c for c in raw_price if c.isdigit() or c == '.') or 0.0)
+        results.append({
+            "tk": "МАДЖИК",
+            "id": cargo_id,
+            "sender": str(row.get('Отправитель', 'Н/Д')),
+            "recipient": str(row.get('Получатель', 'Н/Д')),
+            "route": str(row.get('Маршрут перевозки', 'Н/Д')),
+            "status": str(row.get('Статус', 'Н/Д')).upper(),
+            "params": p_str,
+            "arrival": str(row.get('Ориентировочная дата прибытия', 'Н/Д')),
+            "payment": str(row.get('Статус оплаты', 'Н/Д')),
+            "total_price": total_price,
+            "payer_type": "recipient" if "ЮЖНЫЙ ФОРПОСТ" in str(row.get('Плательщик', '')) else "sender",
+            "is_manual": False
+        })
+    os.remove(file_path)
+    return results
+
+
+def measure(fn, content):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(content)
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, wall, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"Генерация выгрузки на {args.rows} строк...")
+    content = magic_excel(args.rows)
+    print(f"Размер xlsx: {round(len(content) / 1024 / 1024, 1)} MB")
+
+    magic = MagicTransAPI("bench", "bench")
+    old, old_s, old_mb = measure(legacy_parse_excel, content)
+    new, new_s, new_mb = measure(magic._parse_excel, content)
+
+    # Новый путь дополнительно отдает места/вес/объем числами, а пустую
+    # ячейку - пустой строкой (прежний путь писал туда строку 'nan')
+    old = [{key: ('' if value == 'nan' else value) for key, value in row.items()} for row in old]
+    new = [{key: row[key] for key in legacy} for legacy, row in zip(old, new)] if len(old) == len(new) else new
+    if old != new:
+        diff = next(i for i, (a, b) in enumerate(zip(old, new)) if a != b) if len(old) == len(new) else None
+        print(f"❌ Результаты расходятся (строк {len(old)} / {len(new)}, первая разница: {diff})")
+        sys.exit(1)
+
+    print(f"\n{'путь':<10}{'время, с':>10}{'пик, MB':>10}{'строк':>8}")
+    print(f"{'old':<10}{old_s:>10.2f}{old_mb:>10.1f}{len(old):>8}")
+    print(f"{'new':<10}{new_s:>10.2f}{new_mb:>10.1f}{len(new):>8}")
+    print(f"Ускорение: x{old_s / new_s:.1f}")
+
+
+if __name__ == '__main__':
+    main()
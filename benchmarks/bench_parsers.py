@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк парсеров всех пяти ТК на синтетических выгрузках их формы.
+
+Запуск из корня проекта:
+    python benchmarks/bench_parsers.py --counts 1000,10000,100000
+    python benchmarks/bench_parsers.py --save       # записать базовую линию
+
+Для каждой ТК и каждого числа грузов печатает грузов/сек (лучший из
+--repeat прогонов, кэш clean_name сбрасывается перед каждым) и пик памяти
+(tracemalloc, отдельным прогоном), затем пропускную способность
+clean_name: с кэшем и без. Если есть базовая линия (--baseline), рядом
+печатается отношение к ней; падение больше --tolerance помечается, а с
+--check скрипт завершается с кодом 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _synthetic import CITIES, baikal_details, counterparty, dellin_orders, magic_excel, pecom_status, viteka_pages
+import main_parser as mp
+from api_classes import MagicTransAPI
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_parsers.json')
+
+
+def carriers():
+    """{ТК: (генератор выгрузки на count грузов, парсер выгрузки)}"""
+    magic = MagicTransAPI("bench", "bench")
+    return {
+        "Baikal": (baikal_details, mp.parse_baikal),
+        "Dellin": (dellin_orders, mp.parse_dellin),
+        "Pecom": (pecom_status, mp.parse_pecom),
+        "BSD": (viteka_pages, mp.parse_viteka),
+        # Magic приходит xlsx-файлом: в замер входит и чтение Excel
+        "Magic": (magic_excel, lambda content: mp.parse_magic(magic._parse_excel(content))),
+    }
+
+
+def run_parser(parser, payload, repeat):
+    best = None
+    for _ in range(repeat):
+        mp._normalizer.normalize.cache_clear()
+        t0 = time.perf_counter()
+        records = parser(payload)
+        wall = time.perf_counter() - t0
+        best = wall if best is None else min(best, wall)
+
+    mp._normalizer.normalize.cache_clear()
+    tracemalloc.start()
+    parser(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(records), best, peak / 1024 / 1024
+
+
+def bench_clean_name(count, repeat):
+    """Вызовов clean_name в секунду: поток имен и городов, как в парсерах"""
+    rnd = random.Random(1)
+    calls = []
+    for _ in range(count):
+        calls.append((counterparty(rnd)[0], False))
+        calls.append((rnd.choice(CITIES), True))
+    normalizer = mp._normalizer
+
+    def cached():
+        normalizer.normalize.cache_clear()
+        for text, is_city in calls:
+            mp.clean_name(text, is_city)
+
+    def uncached():
+        for text, is_city in calls:
+            normalizer._normalize(text, is_city)
+
+    result = {}
+    for mode, fn in (("cached", cached), ("uncached", uncached)):
+        name = f"clean_name/{mode}/{count}"
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            wall = time.perf_counter() - t0
+            best = wall if best is None else min(best, wall)
+        result[name] = {"calls_per_s": round(len(calls) / best)}
+    return result
+
+
+def compare(name, value, baseline, key, tolerance):
+    old = baseline.get(name, {}).get(key)
+    if not old:
+        return "", False
+    ratio = value / old
+    regressed = ratio < 1 - tolerance
+    return f"  x{ratio:.2f}{' ⚠️ регрессия' if regressed else ''}", regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--counts", default="1000,10000", help="числа грузов через запятую (1k-100k)")
+    parser.add_argument("--carriers", default="Baikal,Dellin,Pecom,BSD,Magic")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="перезаписать базовую линию текущими числами")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое падение грузов/сек (доля)")
+    parser.add_argument("--check", action="store_true", help="код выхода 1 при регрессии")
+    args = parser.parse_args()
+
+    counts = [int(c) for c in args.counts.split(",")]
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    regressions = []
+    table = carriers()
+    print(f"{'парсер':<16}{'грузов':>9}{'грузов/сек':>12}{'пик, MB':>10}")
+    for carrier in args.carriers.split(","):
+        make, parse = table[carrier]
+        for count in counts:
+            payload = make(count)
+            records, wall, peak_mb = run_parser(parse, payload, args.repeat)
+            name = f"{carrier}/{count}"
+            results[name] = {"records": records, "records_per_s": round(records / wall), "peak_mb": round(peak_mb, 1)}
+            note, regressed = compare(name, records / wall, baseline, "records_per_s", args.tolerance)
+            if regressed:
+                regressions.append(name)
+            print(f"{carrier:<16}{records:>9}{records / wall:>12.0f}{peak_mb:>10.1f}{note}")
+
+    print(f"\n{'clean_name':<16}{'грузов':>9}{'вызовов/сек':>12}")
+    for name, row in bench_clean_name(max(counts), args.repeat).items():
+        results[name] = row
+        note, regressed = compare(name, row["calls_per_s"], baseline, "calls_per_s", args.tolerance)
+        if regressed:
+            regressions.append(name)
+        _, mode, count = name.split('/')
+        print(f"{mode:<16}{count:>9}{row['calls_per_s']:>12}{note}")
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nБазовая линия сохранена: {args.baseline}")
+    elif regressions:
+        print(f"\n⚠️ Медленнее базовой линии: {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сверки запуска с БД: прежние запросы по одному (SELECT updated_at
+на каждый пропавший груз в своем соединении + отдельные сканы зависших
+БСД) против CargoDB.reconcile (временные таблицы, одна транзакция).
+
+Запуск из корня проекта:
+    python benchmarks/bench_reconcile.py --cargos 20000 --missing 2000
+
+Проверяет, что оба способа находят одних и тех же призраков (< 48ч) и
+одни и те же зависшие БСД.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_cargo_record import fields
+from cargo import Cargo
+import database
+
+
+def legacy_reconcile(db, api_ids, missing_ids):
+    """Как прежние MemoryManager.restore_ghosts и CargoClassifier._get_stuck_bsd_ids"""
+    recent = set()
+    for cargo_id in missing_ids:
+        with db.get_connection() as conn:
+            res = conn.execute("SELECT updated_at FROM cargo WHERE id = ?", (cargo_id,)).fetchone()
+            if res and res[0]:
+                last_seen = datetime.strptime(res[0], '%Y-%m-%d %H:%M:%S')
+                if (datetime.now() - last_seen).total_seconds() < 48 * 3600:
+                    recent.add(cargo_id)
+    with db.get_connection() as conn:
+        res = conn.execute("""
+            SELECT id FROM cargo WHERE tk = 'БСД'
+            AND (status LIKE '%ПРИБЫЛ%' OR status LIKE '%ДОСТАВКА%')
+            AND archived_at IS NOT NULL
+        """).fetchall()
+    pool = api_ids | missing_ids
+    return recent, {str(row[0]) for row in res} & pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cargos", type=int, default=20000)
+    parser.add_argument("--missing", type=int, default=2000)
+    args = parser.parse_args()
+
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(), "cargo_system.db")
+    db = database.CargoDB()
+    rnd = random.Random(1)
+    items = [Cargo(**{**fields(i, rnd), "status": rnd.choice(["В ПУТИ", "ПРИБЫЛ В ТК"])}) for i in range(args.cargos)]
+    db.save_cargos([], items)
+
+    # Часть грузов давно не видели, часть БСД уже помечена архивной
+    with db.get_connection() as conn:
+        conn.executemany("UPDATE cargo SET updated_at = ? WHERE id = ?", [
+            ((datetime.now() - timedelta(hours=rnd.choice([12, 47, 49, 96]))).strftime('%Y-%m-%d %H:%M:%S'), item.id)
+            for item in items if rnd.random() < 0.5
+        ])
+        conn.execute("UPDATE cargo SET archived_at = CURRENT_TIMESTAMP WHERE rowid % 5 = 0")
+        conn.commit()
+
+    missing_ids = {item.id for item in rnd.sample(items, args.missing)}
+    api_ids = {item.id for item in items} - missing_ids
+
+    t0 = time.perf_counter()
+    old_recent, old_stuck = legacy_reconcile(db, api_ids, missing_ids)
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    facts = db.reconcile(api_ids, missing_ids, archive_bsd=False)
+    new_s = time.perf_counter() - t0
+
+    if (old_recent, old_stuck) != (facts["recent"], facts["stuck"]):
+        print("❌ Призраки или зависшие БСД расходятся")
+        sys.exit(1)
+    print(f"✅ Призраков {len(facts['recent'])}, зависших БСД {len(facts['stuck'])} - совпадают")
+
+    print(f"\n{'вариант':<12}{'сверка, с':>11}")
+    print(f"{'по одному':<12}{legacy_s:>11.3f}")
+    print(f"{'reconcile':<12}{new_s:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк поиска груза по всей базе: LIKE по пяти колонкам cargo (полный
+скан) против /api/search (cargo_fts, trigram) с ранжированием и страницей.
+
+Запуск из корня проекта:
+    python benchmarks/bench_search.py --cargos 100000
+
+Проверяет, что оба способа находят одни и те же грузы (запросы в регистре
+данных: LIKE в SQLite не складывает регистр кириллицы, trigram - складывает), и
+во сколько обходятся триггеры индекса при записи пачки bulk_upsert.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_cargo_record import fields
+from cargo import Cargo
+import database
+import queries
+
+LIKE_SQL = """
+    SELECT id FROM cargo
+    WHERE id LIKE :q OR sender LIKE :q OR recipient LIKE :q OR route LIKE :q OR status LIKE :q
+"""
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        wall = time.perf_counter() - t0
+        best = wall if best is None else min(best, wall)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cargos", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    items = [Cargo(**fields(i, rnd)) for i in range(args.cargos)]
+    tmp = tempfile.mkdtemp()
+
+    # Цена триггеров: та же пачка в базу без поискового индекса и с ним
+    database.DB_PATH = os.path.join(tmp, "plain.db")
+    plain = database.CargoDB(migrate=False)
+    with plain.get_connection() as conn:
+        database.migrations.upgrade(conn, target=2)
+    _, plain_write = best_of(lambda: plain.bulk_upsert(items, 0), 1)
+
+    database.DB_PATH = os.path.join(tmp, "cargo_system.db")
+    db = database.CargoDB()
+    _, fts_write = best_of(lambda: db.bulk_upsert(items, 0), 1)
+
+    conn = db.get_connection(readonly=True)
+    print(f"{'запрос':<22}{'найдено':>9}{'LIKE, мс':>10}{'FTS, мс':>9}")
+    sample = items[args.cargos // 2]
+    # Из отправителя - самое длинное слово: короткие ("2)") триграммам не найти
+    for text in (sample.id, sample.route.split(" -> ")[0], max(sample.sender.split(), key=len)):
+        match = queries.fts_match(text)
+        if not match:
+            print(f"{text:<22}  пропущен: короче 3 символов")
+            continue
+        like_ids, like_s = best_of(
+            lambda: {row[0] for row in conn.execute(LIKE_SQL, {"q": f"%{text}%"})}, args.repeat)
+
+        def search():
+            total = conn.execute(queries.SEARCH_COUNT, (match,)).fetchone()[0]
+            page = conn.execute(queries.SEARCH, (match, 50, 0)).fetchall()
+            return total, page
+        (total, page), fts_s = best_of(search, args.repeat)
+
+        fts_ids = {row[0] for row in conn.execute(
+            "SELECT c.id FROM cargo_fts JOIN cargo c ON c.rowid = cargo_fts.rowid WHERE cargo_fts MATCH ?", (match,))}
+        if like_ids != fts_ids or total != len(like_ids):
+            print(f"❌ '{text}': LIKE нашел {len(like_ids)}, FTS {len(fts_ids)}")
+            sys.exit(1)
+        print(f"{text:<22}{total:>9}{like_s * 1000:>10.1f}{fts_s * 1000:>9.1f}")
+    conn.close()
+
+    print(f"\nЗапись {args.cargos} грузов bulk_upsert: без индекса {plain_write:.2f} с, "
+          f"с триггерами cargo_fts {fts_write:.2f} с")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк запросов server.py до и после миграций схемы (migrations.py):
+прежние запросы на cargo без индексов и генерируемых колонок против
+queries.SERVER_QUERIES на той же базе после upgrade.
+
+Запуск из корня проекта:
+    python benchmarks/bench_server_queries.py --cargos 100000
+
+Сверяет результаты (аналитика ТК, актив) и печатает планы: после
+миграций ни один запрос не должен читать таблицу целиком.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_cargo_record import fields
+from cargo import Cargo
+import database
+import migrations
+import queries
+
+# Запросы server.py до миграций
+LEGACY = {
+    "report_active": ("""
+        SELECT *, (places || 'М | ' || weight || 'КГ | ' || volume || 'М3') as params
+        FROM cargo WHERE is_archived = 0 ORDER BY arrival ASC
+    """, ()),
+    "report_archive": ("""
+        SELECT *, (places || 'М | ' || weight || 'КГ | ' || volume || 'М3') as params
+        FROM cargo WHERE is_archived = 1 ORDER BY updated_at DESC LIMIT 200
+    """, ()),
+    "report_last_update": (queries.REPORT_LAST_UPDATE, ()),
+    "tk_compare": (f"""
+        SELECT tk, {migrations.CARGO_GENERATED['weight_category'][len('TEXT GENERATED ALWAYS AS '):-len(' STORED')]} as category,
+            total_price, weight, volume, places,
+            ABS(JULIANDAY(COALESCE(archived_at, date('now'))) - JULIANDAY(created_at)) as days_diff
+        FROM cargo
+        WHERE updated_at >= date('now', ?)
+          AND (sender LIKE '%ЮЖНЫЙ ФОРПОСТ%' OR recipient LIKE '%ЮЖНЫЙ ФОРПОСТ%')
+          AND weight > 0 AND weight < 5000 AND total_price > 0
+    """, ("-30 days",)),
+    "tasks_upcoming": (queries.TASKS_UPCOMING, ()),
+}
+
+
+def timed(conn, sql, params, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        wall = time.perf_counter() - t0
+        best = wall if best is None else min(best, wall)
+    return rows, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cargos", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    items = [Cargo(**{
+        **fields(i, rnd),
+        "sender": rnd.choice(['ООО "Ромашка"', 'ЮЖНЫЙ ФОРПОСТ ООО', 'ИП Петров']),
+        "status": rnd.choice(["В ПУТИ", "ВЫДАН"]),
+    }) for i in range(args.cargos)]
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(), "cargo_system.db")
+    db = database.CargoDB(migrate=False)
+    db.save_cargos([], items)
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO driver_tasks (task_date, title) VALUES (date('now', ?), 'bench')",
+                         [(f"-{rnd.randint(0, 365)} days",) for _ in range(args.cargos // 10)])
+        conn.commit()
+
+    conn = sqlite3.connect(database.DB_PATH)
+    before = {name: timed(conn, sql, params, args.repeat) for name, (sql, params) in LEGACY.items()}
+    migrations.upgrade(conn)
+    after = {name: timed(conn, sql, params, args.repeat) for name, (sql, params) in queries.SERVER_QUERIES.items()}
+
+    if sorted(before["tk_compare"][0]) != sorted(after["tk_compare"][0]):
+        print("❌ Аналитика ТК расходится")
+        sys.exit(1)
+    if len(before["report_active"][0]) != len(after["report_active"][0]):
+        print("❌ Актив расходится")
+        sys.exit(1)
+    print("✅ Результаты совпадают")
+
+    plans = migrations.explain(conn)
+    print(f"\n{'запрос':<20}{'до, мс':>10}{'после, мс':>11}  план после")
+    for name in LEGACY:
+        print(f"{name:<20}{before[name][1] * 1000:>10.2f}{after[name][1] * 1000:>11.2f}  {'; '.join(plans[name])}")
+    if migrations.full_scans(plans):
+        print("\n❌ Есть полные сканы")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
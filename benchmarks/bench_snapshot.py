@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк хранения сырого сбора: прежний raw_api_data.json (indent=2,
+sort_keys, json.load целиком) против снапшота по блокам ТК (zstd).
+
+Запуск из корня проекта:
+    python benchmarks/bench_snapshot.py --rows 20000
+
+Печатает размер на диске, время записи и чтения и пик памяти при
+чтении; для снапшота - чтение по одному блоку (как в run_main_parser).
+Проверяет, что прочитанные блоки совпадают с исходными.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _synthetic import MAGIC_HEADER, magic_rows, viteka_pages
+from snapshot import RawSnapshot, write_snapshot
+
+
+def synthetic_blocks(rows):
+    return {
+        "Timestamp": "01-01-2026 00:00:00",
+        "BSD": viteka_pages(rows // 4),
+        "Magic": [dict(zip(MAGIC_HEADER, map(str, row))) for row in magic_rows(rows)],
+    }
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, wall, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    blocks = synthetic_blocks(args.rows)
+    tmp = tempfile.mkdtemp()
+    json_path = os.path.join(tmp, "raw_api_data.json")
+    snap_path = os.path.join(tmp, "raw_api_data.snap")
+
+    def write_json():
+        with open(json_path, "w", encoding='utf-8') as f:
+            json.dump(blocks, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+    def read_json():
+        with open(json_path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        return {name: len(loaded[name]) for name in loaded}, loaded
+
+    def read_snapshot():
+        # Как parse_blocks: блок за блоком, предыдущий уже не держится
+        snapshot = RawSnapshot(snap_path)
+        sizes = {}
+        for name in snapshot:
+            data = snapshot[name]
+            sizes[name] = len(data)
+        return sizes, None
+
+    _, json_write_s, _ = measure(write_json)
+    _, snap_write_s, _ = measure(lambda: write_snapshot(blocks, snap_path))
+    (json_sizes, loaded), json_read_s, json_mb = measure(read_json)
+    (snap_sizes, _), snap_read_s, snap_mb = measure(read_snapshot)
+
+    if loaded != blocks or RawSnapshot(snap_path).to_dict() != blocks or json_sizes != snap_sizes:
+        print("❌ Прочитанные данные расходятся с исходными")
+        sys.exit(1)
+    print("✅ Оба формата возвращают исходные блоки")
+
+    print(f"\n{'формат':<10}{'диск, MB':>10}{'запись, с':>11}{'чтение, с':>11}{'пик чтения, MB':>16}")
+    for name, path, w, r, mb in (
+        ("json", json_path, json_write_s, json_read_s, json_mb),
+        ("snapshot", snap_path, snap_write_s, snap_read_s, snap_mb),
+    ):
+        print(f"{name:<10}{os.path.getsize(path) / 1024 / 1024:>10.1f}{w:>11.2f}{r:>11.2f}{mb:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Бюджет времени старта для точек входа src/main.py и server.py.
+
+Запуск из корня проекта:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --top 15 --budget-main 250
+
+Импортирует каждую точку входа в чистом интерпретаторе с `-X importtime`,
+печатает самые дорогие модули и завершается с кодом 1, если суммарное время
+импорта (медиана по --runs запускам) превысило бюджет.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Пороги регрессии (мс) - медиана суммарного импорта на холодном интерпретаторе
+ENTRY_POINTS = {
+    "main": {"cwd": os.path.join(ROOT, 'src'), "module": "main", "budget_ms": 250},
+    "server": {"cwd": ROOT, "module": "server", "budget_ms": 300},
+}
+
+# import time:       self [us] |  cumulative | imported package
+LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+# Модули, которые не должны попадать в импорт точек входа
+HEAVY_MODULES = ("playwright", "pandas", "numpy", "bs4", "openpyxl", "httpx")
+
+
+def import_profile(cwd, module):
+    """Один холодный импорт модуля: список (модуль, self_us, cumulative_us, depth)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} упал:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cum_us), len(indent) // 2))
+    return rows
+
+
+def report(name, cfg, runs, top):
+    totals = []
+    profile = []
+    for _ in range(runs):
+        profile = import_profile(cfg["cwd"], cfg["module"])
+        # Корневые модули (depth 0) не пересекаются - их cumulative суммируем
+        totals.append(sum(cum for _, _, cum, depth in profile if depth == 0) / 1000)
+
+    total_ms = statistics.median(totals)
+    heavy = sorted({n.split('.')[0] for n, *_ in profile if n.split('.')[0] in HEAVY_MODULES})
+
+    print(f"\n=== {name} ({cfg['module']}) ===")
+    print(f"Суммарный импорт: {total_ms:.1f} мс (медиана из {runs}), бюджет {cfg['budget_ms']} мс")
+    print(f"Тяжелые модули при старте: {', '.join(heavy) or 'нет'}")
+    print(f"{'cumulative, мс':>15}{'self, мс':>10}  модуль")
+    for mod, self_us, cum_us, _ in sorted(profile, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"{cum_us / 1000:>15.1f}{self_us / 1000:>10.1f}  {mod}")
+
+    return total_ms <= cfg["budget_ms"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-main", type=float)
+    parser.add_argument("--budget-server", type=float)
+    args = parser.parse_args()
+
+    if args.budget_main is not None:
+        ENTRY_POINTS["main"]["budget_ms"] = args.budget_main
+    if args.budget_server is not None:
+        ENTRY_POINTS["server"]["budget_ms"] = args.budget_server
+
+    failed = [name for name, cfg in ENTRY_POINTS.items() if not report(name, cfg, args.runs, args.top)]
+    if failed:
+        print(f"\n❌ Превышен бюджет старта: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ Все точки входа укладываются в бюджет старта.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк парсинга страниц кабинета БСД: прежний parse_viteka (полное
+дерево html.parser + re.compile на каждую строку) против нового (lxml по
+строкам таблицы и запасной путь BeautifulSoup + SoupStrainer).
+
+Запуск из корня проекта:
+    python benchmarks/bench_viteka_parse.py --rows 5000
+
+Проверяет, что все пути дают одинаковые записи, и печатает время и
+скорость (строк/с) для каждого.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main_parser as mp
+from _synthetic import viteka_pages
+from cargo import Cargo
+
+clean_name = mp.clean_name
+
+
+def legacy_parse_viteka(html_list):
+    """Прежняя реализация main_parser.parse_viteka"""
+    results = []
+    if not html_list: return results
+
+    from bs4 import BeautifulSoup
+
+    for html in html_list:
+        soup = BeautifulSoup(html, 'html.parser')
+        rows = soup.select('#orders-table-body tr')
+
+        for row in rows:
+            tds = row.find_all('td')
+            if len(tds) < 12: continue
+
+            order_text = tds[0].get_text(strip=True).upper()
+            match = re.search(r'([А-ЯA-Z]{2}\d{2}-\d+)', order_text)
+            if match:
+                order_id = match.group(1)
+            else:
+                continue
+
+            raw_recipient = tds[7].get_text(" ", strip=True)
+            clean_recipient_raw = re.split(r'ИЗМЕНИТЬ|ПОМЕНЯТЬ', raw_recipient)[0].strip()
+            recipient = clean_name(clean_recipient_raw)
+
+            status_raw = tds[1].get_text(" ", strip=True).upper()
+            if "ВЫДАН" in status_raw:
+                display_status = "ВЫДАН"
+            elif "ПРИБЫЛ" in status_raw or "СКЛАД" in status_raw:
+                display_status = "ПРИБЫЛ В ТК"
+            else:
+                display_status = "В ПУТИ"
+
+            arrival_match = re.search(r'(\d{2})\.(\d{2})\.(\d{2,4})', status_raw)
+            if arrival_match:
+                d, m, y = arrival_match.groups()
+                full_year = f"20{y}" if len(y) == 2 else y
+                arrival = f"{full_year}-{m}-{d}"
+            else:
+                arrival = (datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d')
+
+            def get_val(label):
+                found = tds[3].find('span', string=re.compile(label))
+                return found.find_next('span').get_text(strip=True) if found else "0"
+
+            payment_raw = tds[8].get_text(strip=True)
+            if "Не оплачена" in payment_raw:
+                payment_display = "К оплате"
+            elif "Оплачена" in payment_raw:
+                payment_display = "Оплачено"
+            else:
+                payment_display = "Н/Д"
+
+            results.append({
+                "tk": "БСД",
+                "id": order_id,
+                "sender": clean_name(tds[6].get_text(strip=True)),
+                "recipient": recipient,
+                "route": f"{clean_name(tds[4].get_text(strip=True), True)} -> {clean_name(tds[5].get_text(strip=True), True)}",
+                "status": display_status,
+                "params": f"{get_val('мест')}М | {get_val('Вес').replace('кг','')}КГ | {get_val('Объем').replace('м3','')}М3",
+                "arrival": arrival,
+                "payment": payment_display,
+                "total_price": float(re.sub(r'[^\d.]', '', tds[11].get_text(strip=True).replace(',','.')) or 0),
+                "payer_type": "recipient",
+                "is_manual": False
+            })
+    return results
+
+
+VARIANTS = {
+    "legacy": legacy_parse_viteka,
+    "soup+strainer": lambda pages: mp.parse_viteka(pages, rows=mp._viteka_rows_soup),
+    "lxml": lambda pages: mp.parse_viteka(pages, rows=mp._viteka_rows_lxml),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--per-page", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = viteka_pages(args.rows, args.per_page)
+    print(f"Страниц: {len(pages)}, строк: {args.rows}, "
+          f"HTML: {round(sum(len(p) for p in pages) / 1024 / 1024, 1)} MB")
+
+    timings = {}
+    results = {}
+    for name, fn in VARIANTS.items():
+        # Каждый путь стартует с пустым кэшем clean_name
+        mp._normalizer.normalize.cache_clear()
+        t0 = time.perf_counter()
+        results[name] = fn(pages)
+        timings[name] = time.perf_counter() - t0
+
+    # Прежний парсер отдает словари со строкой params, новый - Cargo с числами
+    results["legacy"] = [Cargo.from_dict(item) for item in results["legacy"]]
+    base = results["legacy"]
+    for name, res in results.items():
+        if res != base:
+            diff = next((i for i, (a, b) in enumerate(zip(base, res)) if a != b), None)
+            print(f"❌ {name}: результаты расходятся (записей {len(base)} / {len(res)}, первая разница: {diff})")
+            sys.exit(1)
+    print(f"✅ Все пути дали одинаковые {len(base)} записей")
+
+    print(f"\n{'путь':<16}{'время, с':>10}{'строк/с':>12}{'ускорение':>11}")
+    for name, sec in timings.items():
+        print(f"{name:<16}{sec:>10.2f}{args.rows / sec:>12,.0f}{timings['legacy'] / sec:>10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
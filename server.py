@@ -1,8 +1,6 @@
 import os
 import sys
 
-import numpy as np
-
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 
@@ -11,8 +9,17 @@ import sqlite3
 from src.settings import CURRENT_STATE_FILE, DATA_DIR
 from flask import Flask, render_template, jsonify, send_from_directory, request
 from src.database import CargoDB
+from src import queries
 app = Flask(__name__)
-db = CargoDB()
+_db = None
+
+
+def get_db():
+    """CargoDB создается (и прогоняет DDL) при первом запросе, а не при импорте"""
+    global _db
+    if _db is None:
+        _db = CargoDB()
+    return _db
 
 # --- ЛОГИКА ОКРУЖЕНИЯ ---
 IS_DEV_MODE = "--dev" in sys.argv
@@ -42,34 +49,22 @@ def get_latest_report():
 def get_report_from_db():
     """Собирает структуру отчета напрямую из SQLite"""
     try:
-        conn = db.get_connection()
+        conn = get_db().get_connection(readonly=True)
         # Ставим row_factory, чтобы получать данные как словари (dict)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
         # 1. Загружаем АКТИВ (is_archived = 0)
-        cursor.execute("""
-            SELECT *,
-            (places || 'М | ' || weight || 'КГ | ' || volume || 'М3') as params
-            FROM cargo
-            WHERE is_archived = 0
-            ORDER BY arrival ASC
-        """)
+        cursor.execute(queries.REPORT_ACTIVE)
         active = [dict(row) for row in cursor.fetchall()]
 
         # 2. Загружаем АРХИВ (is_archived = 1)
-        cursor.execute("""
-            SELECT *,
-            (places || 'М | ' || weight || 'КГ | ' || volume || 'М3') as params
-            FROM cargo
-            WHERE is_archived = 1
-            ORDER BY updated_at DESC LIMIT 200
-        """)
+        cursor.execute(queries.REPORT_ARCHIVE)
         archive = [dict(row) for row in cursor.fetchall()]
 
         # 3. Формируем метаданные
         # Время последнего обновления берем из самой свежей записи
-        cursor.execute("SELECT MAX(updated_at) FROM cargo")
+        cursor.execute(queries.REPORT_LAST_UPDATE)
         last_update = cursor.fetchone()[0] or "Н/Д"
 
         return {
@@ -92,37 +87,12 @@ def get_report_from_db():
 def api_tk_compare():
     days = request.args.get('days', 30)
     try:
-        conn = db.get_connection()
+        conn = get_db().get_connection(readonly=True)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
-        # 1. Тянем сырые данные для точного расчета
-        cursor.execute(f"""
-            SELECT
-                tk,
-                CASE
-                    WHEN weight <= 15 THEN '📦 Ультра-малые (до 15кг)'
-                    WHEN weight > 15 AND weight <= 35 THEN '📦 Малые (15-35кг)'
-                    WHEN weight > 35 AND weight <= 75 THEN '📦 Средние (35-75кг)'
-                    WHEN weight > 75 AND weight <= 150 THEN '📦 Премиум (75-150кг)'
-                    WHEN weight > 150 AND weight <= 400 THEN '🚚 Крупные (150-400кг)'
-                    WHEN weight > 400 AND weight <= 1000 THEN '🚚 Тяжелые (400кг-1т)'
-                    ELSE '🚜 Тонники (свыше 1т)'
-                END as category,
-                total_price,
-                weight,
-                volume,
-                places,
-                ABS(JULIANDAY(COALESCE(archived_at, date('now'))) - JULIANDAY(created_at)) as days_diff
-            FROM cargo
-            WHERE updated_at >= date('now', '-{days} days')
-              AND (sender LIKE '%ЮЖНЫЙ ФОРПОСТ%' OR recipient LIKE '%ЮЖНЫЙ ФОРПОСТ%')
-
-              -- ВОТ ЭТА СТРОКА ОТСЕКАЕТ АНОМАЛИИ (Грузы тяжелее 5 тонн):
-              AND weight > 0 AND weight < 5000
-
-              AND total_price > 0
-        """)
+        # 1. Тянем сырые данные для точного расчета (категория веса и "наш груз" - колонки cargo)
+        cursor.execute(queries.TK_COMPARE, (f"-{int(days)} days",))
 
         raw_rows = [dict(row) for row in cursor.fetchall()]
 
@@ -144,6 +114,8 @@ def api_tk_compare():
             stats_map[key]['total_vol'] += r['volume']
             stats_map[key]['total_places'] += r['places']
 
+        import numpy as np  # нужен только аналитике
+
         final_stats = []
         for (tk, cat), data in stats_map.items():
             # Работаем через NumPy для квантилей
@@ -206,10 +178,38 @@ def analytics_page():
 def render_docs(filename='index.html'):
     return send_from_directory(DOCS_PATH, filename)
 
+@app.route('/api/search')
+def api_search():
+    """Поиск по всей базе (актив и весь архив): ?q=текст&page=1&limit=50"""
+    query = request.args.get('q', '')
+    match = queries.fts_match(query)
+    if not match:
+        return jsonify({"status": "error", "message": "Нужно хотя бы одно слово от 3 символов"}), 400
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    conn = get_db().get_connection(readonly=True)
+    try:
+        conn.row_factory = sqlite3.Row
+        total = conn.execute(queries.SEARCH_COUNT, (match,)).fetchone()[0]
+        rows = conn.execute(queries.SEARCH, (match, limit, (page - 1) * limit)).fetchall()
+        return jsonify({
+            "query": query,
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "results": [dict(row) for row in rows]
+        })
+    except Exception as e:
+        print(f"❌ [API Search Error]: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        conn.close()
+
 # --- РОУТЫ ДЛЯ ЗАДАЧ ВОДИТЕЛЯ (PLANNER) ---
 @app.route('/api/tasks', methods=['GET', 'POST'])
 def handle_tasks_root():
-    conn = db.get_connection()
+    conn = get_db().get_connection(readonly=request.method == 'GET')
     try:
         if request.method == 'POST':
             data = request.json
@@ -240,7 +240,7 @@ def handle_tasks_root():
         # GET логика
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM driver_tasks WHERE task_date >= date('now', '-1 day') ORDER BY task_date, task_time")
+        cursor.execute(queries.TASKS_UPCOMING)
         return jsonify([dict(row) for row in cursor.fetchall()])
     except Exception as e:
         print(f"❌ [API Tasks Error]: {e}")
@@ -250,7 +250,7 @@ def handle_tasks_root():
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT', 'PATCH', 'DELETE'])
 def manage_single_task(task_id):
-    conn = db.get_connection()
+    conn = get_db().get_connection()
     try:
         cursor = conn.cursor()
         if request.method == 'DELETE':
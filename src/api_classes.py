@@ -18,17 +18,22 @@
 
 import os
 import json
+import time
 import requests
 from pathlib import Path
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
-from playwright.sync_api import sync_playwright
-import pandas as pd
 from requests.auth import HTTPBasicAuth
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 import re
 
+# playwright, pandas и bs4 тяжелые: импортируются внутри методов,
+# только когда соответствующая ТК реально используется
+
+import settings as st
+from http_session import make_session, RateLimiter
+
 current_dir = Path.cwd()
 
 # secrets import mechanism
@@ -88,6 +93,7 @@ class BaikalApiV2:
         """
         self.apiKey = apiKey
         self.basicAuth = HTTPBasicAuth(username=self.apiKey, password="")
+        self.session = make_session("Baikal", self.headers)
 
     def get_oreders_list(self):
         """
@@ -109,20 +115,27 @@ class BaikalApiV2:
         :returns: the JSON object obtained via the url_cargos_list link uses a data dictionary when requested, which stores information about statuses and date ranges.
         :rtype: dict
         """
-        data = {
+        r = self.session.post(
+            self.url_cargos_list,
+            data=json.dumps(self.get_period()),
+            auth=self.basicAuth,
+            headers=self.headers,
+        )
+        return json.loads(r.text)
+
+    def get_period(self):
+        """request body for order/list: 31-day window and all known statuses
+
+        :returns: dict with date range and status codes
+        :rtype: dict
+        """
+        return {
             "date": {
                 "from": str(time_for_month_ago.isoformat(timespec="seconds")),
                 "to": str(time_for_now.isoformat(timespec="seconds")),
             },
             "status": [0, 4, 5, 6, 7, 10, 11, 12, 9, 8, 13],
         }
-        r = requests.post(
-            self.url_cargos_list,
-            data=json.dumps(data),
-            auth=self.basicAuth,
-            headers=self.headers,
-        )
-        return json.loads(r.text)
 
     def collect_cargocodes(self):
         """
@@ -150,7 +163,7 @@ class BaikalApiV2:
         """
 
         data = {"number": number}
-        r = requests.post(
+        r = self.session.post(
             self.url_cargos_detail,
             data=json.dumps(data),
             auth=self.basicAuth,
@@ -176,6 +189,7 @@ class PecomApiV1:
     url_cargos_status = f"{host}cargos/status/"
 
     cargoStatus = ["В пути", "Прибыл", "Выдан на доставку"]
+    timeout = 20   # сек. на запрос (и в синхронном клиенте, и в AsyncCollector)
 
     headers = {
         "Content-Type": "application/json; charset=utf-8",
@@ -187,14 +201,15 @@ class PecomApiV1:
         self.appKey = appKey
         self.login = login
         self.basicAuth = HTTPBasicAuth(self.login, self.appKey)
+        self.session = make_session("Pecom", self.headers)
 
     def orders_list(self):
-        r = requests.post(
+        r = self.session.post(
             self.url_cargos_list,
             data=json.dumps(self.get_period()),
             auth=self.basicAuth,
             headers=self.headers,
-            timeout=20
+            timeout=self.timeout
         )
         # return r.request.body, r.request.headers, self.url_cargos_list
         return r.json()
@@ -220,12 +235,12 @@ class PecomApiV1:
 
     def order_info(self, cargoCode):
         data = {"cargoCode": cargoCode}
-        return requests.post(
+        return self.session.post(
             self.url_cargos_detail,
             data=json.dumps(data),
             auth=self.basicAuth,
             headers=self.headers,
-            timeout=20
+            timeout=self.timeout
         ).json()
 
     def get_period(self):
@@ -245,7 +260,7 @@ class PecomApiV1:
         :rtype: {json object}
         """
         data = {"cargoCodes": cargoCodes}
-        r = requests.post(
+        r = self.session.post(
             self.url_cargos_status,
             data=json.dumps(data),
             auth=self.basicAuth,
@@ -253,25 +268,103 @@ class PecomApiV1:
         )
         return r.json()
 
+    @staticmethod
+    def chunks(cargoCodes, size=st.PC_CHUNK_SIZE):
+        """Режет список номеров на куски для cargos/status"""
+        return [cargoCodes[i:i + size] for i in range(0, len(cargoCodes), size)]
+
+    @staticmethod
+    def merge_statuses(responses):
+        """Склеивает ответы cargos/status по кускам в один {"cargos": [...]}"""
+        cargos = []
+        for r in responses:
+            cargos.extend((r or {}).get("cargos") or [])
+        return {"cargos": cargos}
+
+    def _fetch_chunk(self, chunk, retries=st.PC_CHUNK_RETRIES):
+        """Один кусок cargos/status; при ошибке повторяется только он"""
+        for attempt in range(1, retries + 1):
+            try:
+                r = self.session.post(
+                    self.url_cargos_status,
+                    data=json.dumps({"cargoCodes": chunk}),
+                    auth=self.basicAuth,
+                    headers=self.headers,
+                    timeout=self.timeout
+                )
+                return r.json()
+            except Exception as e:
+                print(f"[Pecom] Кусок из {len(chunk)} номеров, попытка {attempt}: {e}")
+        return None
+
     def fetch_detailed_data_hardcoded(self):
         """Метод возвращает детальную информацию о перевозке
-        на вход получая список из номеров перевозок
+        по всем номерам из collect_cargocodes.
+
+        Номера отправляются кусками по settings.PC_CHUNK_SIZE параллельно
+        (PC_CHUNK_WORKERS потоков на общей сессии), ответы склеиваются в
+        тот же {"cargos": [...]}, который ждет parse_pecom. Кусок, не
+        отдавшийся после повторов, пропускается, остальные сохраняются.
 
-        [description]
-        :param cargoCodes: список
-        :type cargoCodes: list
         :returns: json объект
         :rtype: {json object}
         """
-        data = {"cargoCodes": self.collect_cargocodes()}
-        r = requests.post(
-            self.url_cargos_status,
-            data=json.dumps(data),
-            auth=self.basicAuth,
-            headers=self.headers,
-            timeout=20
-        )
-        return r.json()
+        chunks = self.chunks(self.collect_cargocodes())
+        with ThreadPoolExecutor(max_workers=st.PC_CHUNK_WORKERS) as executor:
+            responses = list(executor.map(self._fetch_chunk, chunks))
+
+        failed = sum(1 for r in responses if r is None)
+        if failed:
+            print(f"[Pecom] ⚠️ Не получено кусков: {failed} из {len(chunks)}")
+        return self.merge_statuses(responses)
+
+
+class DellinSessionStore:
+    """
+    Хранит sessionID Деловых Линий на диске между запусками.
+
+    Сессия привязана к логину и живет ttl_hours с момента входа; по
+    истечении (или при ошибке авторизации в API) запись сбрасывается.
+
+    :param path: JSON-файл сессии
+    :type path: str
+    :param ttl_hours: срок жизни сохраненной сессии
+    :type ttl_hours: float
+    """
+
+    def __init__(self, path=st.DL_SESSION_FILE, ttl_hours=st.DL_SESSION_TTL_HOURS):
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+
+    def load(self, login):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("login") != login:
+                return None
+            if datetime.fromisoformat(data["expires_at"]) <= datetime.now():
+                return None
+            return data["sessionID"]
+        except Exception as e:
+            print(f"[Dellin] Сохраненная сессия не читается: {e}")
+            return None
+
+    def save(self, login, session_id):
+        data = {
+            "login": login,
+            "sessionID": session_id,
+            "expires_at": (datetime.now() + self.ttl).isoformat(timespec="seconds"),
+        }
+        # Файл с сессией доступен только владельцу
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class DellinApiV1:
@@ -282,19 +375,62 @@ class DellinApiV1:
 
     headers = {"Content-Type": "application/json"}
 
-    def __init__(self, appKey, login=None, password=None):
+    def __init__(self, appKey, login=None, password=None, session_store=None):
+        """Вход не выполняется в конструкторе: sessionID берется из
+        DellinSessionStore или запрашивается при первом обращении к API"""
         self.appKey = appKey
+        self.login = login
+        self.password = password
         self.sessionID = None
-        if login and password:
-            self.auth(login, password)
+        self.session = make_session("Dellin", self.headers)
+        self.session_store = session_store or DellinSessionStore()
 
     def auth(self, login, password):
         auth_data = {"login": login, "password": password}
         auth_data.update(self.public_auth())
-        r = requests.post(
+        r = self.session.post(
             self.url_login, data=json.dumps(auth_data), headers=self.headers
         )
         self.sessionID = r.json()["sessionID"]
+        self.session_store.save(login, self.sessionID)
+
+    def ensure_session(self):
+        """sessionID из памяти, с диска или через новый вход (лениво)"""
+        if self.sessionID:
+            return self.sessionID
+        self.sessionID = self.session_store.load(self.login)
+        if not self.sessionID and self.login and self.password:
+            self.auth(self.login, self.password)
+        return self.sessionID
+
+    def refresh_session(self):
+        """Сбрасывает протухшую сессию и входит заново"""
+        print("[Dellin] Сессия недействительна, повторный вход...")
+        self.sessionID = None
+        self.session_store.clear()
+        return self.ensure_session()
+
+    @staticmethod
+    def is_auth_error(status_code, payload):
+        """401/403 в HTTP-статусе или в metadata ответа = сессия не принята"""
+        if status_code in (401, 403):
+            return True
+        if isinstance(payload, dict):
+            return (payload.get("metadata") or {}).get("status") in (401, 403)
+        return False
+
+    def _post_authorized(self, url, build_data):
+        """POST с sessionID; при ошибке авторизации один раз перелогиниваемся"""
+        self.ensure_session()
+        r = self.session.post(url, data=json.dumps(build_data()), headers=self.headers)
+        try:
+            payload = r.json()
+        except ValueError:
+            payload = None
+        if self.is_auth_error(r.status_code, payload):
+            self.refresh_session()
+            r = self.session.post(url, data=json.dumps(build_data()), headers=self.headers)
+        return r.json()
 
     def public_auth(self):
         return {
@@ -308,11 +444,12 @@ class DellinApiV1:
         }
 
     def order_info(self, docIds):
-        data = {"docIds": docIds}
-        data.update(self.customers_auth())
-        return requests.post(
-            self.url_orders, data=json.dumps(data), headers=self.headers
-        ).json()
+        def build_data():
+            data = {"docIds": docIds}
+            data.update(self.customers_auth())
+            return data
+
+        return self._post_authorized(self.url_orders, build_data)
 
     # def orders_info(self):
     #     data = {
@@ -330,7 +467,8 @@ class DellinApiV1:
     #         self.url_orders, data=json.dumps(data), headers=self.headers
     #     ).json()
 
-    def orders_info(self):
+    def orders_query(self):
+        """Тело запроса v3/orders.json за последние 30 дней (с sessionID)"""
         # Вычисляем дату: 30 дней назад
         # Формат должен быть "ГГГГ-ММ-ДД ЧЧ:ММ" согласно документации
         thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d %H:%M')
@@ -349,13 +487,10 @@ class DellinApiV1:
         }
 
         data.update(self.customers_auth())
+        return data
 
-        r = requests.post(
-            self.url_orders,
-            data=json.dumps(data),
-            headers=self.headers
-        )
-        return r.json()
+    def orders_info(self):
+        return self._post_authorized(self.url_orders, self.orders_query)
 
 
 class VitekaApiV1:
@@ -363,13 +498,30 @@ class VitekaApiV1:
     url_login = f"{host}/login"
     url_orders = f"{host}/cabinet/orders"
 
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/145.0.0.0 Safari/537.36"
+    }
+
     def __init__(self, login, password):
         self.login = login
         self.password = password
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/145.0.0.0 Safari/537.36"
-        })
+        self.session = make_session("Viteka", self.headers)
+        self.rate_limiter = RateLimiter(st.VT_RATE)
+
+    def login_payload(self, login_html):
+        """Форма входа с CSRF-токеном со страницы логина (None, если токена нет)"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(login_html, 'html.parser')
+        token_tag = soup.find('input', {'name': '_token'})
+        if not token_tag:
+            return None
+        return {
+            "_token": token_tag['value'],
+            "login": self.login,
+            "password": self.password,
+            "remember": "on"
+        }
 
     def auth(self, retries=3):
         """Пытаемся войти до 3-х раз с огромным таймаутом"""
@@ -377,16 +529,8 @@ class VitekaApiV1:
             try:
                 # Огромный таймаут 40 секунд
                 r_init = self.session.get(self.url_login, timeout=40)
-                soup = BeautifulSoup(r_init.text, 'html.parser')
-                token_tag = soup.find('input', {'name': '_token'})
-                if not token_tag: continue
-
-                payload = {
-                    "_token": token_tag['value'],
-                    "login": self.login,
-                    "password": self.password,
-                    "remember": "on"
-                }
+                payload = self.login_payload(r_init.text)
+                if not payload: continue
 
                 r_post = self.session.post(
                     self.url_login,
@@ -404,131 +548,346 @@ class VitekaApiV1:
                 time.sleep(2) # Пауза перед ретраем
         return False
 
-    def get_raw_html_pages(self, count=2):
+    # Номер накладной БСД: 2 буквы, 2 цифры, дефис, цифры (как в parse_viteka)
+    order_id_re = re.compile(r'([А-ЯA-Z]{2}\d{2}-\d+)')
+    page_link_re = re.compile(r'[?&;]page=(\d+)')
+
+    @classmethod
+    def page_count(cls, html):
+        """Число страниц по ссылкам пагинации (?page=N) первой страницы"""
+        return max((int(n) for n in cls.page_link_re.findall(html)), default=1)
+
+    @classmethod
+    def page_order_ids(cls, html):
+        """Номера накладных в таблице заказов страницы (без полного разбора HTML)"""
+        pos = html.find('orders-table-body')
+        return set(cls.order_id_re.findall(html[pos:].upper() if pos >= 0 else ""))
+
+    @classmethod
+    def only_archived(cls, html, known_archived):
+        """True, если все заказы страницы уже в архиве (или заказов нет)"""
+        return cls.page_order_ids(html) <= known_archived
+
+    def _get_page(self, p):
+        try:
+            self.rate_limiter.wait()
+            r = self.session.get(self.url_orders, params={"page": p}, timeout=40)
+            if r.status_code == 200:
+                return r.text
+            print(f"[Viteka] Страница {p}: HTTP {r.status_code}")
+        except Exception as e:
+            print(f"[Viteka] Ошибка на странице {p}: {e}")
+        return None
+
+    def get_raw_html_pages(self, count=None, known_archived=None):
+        """
+        Страницы кабинета с заказами.
+
+        Число страниц берется из пагинации первой страницы (не больше
+        count и settings.VT_MAX_PAGES), остальные качаются параллельно
+        волнами по VT_CONCURRENCY с ограничением VT_RATE запросов/сек.
+        Если на странице все заказы уже известны как архивные, более
+        старые страницы не запрашиваются.
+
+        :param count: ограничение сверху на число страниц
+        :type count: int
+        :param known_archived: номера накладных БСД, уже лежащие в архиве
+        :type known_archived: set
+        :returns: HTML страниц по порядку
+        :rtype: list
+        """
         if not self.auth():
             print("[Viteka] Ошибка: Все попытки авторизации провалены.")
             return []
 
-        pages = []
-        for p in range(1, count + 1):
-            try:
-                # Тоже увеличиваем до 40с
-                r = self.session.get(f"{self.url_orders}?page={p}", timeout=40)
-                if r.status_code == 200:
-                    pages.append(r.text)
-                import time
-                time.sleep(1.5)
-            except Exception as e:
-                print(f"[Viteka] Ошибка на странице {p}: {e}")
-        return pages
+        first = self._get_page(1)
+        if first is None:
+            return []
+        known_archived = known_archived or set()
+        if known_archived and self.only_archived(first, known_archived):
+            return [first]
+
+        last = min(self.page_count(first), count or st.VT_MAX_PAGES, st.VT_MAX_PAGES)
+        pages = {1: first}
+        with ThreadPoolExecutor(max_workers=st.VT_CONCURRENCY) as executor:
+            for start in range(2, last + 1, st.VT_CONCURRENCY):
+                wave = list(range(start, min(start + st.VT_CONCURRENCY, last + 1)))
+                fetched = dict(zip(wave, executor.map(self._get_page, wave)))
+                pages.update({p: html for p, html in fetched.items() if html is not None})
+                if known_archived and any(
+                    html is not None and self.only_archived(html, known_archived)
+                    for html in fetched.values()
+                ):
+                    print(f"[Viteka] Стр. {wave[-1]}: дальше только архив, остановка.")
+                    break
+
+        print(f"[Viteka] Загружено страниц: {len(pages)} из {last}")
+        return [pages[p] for p in sorted(pages)]
 
 
 class MagicTransAPI:
-    def __init__(self, login, password):
+    """
+    Magic Trans: API нет, поэтому Excel-выгрузка заказов забирается из ЛК
+    через Playwright.
+
+    Авторизованное состояние браузера (cookies + localStorage) сохраняется
+    в state_file, и пока оно действительно, вход пропускается. Вместо
+    фиксированных пауз ждем реальные условия: селектор, смену URL, событие
+    загрузки. В режиме keep_warm один Chromium живет между запусками
+    get_raw_data (для долгоживущего процесса; вызывать из одного потока).
+    """
+    url_main = "https://magic-trans.ru"
+    url_orders = f"{url_main}/personal/orders/"
+
+    def __init__(self, login, password, keep_warm=st.MAGIC_KEEP_WARM, state_file=st.MAGIC_STATE_FILE):
         self.login = login
         self.password = password
         self.name = "Magic"
+        self.keep_warm = keep_warm
+        self.state_file = state_file
+        self._playwright = None
+        self._browser = None
+        self._deadline = None
+
+    def _timeout(self, ms):
+        """
+        Таймаут шага Playwright (мс), урезанный до остатка дедлайна
+        get_raw_data. Поток с sync API не прервать снаружи, поэтому общий
+        дедлайн соблюдается так - каждым ожиданием по отдельности.
+        """
+        if self._deadline is None:
+            return ms
+        left = int((self._deadline - time.monotonic()) * 1000)
+        if left <= 0:
+            raise TimeoutError("дедлайн Magic Trans исчерпан")
+        return min(ms, left)
+
+    def _deadline_passed(self):
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def _get_browser(self):
+        """Теплый браузер, если он еще жив, иначе новый запуск Chromium"""
+        if self._browser and self._browser.is_connected():
+            return self._browser
+
+        from playwright.sync_api import sync_playwright
+
+        self.close()
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True, timeout=self._timeout(30000))
+        return self._browser
+
+    def close(self):
+        """Закрывает браузер и драйвер Playwright"""
+        try:
+            if self._browser:
+                self._browser.close()
+            if self._playwright:
+                self._playwright.stop()
+        except Exception as e:
+            print(f"[{self.name}] Ошибка при закрытии браузера: {e}")
+        self._browser = None
+        self._playwright = None
+
+    def _login(self, page):
+        """Вход через JS-инъекцию; ждем смены URL или исчезновения формы"""
+        if not page.query_selector("#login-name"):
+            print(f"[{self.name}] 1. Переход на страницу логина...")
+            page.goto(self.url_main, timeout=self._timeout(60000), wait_until="domcontentloaded")
+        page.wait_for_selector("#login-name", state="attached", timeout=self._timeout(30000))
+
+        print(f"[{self.name}] 2. Принудительный ввод данных через JS...")
+        page.evaluate(
+            """([login, password]) => {
+                document.getElementById('login-name').value = login;
+                document.getElementById('password').value = password;
+            }""",
+            [self.login, self.password],
+        )
+
+        print(f"[{self.name}] 3. Силовой клик (JS Trigger)...")
+        login_url = page.url
+        page.evaluate("document.getElementById('login').dispatchEvent(new MouseEvent('click', {bubbles: true}))")
+
+        # Ждем прогрузки сессии: редирект или исчезновение формы входа
+        page.wait_for_function(
+            "url => location.href !== url || !document.getElementById('login-name')",
+            arg=login_url,
+            timeout=self._timeout(30000),
+        )
+
+    def _open_orders(self, context):
+        """Страница заказов с кнопкой Excel; логинится, только если сессия протухла"""
+        page = context.new_page()
+        print(f"[{self.name}] Переход в раздел заказов...")
+        page.goto(self.url_orders, timeout=self._timeout(60000), wait_until="domcontentloaded")
+        try:
+            page.wait_for_selector("a.excel_btn, #login-name", state="attached", timeout=self._timeout(30000))
+        except Exception:
+            pass
+
+        if page.query_selector("a.excel_btn"):
+            print(f"[{self.name}] Сохраненная сессия действительна, вход пропущен.")
+            return page
+
+        self._login(page)
+        if "/personal/orders/" not in page.url:
+            page.goto(self.url_orders, timeout=self._timeout(60000), wait_until="domcontentloaded")
+        page.wait_for_selector("a.excel_btn", state="attached", timeout=self._timeout(30000))
+        self._save_state(context)
+        print(f"[{self.name}] Вход выполнен, состояние браузера сохранено.")
+        return page
+
+    def _save_state(self, context):
+        """Cookie авторизации на диск: файл доступен только владельцу (как сессия Деловых Линий)"""
+        fd = os.open(self.state_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # файл мог остаться от прошлых версий с правами по умолчанию
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(context.storage_state(), f)
+
+    def get_raw_data(self, timeout=None):
+        """
+        Авторизуется (или берет сохраненную сессию) и скачивает Excel из ЛК.
 
-    def get_raw_data(self):
-        """Авторизуется через JS-инъекцию и скачивает Excel из ЛК"""
+        :param timeout: общий дедлайн на весь сценарий (сек.), None - без него
+        :type timeout: int
+        """
         print(f"[{self.name}] --- ЗАПУСК МОНИТОРИНГА (FINAL) ---")
+        self._deadline = time.monotonic() + timeout if timeout else None
 
-        with sync_playwright() as p:
-            # Для стабильности в продакшене лучше headless=True,
-            # но для финального теста можешь оставить False
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        context = None
+        try:
+            browser = self._get_browser()
+            storage_state = self.state_file if os.path.exists(self.state_file) else None
+            context = browser.new_context(storage_state=storage_state, accept_downloads=True)
+            page = self._open_orders(context)
 
+            # СКАЧИВАНИЕ
+            print(f"[{self.name}] Ожидание выгрузки Excel...")
             try:
-                # 1. ШАГ: ЛОГИН
-                print(f"[{self.name}] 1. Переход на страницу логина...")
-                page.goto("https://magic-trans.ru", timeout=60000)
-                page.wait_for_timeout(3000)
-
-                print(f"[{self.name}] 2. Принудительный ввод данных через JS...")
-                page.evaluate(f"document.getElementById('login-name').value = '{self.login}'")
-                page.evaluate(f"document.getElementById('password').value = '{self.password}'")
-
-                print(f"[{self.name}] 3. Силовой клик (JS Trigger)...")
-                page.evaluate("document.getElementById('login').dispatchEvent(new MouseEvent('click', {bubbles: true}))")
-
-                # Ждем прогрузки сессии
-                page.wait_for_timeout(10000)
-
-                # 2. ШАГ: ПЕРЕХОД В ЗАКАЗЫ (Где кнопка Excel)
-                print(f"[{self.name}] 4. Переход в раздел заказов...")
-                page.goto("https://magic-trans.ru", timeout=60000, wait_until="networkidle")
-
-                # Проверка: если URL не заказы, пробуем еще раз
-                if "/personal/orders/" not in page.url:
-                    page.goto("https://magic-trans.ru/personal/orders/", timeout=60000)
-
-                # 3. ШАГ: СКАЧИВАНИЕ
-                print(f"[{self.name}] 5. Ожидание выгрузки Excel...")
-                try:
-                    with page.expect_download(timeout=60000) as download_info:
-                        # Используем селектор из твоего HTML-листинга
-                        page.evaluate("document.querySelector('a.excel_btn').click()")
-
-                    download = download_info.value
-                    # Сохраняем в корень data, как ты просил
-                    temp_path = os.path.join("data", "magic_tmp.xlsx")
-                    download.save_as(temp_path)
-                    print(f"[{self.name}] ✅ Файл получен успешно.")
-
-                    browser.close()
-                    return self._parse_excel(temp_path)
-
-                except Exception as e:
-                    print(f"[{self.name}] ❌ Ошибка скачивания: {e}")
-                    page.screenshot(path="data/magic_orders_error.png")
-                    browser.close()
-                    return []
+                with page.expect_download(timeout=self._timeout(60000)) as download_info:
+                    # Используем селектор из твоего HTML-листинга
+                    page.evaluate("document.querySelector('a.excel_btn').click()")
+
+                download = download_info.value
+                # Читаем файл прямо из загрузки Playwright, без копии в data/
+                content = Path(download.path()).read_bytes()
+                print(f"[{self.name}] ✅ Файл получен успешно ({round(len(content) / 1024, 1)} KB).")
+                return self._parse_excel(content)
 
             except Exception as e:
-                print(f"[{self.name}] 🔥 КРИТИЧЕСКАЯ ОШИБКА: {e}")
-                if 'browser' in locals(): browser.close()
+                print(f"[{self.name}] ❌ Ошибка скачивания: {e}")
+                page.screenshot(path="data/magic_orders_error.png", timeout=5000)
+                if self._deadline_passed():
+                    raise
                 return []
 
-    def _parse_excel(self, file_path):
-        """Парсинг Excel строго по списку колонок из консоли"""
+        except Exception as e:
+            # Дедлайн - не протухшая сессия: состояние не трогаем, ошибку отдаем выше
+            if self._deadline_passed():
+                raise TimeoutError(f"нет ответа за {timeout} сек.") from e
+            print(f"[{self.name}] 🔥 КРИТИЧЕСКАЯ ОШИБКА: {e}")
+            # Сессия могла протухнуть посреди сценария - в следующий раз логинимся заново
+            if os.path.exists(self.state_file):
+                os.remove(self.state_file)
+            return []
+
+        finally:
+            if context:
+                context.close()
+            if not self.keep_warm:
+                self.close()
+
+    # Колонки выгрузки ЛК -> значение по умолчанию, если колонки нет
+    # (обрати внимание на 'Обьем' через мягкий знак)
+    excel_columns = {
+        'Номер груза': '',
+        'Количество мест': 0,
+        'Вес, кг': 0,
+        'Обьем, м3': 0,
+        'Сумма, руб.': '0',
+        'Отправитель': 'Н/Д',
+        'Получатель': 'Н/Д',
+        'Маршрут перевозки': 'Н/Д',
+        'Статус': 'Н/Д',
+        'Ориентировочная дата прибытия': 'Н/Д',
+        'Статус оплаты': 'Н/Д',
+        'Плательщик': '',
+    }
+
+    @staticmethod
+    def _read_excel(source):
+        """
+        Читает выгрузку в DataFrame: calamine (Rust, только чтение), если
+        установлен python-calamine, иначе openpyxl.
+
+        :param source: содержимое xlsx (bytes) или путь к файлу
+        """
+        import io
+        import pandas as pd
+
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        try:
+            return pd.read_excel(source, engine='calamine')
+        except ImportError:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            return pd.read_excel(source, engine='openpyxl')
+
+    def _parse_excel(self, source):
+        """Парсинг Excel строго по списку колонок из консоли.
+        Очистка делается операциями над целыми колонками, без iterrows."""
+        import pandas as pd
+
         try:
-            # Читаем Excel
-            df = pd.read_excel(file_path, engine='openpyxl')
-
-            # Мы вывели список колонок, теперь используем их точные имена
-            results = []
-            for _, row in df.iterrows():
-                # 1. Номер груза (Ключевой ID)
-                cargo_id = str(row.get('Номер груза', '')).strip()
-                if not cargo_id or cargo_id == 'nan':
-                    continue
-
-                # 2. Параметры (Обрати внимание на 'Обьем' через мягкий знак)
-                p_str = f"{row.get('Количество мест', 0)}М | {row.get('Вес, кг', 0)}КГ | {row.get('Обьем, м3', 0)}М3"
-
-                # 3. Сумма (Сумма, руб.)
-                raw_price = str(row.get('Сумма, руб.', '0')).replace(',', '.').replace(' ', '')
-                total_price = float(''.join(c for c in raw_price if c.isdigit() or c == '.') or 0.0)
-
-                item = {
-                    "tk": "МАДЖИК",
-                    "id": cargo_id,
-                    "sender": str(row.get('Отправитель', 'Н/Д')),
-                    "recipient": str(row.get('Получатель', 'Н/Д')),
-                    "route": str(row.get('Маршрут перевозки', 'Н/Д')),
-                    "status": str(row.get('Статус', 'Н/Д')).upper(),
-                    "params": p_str,
-                    "arrival": str(row.get('Ориентировочная дата прибытия', 'Н/Д')),
-                    "payment": str(row.get('Статус оплаты', 'Н/Д')),
-                    "total_price": total_price,
-                    "payer_type": "recipient" if "ЮЖНЫЙ ФОРПОСТ" in str(row.get('Плательщик', '')) else "sender",
-                    "is_manual": False
-                }
-                results.append(item)
-
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            df = self._read_excel(source)
+
+            def col(name):
+                # Пустые ячейки - пустые строки: в pandas 3 astype(str) оставляет
+                # NaN числом, и он уходил бы в id (NULL в БД) и в JSON как NaN
+                if name in df.columns:
+                    return df[name].fillna('').astype(str)
+                return pd.Series(str(self.excel_columns[name]), index=df.index)
+
+            # 1. Номер груза (Ключевой ID)
+            cargo_id = col('Номер груза').str.strip()
+            keep = cargo_id != ''
+
+            # 2. Параметры: строка для отладочного дампа и числа для парсера
+            params = col('Количество мест') + 'М | ' + col('Вес, кг') + 'КГ | ' + col('Обьем, м3') + 'М3'
+
+            def number(name):
+                raw = col(name).str.replace(',', '.', regex=False)
+                return pd.to_numeric(raw, errors='coerce').fillna(0.0).astype(float)
+
+            # 3. Сумма (Сумма, руб.): оставляем только цифры и точку
+            raw_price = col('Сумма, руб.').str.replace(',', '.', regex=False).str.replace(r'[^\d.]', '', regex=True)
+            total_price = pd.to_numeric(raw_price, errors='coerce').fillna(0.0).astype(float)
+
+            payer_type = col('Плательщик').str.contains("ЮЖНЫЙ ФОРПОСТ", regex=False).map(
+                {True: "recipient", False: "sender"}
+            )
+
+            out = pd.DataFrame({
+                "tk": "МАДЖИК",
+                "id": cargo_id,
+                "sender": col('Отправитель'),
+                "recipient": col('Получатель'),
+                "route": col('Маршрут перевозки'),
+                "status": col('Статус').str.upper(),
+                "params": params,
+                "places": number('Количество мест').astype(int),
+                "weight": number('Вес, кг'),
+                "volume": number('Обьем, м3'),
+                "arrival": col('Ориентировочная дата прибытия'),
+                "payment": col('Статус оплаты'),
+                "total_price": total_price,
+                "payer_type": payer_type,
+                "is_manual": False,
+            })
+            results = out[keep].to_dict('records')
 
             print(f"[{self.name}] Парсинг завершен. Найдено строк: {len(results)}")
             return results
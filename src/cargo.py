@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import re
+import hashlib
+from dataclasses import dataclass
+
+
+_PLACES_RE = re.compile(r'(\d+)\s*М', re.I)
+_WEIGHT_RE = re.compile(r'([\d.]+)\s*КГ', re.I)
+_VOLUME_RE = re.compile(r'([\d.]+)\s*М3', re.I)
+
+
+def to_float(value):
+    """Число из ответа ТК: 12.5, "12,5", "12.5 кг", None -> float (0.0, если не число)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '.').replace(' ', '').replace('\xa0', ''))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def to_int(value):
+    return int(to_float(value))
+
+
+def parse_params(params_str):
+    """
+    (места, вес, объем) из строки "3М | 12.5КГ | 0.1М3" - для старых стейтов
+    и снапшотов, где параметры лежат только строкой.
+    """
+    if not params_str or not isinstance(params_str, str):
+        return 0, 0.0, 0.0
+    p = _PLACES_RE.search(params_str)
+    w = _WEIGHT_RE.search(params_str)
+    v = _VOLUME_RE.search(params_str)
+    places = int(p.group(1)) if p else 0
+    weight = float(w.group(1)) if w else 0.0
+    volume = float(v.group(1)) if v else 0.0
+    return places, weight, volume
+
+
+@dataclass(slots=True)
+class Cargo:
+    """
+    Груз на всем пути парсер -> память/классификатор -> БД.
+
+    Места, вес и объем хранятся числами; строка "3М | 12.5КГ | 0.1М3"
+    собирается только на выходе (params, to_dict для JSON-отчетов и стейта).
+    """
+
+    tk: str
+    id: str
+    sender: str = "???"
+    recipient: str = "???"
+    route: str = ""
+    status: str = ""
+    places: int = 0
+    weight: float = 0.0
+    volume: float = 0.0
+    arrival: str = ""
+    payment: str = ""
+    total_price: float = 0.0
+    payer_type: str = ""
+    is_manual: bool = False
+    archived_at: str | None = None
+
+    @property
+    def params(self):
+        return f"{self.places}М | {self.weight}КГ | {self.volume}М3"
+
+    def fingerprint(self, is_archived=0):
+        """
+        Хэш содержимого груза (все поля, которые upsert пишет в cargo, и флаг
+        архива): совпал с записанным в БД - строку переписывать не нужно.
+        """
+        content = (
+            self.tk, self.sender, self.recipient, self.route, self.status,
+            self.places, self.weight, self.volume, self.arrival, self.payment,
+            float(self.total_price or 0.0), self.payer_type, int(is_archived),
+        )
+        return hashlib.blake2b(repr(content).encode('utf-8'), digest_size=16).hexdigest()
+
+    def to_dict(self):
+        """Словарь в прежнем формате отчетов, стейта и истории (с params)"""
+        data = {
+            "tk": self.tk,
+            "id": self.id,
+            "sender": self.sender,
+            "recipient": self.recipient,
+            "route": self.route,
+            "status": self.status,
+            "params": self.params,
+            "places": self.places,
+            "weight": self.weight,
+            "volume": self.volume,
+            "arrival": self.arrival,
+            "payment": self.payment,
+            "total_price": self.total_price,
+            "payer_type": self.payer_type,
+            "is_manual": self.is_manual,
+        }
+        if self.archived_at is not None:
+            data["archived_at"] = self.archived_at
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Груз из JSON-стейта: новые числовые поля, а для старых файлов - разбор params"""
+        if "places" in data:
+            places, weight, volume = to_int(data["places"]), to_float(data.get("weight")), to_float(data.get("volume"))
+        else:
+            places, weight, volume = parse_params(data.get("params"))
+        return cls(
+            tk=data.get("tk", ""),
+            id=data.get("id"),
+            sender=data.get("sender", "???"),
+            recipient=data.get("recipient", "???"),
+            route=data.get("route", ""),
+            status=data.get("status", ""),
+            places=places,
+            weight=weight,
+            volume=volume,
+            arrival=data.get("arrival", ""),
+            payment=data.get("payment", ""),
+            total_price=to_float(data.get("total_price")),
+            payer_type=data.get("payer_type", ""),
+            is_manual=bool(data.get("is_manual", False)),
+            archived_at=data.get("archived_at"),
+        )
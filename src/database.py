@@ -1,23 +1,100 @@
 # -*- coding: utf-8 -*-
 import sqlite3
 import os
-import re
+import json
 from datetime import datetime
 import traceback
 
 try:
-    from src.settings import DB_PATH
+    from src.settings import DB_PATH, HISTORY_FILE
+    from src.cargo import Cargo
+    from src.status import CargoState, cargo_state
+    from src import db_pool, migrations
 except ImportError:
-    from settings import DB_PATH
+    from settings import DB_PATH, HISTORY_FILE
+    from cargo import Cargo
+    from status import CargoState, cargo_state
+    import db_pool
+    import migrations
+
+
+# Одна строка груза: вставка или обновление по id (upsert_cargo и bulk_upsert)
+UPSERT_SQL = f'''
+    INSERT INTO cargo (
+        id, tk, sender, recipient, route,
+        places, weight, volume,
+        status, arrival, payment, total_price,
+        payer_type, is_archived, created_at, updated_at,
+        fingerprint, state
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        tk=excluded.tk,
+        sender=excluded.sender,
+        recipient=excluded.recipient,
+        route=excluded.route,
+        arrival=excluded.arrival,
+        payment=excluded.payment,
+        total_price=excluded.total_price,
+        places=excluded.places,
+        weight=excluded.weight,
+        volume=excluded.volume,
+        status = excluded.status,
+        is_archived = CASE
+            WHEN excluded.is_archived = 1
+                 OR excluded.state >= {int(CargoState.DELIVERED)}
+            THEN 1 ELSE 0
+        END,
+        archived_at = CASE
+            WHEN excluded.is_archived = 1
+                 OR excluded.state >= {int(CargoState.DELIVERED)}
+            THEN COALESCE(cargo.archived_at, CURRENT_TIMESTAMP)
+            ELSE NULL
+        END,
+        created_at = COALESCE(cargo.created_at, excluded.created_at),
+
+        -- (!) ПРАВКА: Убрали CASE. Теперь дата обновления пишется ВСЕГДА.
+        -- Это лечит "зависание" времени на 11:30 в аналитике.
+        updated_at = excluded.updated_at,
+        fingerprint = excluded.fingerprint,
+        state = excluded.state
+'''
+
+
+def _upsert_row(item, is_archived, now):
+    """Параметры UPSERT_SQL для груза (cargo.Cargo или словарь старого формата)"""
+    if isinstance(item, dict):
+        item = Cargo.from_dict(item)
+    return (
+        item.id, item.tk, item.sender,
+        item.recipient, item.route,
+        item.places, item.weight, item.volume,
+        item.status, item.arrival, item.payment,
+        float(item.total_price or 0.0),
+        item.payer_type, is_archived,
+        now, now,
+        item.fingerprint(is_archived),
+        int(cargo_state(item.tk, item.status))
+    )
 
 
 class CargoDB:
-    def __init__(self):
+    def __init__(self, migrate=True):
         self.init_db()
         self.init_tasks_table()
+        self.init_history_table()
+        if migrate:
+            with self.get_connection() as conn:
+                migrations.upgrade(conn)
+
+    def get_connection(self, readonly=False):
+        """
+        Соединение из db_pool (WAL и прагмы уже выставлены, открыто
+        заранее). Как и раньше: `with` - транзакция, close() - вернуть
+        соединение в пул.
 
-    def get_connection(self):
-        return sqlite3.connect(DB_PATH, timeout=30)
+        :param readonly: только чтение (mode=ro) - для GET-эндпоинтов
+        """
+        return db_pool.connect(DB_PATH, readonly)
 
     def init_db(self):
         """Добавлено поле created_at для корректного расчета сроков"""
@@ -41,9 +118,24 @@ class CargoDB:
                     is_archived INTEGER DEFAULT 0,
                     archived_at TIMESTAMP,
                     created_at TIMESTAMP,          -- Дата первого появления
-                    updated_at TIMESTAMP           -- Дата последнего обновления
+                    updated_at TIMESTAMP,          -- Дата последнего обновления
+                    fingerprint TEXT,              -- Хэш содержимого (Cargo.fingerprint)
+                    state INTEGER                  -- status.CargoState по тексту статуса
                 )
             ''')
+            # Базы до появления хэша: колонка добавляется на месте, строки
+            # без хэша один раз перезапишутся целиком
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(cargo)")}
+            if "fingerprint" not in columns:
+                cursor.execute("ALTER TABLE cargo ADD COLUMN fingerprint TEXT")
+            if "state" not in columns:
+                cursor.execute("ALTER TABLE cargo ADD COLUMN state INTEGER")
+            # Состояние для строк, записанных до колонки state (в т.ч. неизменившихся)
+            rows = cursor.execute("SELECT id, tk, status FROM cargo WHERE state IS NULL").fetchall()
+            cursor.executemany(
+                "UPDATE cargo SET state = ? WHERE id = ?",
+                [(int(cargo_state(tk, status)), cargo_id) for cargo_id, tk, status in rows],
+            )
             conn.commit()
 
     def init_tasks_table(self):
@@ -78,102 +170,285 @@ class CargoDB:
             ''')
             conn.commit()
 
-    def _parse_params(self, params_str):
-        if not params_str or not isinstance(params_str, str):
-            return 0, 0.0, 0.0
-        p = re.search(r'(\d+)\s*М', params_str, re.I)
-        w = re.search(r'([\d.]+)\s*КГ', params_str, re.I)
-        v = re.search(r'([\d.]+)\s*М3', params_str, re.I)
-        places = int(p.group(1)) if p else 0
-        weight = float(w.group(1)) if w else 0.0
-        volume = float(v.group(1)) if v else 0.0
-        return places, weight, volume
+    def init_history_table(self):
+        """
+        Постоянный архив завершенных грузов (замена history_archive.json):
+        только дописывается, id уникален, archived_at в ISO - сортируется
+        без разбора дат. При первом запуске переносит старый JSON.
+        """
+        with self.get_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS history (
+                    seq INTEGER PRIMARY KEY,       -- порядок добавления
+                    id TEXT NOT NULL UNIQUE,       -- № груза (индекс для проверки дублей)
+                    archived_at TEXT NOT NULL,     -- ISO: 2026-03-12T10:15:00
+                    data TEXT NOT NULL             -- JSON груза (Cargo.to_dict)
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_history_archived_at ON history(archived_at)")
+            conn.commit()
+            is_empty = conn.execute("SELECT 1 FROM history LIMIT 1").fetchone() is None
+
+        if is_empty and os.path.exists(HISTORY_FILE):
+            self.import_history_json(HISTORY_FILE)
+
+    def import_history_json(self, path):
+        """Перенос history_archive.json (archived_at вида 12.03.2026) в таблицу history"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            old_history = json.loads(content) if content else []
+        except Exception as e:
+            print(f"[History] Не удалось прочитать {path}: {e}")
+            return 0
+
+        rows = []
+        for item in old_history:
+            if not item.get('id'):
+                continue
+            try:
+                archived_at = datetime.strptime(item.get('archived_at', ''), '%d.%m.%Y').date().isoformat()
+            except ValueError:
+                archived_at = "2020-01-01"
+            item['archived_at'] = archived_at
+            rows.append((str(item['id']), archived_at, json.dumps(item, ensure_ascii=False)))
+
+        with self.get_connection() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO history (id, archived_at, data) VALUES (?, ?, ?)", rows)
+            added = conn.total_changes - before
+            conn.commit()
+        print(f"[History] Перенесено из {os.path.basename(path)}: {added}")
+        return added
+
+    def append_history(self, items):
+        """
+        Дописывает завершенные грузы в архив; уже лежащие там номера пропускаются.
+        Грузам, попавшим в архив, проставляется archived_at.
+
+        :returns: сколько добавлено
+        :rtype: int
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        added = 0
+        with self.get_connection() as conn:
+            for item in items:
+                cargo_id = str(item.id or '')
+                if not cargo_id:
+                    continue
+                data = json.dumps({**item.to_dict(), "archived_at": now}, ensure_ascii=False)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO history (id, archived_at, data) VALUES (?, ?, ?)",
+                    (cargo_id, now, data),
+                )
+                if cursor.rowcount:
+                    item.archived_at = now
+                    added += 1
+            conn.commit()
+        return added
+
+    def latest_history(self, limit=0):
+        """limit последних по archived_at грузов архива (словари как в отчете); 0 - все"""
+        with self.get_connection() as conn:
+            # LIMIT -1 в SQLite - без ограничения
+            rows = conn.execute(
+                "SELECT data FROM history ORDER BY archived_at DESC, seq DESC LIMIT ?", (limit or -1,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def history_count(self):
+        with self.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
 
     def upsert_cargo(self, item, is_archived=0):
-        p_val, w_val, v_val = self._parse_params(item.get('params', ''))
+        """Запись одного груза в своем соединении (для пачки - bulk_upsert)"""
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO cargo (
-                        id, tk, sender, recipient, route,
-                        places, weight, volume,
-                        status, arrival, payment, total_price,
-                        payer_type, is_archived, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(id) DO UPDATE SET
-                        tk=excluded.tk,
-                        sender=excluded.sender,
-                        recipient=excluded.recipient,
-                        route=excluded.route,
-                        arrival=excluded.arrival,
-                        payment=excluded.payment,
-                        total_price=excluded.total_price,
-                        places=excluded.places,
-                        weight=excluded.weight,
-                        volume=excluded.volume,
-                        status = excluded.status,
-                        is_archived = CASE
-                            WHEN excluded.is_archived = 1
-                                 OR UPPER(excluded.status) LIKE '%ВЫДАН%'
-                                 OR UPPER(excluded.status) LIKE '%АРХИВ%'
-                            THEN 1 ELSE 0
-                        END,
-                        archived_at = CASE
-                            WHEN excluded.is_archived = 1
-                                 OR UPPER(excluded.status) LIKE '%ВЫДАН%'
-                                 OR UPPER(excluded.status) LIKE '%АРХИВ%'
-                            THEN COALESCE(cargo.archived_at, CURRENT_TIMESTAMP)
-                            ELSE NULL
-                        END,
-                        created_at = COALESCE(cargo.created_at, excluded.created_at),
-
-                        -- (!) ПРАВКА: Убрали CASE. Теперь дата обновления пишется ВСЕГДА.
-                        -- Это лечит "зависание" времени на 11:30 в аналитике.
-                        updated_at = excluded.updated_at
-
-                ''', (
-                    item.get('id'), item.get('tk'), item.get('sender'),
-                    item.get('recipient'), item.get('route'),
-                    p_val, w_val, v_val,
-                    item.get('status'), item.get('arrival'), item.get('payment'),
-                    float(item.get('total_price', 0) or 0.0),
-                    item.get('payer_type'), is_archived,
-                    now, now
-                ))
+                conn.execute(UPSERT_SQL, _upsert_row(item, is_archived, now))
                 conn.commit()
         except Exception as e:
             # (!) TRACEBACK: Если база залочена или ошибка в SQL,
             # ты увидишь в консоли ПОЛНЫЙ путь ошибки, а не просто "Error"
-            print(f"\n❌ [КРИТИЧЕСКАЯ ОШИБКА БД] Груз {item.get('id')}:")
+            print(f"\n❌ [КРИТИЧЕСКАЯ ОШИБКА БД] Груз {item.get('id') if isinstance(item, dict) else item.id}:")
             traceback.print_exc()
 
+    def bulk_upsert(self, items, is_archived=0):
+        """
+        Запись пачки грузов одной транзакцией: executemany по UPSERT_SQL.
+        Если какая-то строка не пишется, пачка откатывается до точки
+        сохранения и пишется построчно - остальные строки сохраняются,
+        ошибки возвращаются списком.
+
+        :param items: грузы (cargo.Cargo или словари старого формата)
+        :param is_archived: 1 - пачка архивных грузов
+        :returns: [(id, ошибка)] для строк, которые не записались
+        :rtype: list
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows, errors = [], []
+        for item in items:
+            try:
+                rows.append(_upsert_row(item, is_archived, now))
+            except Exception as e:
+                errors.append((getattr(item, 'id', None), repr(e)))
+        if not rows:
+            return self._report_errors(errors)
+
+        with self.get_connection() as conn:
+            conn.execute("SAVEPOINT bulk_upsert")
+            try:
+                conn.executemany(UPSERT_SQL, rows)
+            except sqlite3.Error:
+                conn.execute("ROLLBACK TO bulk_upsert")
+                for row in rows:
+                    try:
+                        conn.execute(UPSERT_SQL, row)
+                    except sqlite3.Error as e:
+                        errors.append((row[0], repr(e)))
+            conn.execute("RELEASE bulk_upsert")
+            conn.commit()
+        return self._report_errors(errors)
+
+    @staticmethod
+    def _report_errors(errors):
+        for cargo_id, error in errors:
+            print(f"❌ [КРИТИЧЕСКАЯ ОШИБКА БД] Груз {cargo_id}: {error}")
+        return errors
+
+    def get_fingerprints(self, ids, chunk=500):
+        """{id: хэш содержимого} для уже записанных грузов из ids"""
+        ids = list(ids)
+        found = {}
+        with self.get_connection() as conn:
+            for i in range(0, len(ids), chunk):
+                part = ids[i:i + chunk]
+                marks = ", ".join("?" * len(part))
+                found.update(conn.execute(
+                    f"SELECT id, fingerprint FROM cargo WHERE id IN ({marks})", part
+                ).fetchall())
+        return found
+
+    def touch_cargo(self, ids):
+        """Отметка 'видели в этом запуске' для неизменившихся грузов: один UPDATE на пачку"""
+        if not ids:
+            return
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.get_connection() as conn:
+            conn.executemany("UPDATE cargo SET updated_at = ? WHERE id = ?", [(now, i) for i in ids])
+            conn.commit()
+
+    def save_cargos(self, to_archive, active):
+        """
+        Запись результата запуска с пропуском неизменившихся грузов: новые и
+        изменившиеся пишутся через bulk_upsert (пачка на архив и на актив),
+        у остальных (хэш совпал с записанным) только обновляется updated_at.
+        Порядок как раньше: сначала архив, потом актив.
+
+        :returns: {"inserted", "changed", "unchanged", "errors"}
+        :rtype: dict
+        """
+        known = self.get_fingerprints({item.id for item in to_archive} | {item.id for item in active})
+        stats = {"inserted": 0, "changed": 0, "unchanged": 0, "errors": 0}
+        unchanged = []
+        for items, is_archived in ((to_archive, 1), (active, 0)):
+            batch = []
+            for item in items:
+                fp = item.fingerprint(is_archived)
+                if item.id not in known:
+                    stats["inserted"] += 1
+                elif known[item.id] != fp:
+                    stats["changed"] += 1
+                else:
+                    stats["unchanged"] += 1
+                    unchanged.append(item.id)
+                    continue
+                batch.append(item)
+                # Дубль номера в этом же запуске сравнивается уже с новой записью
+                known[item.id] = fp
+            stats["errors"] += len(self.bulk_upsert(batch, is_archived))
+        self.touch_cargo(unchanged)
+        return stats
+
+    def get_archived_ids(self, tk):
+        """Номера грузов ТК, уже лежащих в архиве"""
+        with self.get_connection() as conn:
+            res = conn.execute(
+                "SELECT id FROM cargo WHERE tk = ? AND is_archived = 1", (tk,)
+            ).fetchall()
+            return {str(row[0]) for row in res}
+
     def archive_stuck_bsd(self):
         """
         Авто-архивация БСД: если статус 'Прибыл в город...' висит > 28 часов,
         считаем груз полученным и убираем с главной.
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            # 1.2 дня = примерно 28-29 часов (запас на случай задержки выгрузки)
-            cursor.execute("""
-                UPDATE cargo
-                SET
-                    status = 'Выдан (Авто)',
-                    archived_at = CURRENT_TIMESTAMP
-                WHERE tk = 'БСД'
-                  AND status LIKE '%Прибыл в город назначения%'
-                  AND archived_at IS NULL
-                  AND (julianday('now') - julianday(updated_at)) > 1.2
-            """)
-            affected = cursor.rowcount
+            affected = self._archive_stuck_bsd(conn)
             if affected > 0:
                 conn.commit()
-                print(f"📦 [БСД] Авто-архивация: {affected} грузов перенесено в архив.")
             return affected
 
+    @staticmethod
+    def _archive_stuck_bsd(conn):
+        # 1.2 дня = примерно 28-29 часов (запас на случай задержки выгрузки)
+        affected = conn.execute(f"""
+            UPDATE cargo
+            SET
+                status = 'Выдан (Авто)',
+                state = {int(CargoState.DELIVERED)},
+                archived_at = CURRENT_TIMESTAMP,
+                -- строка уже не совпадает с ответом API: следующий upsert перезапишет ее целиком
+                fingerprint = NULL
+            WHERE tk = 'БСД'
+              AND status LIKE '%Прибыл в город назначения%'
+              AND archived_at IS NULL
+              AND (julianday('now') - julianday(updated_at)) > 1.2
+        """).rowcount
+        if affected > 0:
+            print(f"📦 [БСД] Авто-архивация: {affected} грузов перенесено в архив.")
+        return affected
+
+    def reconcile(self, api_ids, missing_ids, archive_bsd=True):
+        """
+        Сверка запуска с БД одной транзакцией: номера из API и пропавшие из
+        него грузы прошлого стейта кладутся во временные таблицы, дальше
+        все решают несколько запросов по множествам.
+
+        :param api_ids: номера грузов в текущем ответе API
+        :param missing_ids: номера из прошлого стейта, которых в ответе нет
+        :param archive_bsd: сначала выполнить авто-архивацию БСД (28ч)
+        :returns: {"recent": пропавшие, но виденные < 48ч назад (призраки),
+                   "stuck": зависшие БСД, которые база уже пометила архивными,
+                   "bsd_archived": сколько БСД архивировано сейчас}
+        :rtype: dict
+        """
+        with self.get_connection() as conn:
+            for table, ids in (("api_ids", api_ids), ("missing_ids", missing_ids)):
+                conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY)")
+                conn.execute(f"DELETE FROM {table}")
+                conn.executemany(f"INSERT OR IGNORE INTO {table} (id) VALUES (?)", ((i,) for i in ids))
+
+            bsd_archived = self._archive_stuck_bsd(conn) if archive_bsd else 0
+
+            # updated_at пишется по локальному времени (datetime.now())
+            recent = {row[0] for row in conn.execute("""
+                SELECT m.id FROM missing_ids m JOIN cargo c ON c.id = m.id
+                WHERE (julianday('now', 'localtime') - julianday(c.updated_at)) * 86400 < 48 * 3600
+            """)}
+            # Зависшие БСД - по тексту статуса, как всегда: LIKE для кириллицы
+            # регистрозависим, а БСД пишет статусы заглавными ("ПРИБЫЛ В ТК")
+            stuck = {row[0] for row in conn.execute("""
+                SELECT c.id FROM cargo c
+                WHERE c.tk = 'БСД'
+                  AND (c.status LIKE '%ПРИБЫЛ%' OR c.status LIKE '%ДОСТАВКА%')
+                  AND c.archived_at IS NOT NULL
+                  AND (c.id IN (SELECT id FROM api_ids) OR c.id IN (SELECT id FROM missing_ids))
+            """)}
+            conn.commit()
+        return {"recent": recent, "stuck": stuck, "bsd_archived": bsd_archived}
+
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import os
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+try:
+    from src import settings as st
+except ImportError:
+    import settings as st
+
+
+class ManagedConnection:
+    """
+    Выданное менеджером соединение. Ведет себя как sqlite3.Connection:
+    `with conn:` - транзакция (commit / rollback) именно этого соединения,
+    row_factory ставится на него и не протекает к следующему владельцу.
+    close() не закрывает соединение, а возвращает его в пул; незакрытое
+    (`with db.get_connection() as conn:` без close) возвращается, когда
+    объект собирает сборщик мусора.
+    """
+
+    def __init__(self, manager, key, conn):
+        self._manager = manager
+        self._key = key
+        self._conn = conn
+        self._pid = os.getpid()
+        self.row_factory = None
+
+    def _raw(self):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return self._conn
+
+    def cursor(self):
+        cursor = self._raw().cursor()
+        cursor.row_factory = self.row_factory
+        return cursor
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def __getattr__(self, name):
+        # commit, rollback, in_transaction, total_changes, executescript...
+        return getattr(self._raw(), name)
+
+    def __enter__(self):
+        self._raw().__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._raw().__exit__(*exc)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        # После fork соединение родителя в пул ребенка не попадает
+        if conn is not None and self._pid == os.getpid():
+            self._manager.release(self._key, conn)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionManager:
+    """
+    Соединения SQLite с настройками из settings (DB_*), открытые один раз.
+
+    Каждый get() получает свое соединение: вложенные `with` на двух
+    соединениях - две независимые транзакции, как с sqlite3.connect.
+    Закрытое (или собранное сборщиком мусора) соединение откатывает
+    незавершенную транзакцию и уходит в пул свободных, откуда его берет
+    следующий get() в любом потоке. Соединения только для чтения
+    (mode=ro) - отдельный пул, для GET-эндпоинтов.
+
+    :param pool_size: сколько свободных соединений держать на (базу, режим)
+    :type pool_size: int
+    """
+
+    def __init__(self, pool_size=None):
+        self.pool_size = st.DB_POOL_SIZE if pool_size is None else pool_size
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # RLock: release может прийти из __del__ посреди работы с пулом в том же потоке
+        self._lock = threading.RLock()
+        self._idle = {}          # (path, readonly) -> [sqlite3.Connection]
+        self._journal_set = set()
+
+    def get(self, path, readonly=False):
+        """Соединение с базой path (ManagedConnection)"""
+        # После fork соединения родителя не трогаем
+        if self._pid != os.getpid():
+            self._reset()
+        key = (os.path.abspath(path), readonly)
+        return ManagedConnection(self, key, self._acquire(key))
+
+    def release(self, key, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        return self._open(*key)
+
+    def _open(self, path, readonly):
+        timeout = st.DB_BUSY_TIMEOUT_MS / 1000
+        if readonly:
+            conn = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True,
+                                   timeout=timeout, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+            # Режим журнала хранится в самом файле: достаточно раз на базу за процесс
+            with self._lock:
+                if path not in self._journal_set:
+                    conn.execute(f"PRAGMA journal_mode = {st.DB_JOURNAL_MODE}")
+                    self._journal_set.add(path)
+        conn.execute(f"PRAGMA synchronous = {st.DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{st.DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {st.DB_MMAP_SIZE_MB * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def close_all(self):
+        """Закрыть свободные соединения пула (занятые закроются при сборке мусора)"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+_manager = ConnectionManager()
+
+
+def connect(path, readonly=False):
+    """Соединение из общего менеджера процесса"""
+    return _manager.get(path, readonly)
+
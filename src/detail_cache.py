@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+import settings as st
+
+
+class BaikalDetailCache:
+    """
+    Кэш order/detail Байкала между запусками.
+
+    Для каждого номера хранится отпечаток его записи из order/list (статус,
+    даты, суммы - вся запись целиком) и последний ответ order/detail.
+    Детализацию запрашиваем заново только для новых заказов, для заказов
+    с изменившимся отпечатком и для записей старше max_age_hours
+    (периодический полный рефреш).
+
+    :param path: JSON-файл кэша
+    :type path: str
+    :param max_age_hours: через сколько часов запись считается устаревшей
+    :type max_age_hours: float
+    """
+
+    def __init__(self, path=st.BAIKAL_CACHE_FILE, max_age_hours=st.BAIKAL_CACHE_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[Baikal Cache] Кэш поврежден, начинаем с нуля: {e}")
+            return {}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def fingerprint(list_entry):
+        raw = json.dumps(list_entry, sort_keys=True, ensure_ascii=False)
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def stale_numbers(self, order_list):
+        """Номера из order/list, которым нужен свежий order/detail"""
+        now = datetime.now()
+        stale = []
+        for entry in order_list:
+            number = entry['number']
+            cached = self.entries.get(number)
+            if (
+                not cached
+                or cached.get('fp') != self.fingerprint(entry)
+                or now - datetime.fromisoformat(cached['fetched_at']) > self.max_age
+            ):
+                stale.append(number)
+        return stale
+
+    @staticmethod
+    def is_valid(detail):
+        """Похоже на настоящий order/detail (а не на ошибку, лимит или пустой ответ)"""
+        return isinstance(detail, dict) and bool(detail.get("cargoList")) and isinstance(detail["cargoList"], list)
+
+    def update(self, order_list, fetched):
+        """
+        Сохраняет свежие ответы и возвращает детализацию в порядке order/list.
+
+        Заказы, выпавшие из 31-дневного окна order/list, из кэша удаляются.
+        Ответы без cargoList (ошибки API, лимиты, 5xx, None при сбое запроса)
+        в кэш не попадают: остается прошлая удачная запись (она уже устарела и
+        будет перезапрошена), а если ее нет - номер запросится в следующий раз.
+
+        :param order_list: записи order/list текущего запуска
+        :type order_list: list
+        :param fetched: {номер: ответ order/detail} для перезапрошенных заказов
+        :type fetched: dict
+        :returns: список ответов order/detail
+        :rtype: list
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        entries = {}
+        results = []
+        rejected = 0
+        for entry in order_list:
+            number = entry['number']
+            if number not in fetched:
+                cached = self.entries[number]
+            elif self.is_valid(fetched[number]):
+                cached = {"fp": self.fingerprint(entry), "fetched_at": now, "detail": fetched[number]}
+            else:
+                rejected += 1
+                cached = self.entries.get(number)
+                if cached is None:
+                    if fetched[number] is not None:
+                        results.append(fetched[number])
+                    continue
+            entries[number] = cached
+            results.append(cached['detail'])
+        if rejected:
+            print(f"[Baikal Cache] Не закэшировано ответов order/detail: {rejected} (будут запрошены снова)")
+        self.entries = entries
+        return results
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import settings as st
+
+
+class PoolStats:
+    """
+    Потокобезопасные счетчики пула: сколько HTTP-запросов ушло и сколько
+    раз пришлось открывать новое TCP(+TLS) соединение. Все остальное -
+    запросы по уже открытому keep-alive соединению.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.connections,
+                "reused": max(0, self.requests - self.connections),
+            }
+
+
+def report_pool_stats(stats_by_name):
+    """Печатает и логирует переиспользование keep-alive соединений: {имя ТК: PoolStats}"""
+    for name, stats in stats_by_name.items():
+        snap = stats.snapshot()
+        line = (f"[HTTP] {name}: {snap['requests']} запр., "
+                f"{snap['new_connections']} новых соед., {snap['reused']} переисп.")
+        print(line)
+        logging.info(line)
+
+
+class RateLimiter:
+    """
+    Вежливость к сайту ТК: старты запросов не чаще rate в секунду.
+    Потокобезопасен; reserve() годится и для asyncio (await asyncio.sleep).
+
+    :param rate: запросов в секунду (0 - без ограничения)
+    :type rate: float
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def reserve(self):
+        """Бронирует слот и возвращает, сколько секунд до него подождать"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        return start - now
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _counting_pools(stats):
+    """Классы пулов urllib3, считающие каждый connect() в stats"""
+
+    class CountingHTTPConnection(HTTPConnection):
+        def connect(self):
+            stats.add_connection()
+            return super().connect()
+
+    class CountingHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            stats.add_connection()
+            return super().connect()
+
+    class CountingHTTPPool(HTTPConnectionPool):
+        ConnectionCls = CountingHTTPConnection
+
+    class CountingHTTPSPool(HTTPSConnectionPool):
+        ConnectionCls = CountingHTTPSConnection
+
+    return {"http": CountingHTTPPool, "https": CountingHTTPSPool}
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter с таймаутом по умолчанию и подсчетом переиспользования соединений
+
+    :param timeout: таймаут, если вызывающий код его не передал
+    :param stats: объект PoolStats для счетчиков
+    """
+
+    def __init__(self, timeout, stats, **kwargs):
+        self.timeout = timeout
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pools(self.stats)
+
+    def send(self, request, timeout=None, **kwargs):
+        self.stats.add_request()
+        return super().send(request, timeout=timeout or self.timeout, **kwargs)
+
+
+def make_session(carrier, headers=None):
+    """
+    Создает requests.Session с общим keep-alive пулом для одной ТК.
+
+    Сессию можно использовать из нескольких потоков ThreadPoolExecutor:
+    пул urllib3 потокобезопасен, размер берется из settings.HTTP_POOL_SIZES.
+    Повторы с backoff идут на сетевые ошибки и 429/5xx (в т.ч. для POST -
+    все наши POST-запросы к ТК только читают данные).
+
+    :param carrier: ключ ТК в settings.HTTP_POOL_SIZES ("Baikal", "Pecom", ...)
+    :type carrier: str
+    :param headers: заголовки по умолчанию
+    :type headers: dict
+    :returns: сессия с атрибутом pool_stats
+    :rtype: requests.Session
+    """
+    pool_size = st.HTTP_POOL_SIZES.get(carrier, 4)
+    retry = Retry(
+        total=st.HTTP_RETRIES,
+        backoff_factor=st.HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,
+        raise_on_status=False,
+    )
+    stats = PoolStats()
+    adapter = PooledAdapter(
+        timeout=st.HTTP_TIMEOUT,
+        stats=stats,
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        pool_block=True,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    if headers:
+        session.headers.update(headers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.pool_stats = stats
+    return session
@@ -2,11 +2,16 @@
 import os
 import json
 import time
+import logging
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Импорт путей и констант
-from settings import RAW_DATA_FILE
+from settings import RAW_DATA_FILE, RAW_SNAPSHOT_FILE, RAW_DEBUG_JSON, RAW_ARCHIVE, COLLECT_ENGINE, CARRIER_TIMEOUT, CARRIER_TIMEOUTS
+from detail_cache import BaikalDetailCache
+import http_session
+from snapshot import write_snapshot, dump_json
+from raw_archive import archive_snapshot
 from api_classes import (
     BK_SECRET_KEY, DL_LOGIN, DL_PASS, DL_SECRET_KEY,
     PC_LOGIN, PC_SECRET_KEY, VT_LOGIN, VT_PASS,
@@ -14,51 +19,84 @@ from api_classes import (
     BaikalApiV2, DellinApiV1, PecomApiV1, VitekaApiV1, MagicTransAPI
 )
 
-# Инициализация объектов ТК
-p = PecomApiV1(PC_SECRET_KEY, PC_LOGIN)
-d = DellinApiV1(DL_SECRET_KEY, DL_LOGIN, DL_PASS)
-b = BaikalApiV2(BK_SECRET_KEY)
-vt = VitekaApiV1(VT_LOGIN, VT_PASS)
-mt = MagicTransAPI(MT_LOGIN, MT_PASS) # Объект для Magic Trans
-
-def fetch_baikal_parallel():
-    """Специфический сборщик для Байкала (использует свои потоки внутри)"""
+# Объекты ТК создаются при первом обращении, а не при импорте модуля
+_CLIENT_FACTORIES = {
+    "p": lambda: PecomApiV1(PC_SECRET_KEY, PC_LOGIN),
+    "d": lambda: DellinApiV1(DL_SECRET_KEY, DL_LOGIN, DL_PASS),  # вход лениво, при первом запросе
+    "b": lambda: BaikalApiV2(BK_SECRET_KEY),
+    "vt": lambda: VitekaApiV1(VT_LOGIN, VT_PASS),
+    "mt": lambda: MagicTransAPI(MT_LOGIN, MT_PASS), # Объект для Magic Trans
+}
+_clients = {}
+
+def get_client(name):
+    """Клиент ТК по короткому имени (p, d, b, vt, mt), создается один раз"""
+    if name not in _clients:
+        _clients[name] = _CLIENT_FACTORIES[name]()
+    return _clients[name]
+
+def __getattr__(name):
+    # Совместимость со старым обращением jw.p / jw.d / jw.b / jw.vt / jw.mt
+    if name in _CLIENT_FACTORIES:
+        return get_client(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def fetch_baikal_parallel(baikal=None):
+    """Специфический сборщик для Байкала (использует свои потоки внутри).
+    order/detail запрашивается только для заказов, изменившихся с прошлого запуска."""
+    baikal = baikal or get_client("b")
     s_bk = time.time()
-    list_of_cargo_codes = b.collect_cargocodes()
+    order_list = baikal.get_oreders_list()['orderList']
     results = []
-    if list_of_cargo_codes:
+    if order_list:
+        cache = BaikalDetailCache()
+        stale = cache.stale_numbers(order_list)
+        def detail(number):
+            try:
+                return baikal.get_order_info(number)
+            except Exception as e:
+                print(f"[Baikal] order/detail {number}: {e!r}")
+                return None
+
         with ThreadPoolExecutor(max_workers=10) as executor:
-            results = list(executor.map(b.get_order_info, list_of_cargo_codes))
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] [3/5] Байкал Сервис: ОК ({len(list_of_cargo_codes)} зак., {round(time.time() - s_bk, 2)} сек.)")
+            fetched = dict(zip(stale, executor.map(detail, stale)))
+        results = cache.update(order_list, fetched)
+        cache.save()
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] [3/5] Байкал Сервис: ОК ({len(order_list)} зак., обновлено {len(stale)}, {round(time.time() - s_bk, 2)} сек.)")
     else:
         print(f"[{datetime.now().strftime('%H:%M:%S')}] [3/5] Байкал Сервис: Заказов не обнаружено.")
     return results
 
-def get_all_data_in_json():
-    start_all = time.time()
-    time_for_now = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+def report_pool_stats(*clients):
+    """Печатает и логирует переиспользование keep-alive соединений по ТК"""
+    http_session.report_pool_stats({type(client).__name__: client.session.pool_stats for client in clients})
 
-    print("\n" + "="*50)
-    print(f"🚀 СБОР ДАННЫХ ОТ {time_for_now}")
-    print("="*50)
+def known_bsd_archived():
+    """Номера БСД, которые уже в архиве БД: пагинация кабинета останавливается на них"""
+    try:
+        from database import CargoDB
+        return CargoDB().get_archived_ids("БСД")
+    except Exception as e:
+        print(f"[BSD] Не удалось получить архивные номера из БД: {e}")
+        return set()
 
-    # 1. ПАРАЛЛЕЛЬНЫЙ СБОР (API-based ТК)
-    print("--- ШАГ 1: Параллельный сбор (ДЛ, ПЭК, БСД, Байкал) ---")
+def collect_api_threaded(pecom, dellin, baikal, viteka, known_archived=None):
+    """Старый путь сбора: ThreadPoolExecutor на 4 потока + 10 потоков Байкала"""
     with ThreadPoolExecutor(max_workers=4) as executor:
-        future_dl = executor.submit(d.orders_info)
+        future_dl = executor.submit(dellin.orders_info)
 
-        future_pc = executor.submit(p.fetch_detailed_data_hardcoded)
-        future_vt = executor.submit(vt.get_raw_html_pages, count=2)
-        future_bk = executor.submit(fetch_baikal_parallel)
+        future_pc = executor.submit(pecom.fetch_detailed_data_hardcoded)
+        future_vt = executor.submit(viteka.get_raw_html_pages, known_archived=known_archived)
+        future_bk = executor.submit(fetch_baikal_parallel, baikal)
 
         try:
-            dl_curr_ord = future_dl.result(timeout=45)
+            dl_curr_ord = future_dl.result(timeout=CARRIER_TIMEOUT)
             print(f"[{datetime.now().strftime('%H:%M:%S')}] [1/5] Деловые Линии: ОК ({len(dl_curr_ord)} зак.)")
-            pc_curr_ord = future_pc.result(timeout=45)
+            pc_curr_ord = future_pc.result(timeout=CARRIER_TIMEOUT)
             print(f"[{datetime.now().strftime('%H:%M:%S')}] [2/5] ПЭК: ОК ({len(pc_curr_ord)} зак.)")
-            vt_raw_html_list = future_vt.result(timeout=45)
+            vt_raw_html_list = future_vt.result(timeout=CARRIER_TIMEOUT)
             print(f"[{datetime.now().strftime('%H:%M:%S')}] [4/5] БСД: ОК ({len(vt_raw_html_list)} зак.)")
-            bc_detailed_info = future_bk.result(timeout=45)
+            bc_detailed_info = future_bk.result(timeout=CARRIER_TIMEOUT)
         except Exception as e:
             print(f"⚠️ Ошибка в параллельном блоке: {e}")
             dl_curr_ord = locals().get('dl_curr_ord', [])
@@ -66,50 +104,139 @@ def get_all_data_in_json():
             vt_raw_html_list = locals().get('vt_raw_html_list', [])
             bc_detailed_info = locals().get('bc_detailed_info', [])
 
+    report_pool_stats(pecom, dellin, baikal, viteka)
+    return {
+        "Dellin": dl_curr_ord,
+        "Pecom": pc_curr_ord,
+        "Baikal": bc_detailed_info,
+        "BSD": vt_raw_html_list,
+    }
+
+def iter_api_threaded(pecom, dellin, baikal, viteka, known_archived=None):
+    """
+    Потоковый сбор в порядке завершения: (имя блока, данные, ошибка).
+
+    У каждой ТК свой дедлайн из settings.CARRIER_TIMEOUTS, ошибка или
+    таймаут одной ТК не влияют на остальные.
+    """
+    executor = ThreadPoolExecutor(max_workers=4)
+    started = time.monotonic()
+    futures = {
+        executor.submit(dellin.orders_info): "Dellin",
+        executor.submit(pecom.fetch_detailed_data_hardcoded): "Pecom",
+        executor.submit(fetch_baikal_parallel, baikal): "Baikal",
+        executor.submit(viteka.get_raw_html_pages, known_archived=known_archived): "BSD",
+    }
+    deadlines = {f: started + CARRIER_TIMEOUTS.get(name, CARRIER_TIMEOUT) for f, name in futures.items()}
+    pending = set(futures)
+    try:
+        while pending:
+            next_deadline = min(deadlines[f] for f in pending)
+            done, pending = wait(pending, timeout=max(0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for f in done:
+                try:
+                    yield futures[f], f.result(), None
+                except Exception as e:
+                    yield futures[f], [], e
+            now = time.monotonic()
+            for f in [f for f in pending if deadlines[f] <= now]:
+                pending.discard(f)
+                yield futures[f], [], TimeoutError(f"нет ответа за {CARRIER_TIMEOUTS.get(futures[f], CARRIER_TIMEOUT)} сек.")
+    finally:
+        # Зависшие потоки не держат конвейер: requests ограничен своими таймаутами
+        executor.shutdown(wait=False, cancel_futures=True)
+        report_pool_stats(pecom, dellin, baikal, viteka)
+
+def iter_api_data(engine=COLLECT_ENGINE):
+    """Сбор API-ТК в порядке завершения выбранным движком (для конвейера)"""
+    clients = [get_client(name) for name in ("p", "d", "b", "vt")]
+    known_archived = known_bsd_archived()
+    if engine == "threads":
+        return iter_api_threaded(*clients, known_archived=known_archived)
+    from new_api_engine import iter_api_data as iter_async
+    return iter_async(*clients, known_archived=known_archived)
+
+def collect_api_data(engine=COLLECT_ENGINE):
+    """Сбор API-ТК выбранным движком: "async" (по умолчанию) или "threads" """
+    clients = [get_client(name) for name in ("p", "d", "b", "vt")]
+    known_archived = known_bsd_archived()
+    if engine == "threads":
+        return collect_api_threaded(*clients, known_archived=known_archived)
+    from new_api_engine import collect_api_data as collect_async
+    return collect_async(*clients, known_archived=known_archived)
+
+def get_all_data_in_json(engine=COLLECT_ENGINE):
+    start_all = time.time()
+    time_for_now = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+
+    print("\n" + "="*50)
+    print(f"🚀 СБОР ДАННЫХ ОТ {time_for_now}")
+    print("="*50)
+
+    # 1. ПАРАЛЛЕЛЬНЫЙ СБОР (API-based ТК)
+    print(f"--- ШАГ 1: Параллельный сбор (ДЛ, ПЭК, БСД, Байкал) [{engine}] ---")
+    api_data = collect_api_data(engine)
+
     # 2. ПОСЛЕДОВАТЕЛЬНЫЙ СБОР (Browser-based ТК: Magic Trans)
     # Запускаем отдельно, так как Playwright требует стабильного контекста
     print("\n--- ШАГ 2: Эмуляция браузера (Magic Trans) ---")
-    try:
-        mt_data = mt.get_raw_data()
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] [5/5] Magic Trans: ОК ({len(mt_data)} зак.)")
-    except Exception as e:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] [5/5] Magic Trans: ОШИБКА ({e})")
-        mt_data = []
+    mt_data, _ = fetch_magic()
 
     print("-" * 50)
     print(f"ОБЩЕЕ ВРЕМЯ РАБОТЫ: {round(time.time() - start_all, 2)} сек.")
     print("-" * 50)
 
     # 3. СОХРАНЕНИЕ И ВАЛИДАЦИЯ
+    save_raw_data({
+        "Timestamp": time_for_now,
+        **api_data,
+        "Magic": mt_data # Наш новый блок данных
+    })
+
+def fetch_magic():
+    """Magic Trans через браузер: (данные, ошибка или None); дедлайн - CARRIER_TIMEOUTS["Magic"]"""
     try:
-        combined_data = {
-            "Timestamp": time_for_now,
-            "Dellin": dl_curr_ord,
-            "Pecom": pc_curr_ord,
-            "Baikal": bc_detailed_info,
-            "BSD": vt_raw_html_list,
-            "Magic": mt_data # Наш новый блок данных
-        }
-
-        # Запись в файл
-        with open(RAW_DATA_FILE, "w", encoding='utf-8') as f:
-            json.dump(combined_data, f, indent=2, sort_keys=True, ensure_ascii=False)
-
-        # ПРОВЕРКА СОХРАНЕНИЯ
-        if os.path.exists(RAW_DATA_FILE):
-            size = os.path.getsize(RAW_DATA_FILE) / 1024
-            print(f"✅ ФАЙЛ ОБНОВЛЕН: {RAW_DATA_FILE} ({round(size, 1)} KB)")
-
-            # Проверяем наполнение Magic в файле
-            if mt_data:
-                print("✨ Данные Magic Trans успешно интегрированы в JSON.")
-            else:
-                print("ℹ️ Внимание: Блок Magic пуст (нет новых грузов или ошибка).")
+        mt_data = get_client("mt").get_raw_data(timeout=CARRIER_TIMEOUTS.get("Magic", CARRIER_TIMEOUT))
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] [5/5] Magic Trans: ОК ({len(mt_data)} зак.)")
+        return mt_data, None
+    except Exception as e:
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] [5/5] Magic Trans: ОШИБКА ({e})")
+        return [], e
+
+def report_raw_saved(raw_size, mt_data):
+    """Проверка записи снапшота и наполнения блока Magic"""
+    if os.path.exists(RAW_SNAPSHOT_FILE):
+        size = os.path.getsize(RAW_SNAPSHOT_FILE) / 1024
+        print(f"✅ СНАПШОТ ОБНОВЛЕН: {RAW_SNAPSHOT_FILE} ({round(raw_size / 1024, 1)} KB -> {round(size, 1)} KB)")
+
+        # Проверяем наполнение Magic
+        if mt_data:
+            print("✨ Данные Magic Trans успешно интегрированы в снапшот.")
         else:
-            print(f"❌ КРИТИЧЕСКАЯ ОШИБКА: Файл {RAW_DATA_FILE} не создан!")
+            print("ℹ️ Внимание: Блок Magic пуст (нет новых грузов или ошибка).")
+
+        # Копия в архив для replay (raw_archive.py); сбой архива не мешает парсингу
+        if RAW_ARCHIVE:
+            try:
+                digest, is_new = archive_snapshot(RAW_SNAPSHOT_FILE)
+                print(f"[Archive] Снапшот {digest[:12]} {'сохранен в архив' if is_new else 'уже в архиве'}")
+            except Exception as e:
+                print(f"[Archive] Не удалось сохранить снапшот в архив: {e}")
+    else:
+        print(f"❌ КРИТИЧЕСКАЯ ОШИБКА: Файл {RAW_SNAPSHOT_FILE} не создан!")
+
+
+def save_raw_data(combined_data):
+    """Пишет собранные блоки ТК в снапшот RAW_SNAPSHOT_FILE (и JSON при RAW_DEBUG_JSON)"""
+    try:
+        writer = write_snapshot(combined_data, RAW_SNAPSHOT_FILE)
+        if RAW_DEBUG_JSON:
+            dump_json(combined_data, RAW_DATA_FILE)
+            print(f"[Debug] JSON-дамп: {RAW_DATA_FILE}")
+        report_raw_saved(writer.raw_size, combined_data.get("Magic"))
 
     except Exception as e:
-        print(f"❌ Ошибка при финализации JSON: {e}")
+        print(f"❌ Ошибка при сохранении снапшота: {e}")
 
 def main():
     get_all_data_in_json()
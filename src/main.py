@@ -25,16 +25,22 @@ logging.basicConfig(
     encoding='utf-8'
 )
 
-def start_app():
+def start_app(pipelined=st.PIPELINED, parse_workers=st.PARSE_WORKERS):
     print("--- ШАГ 1: Сбор и парсинг данных из API ТК ---")
     try:
         logging.info("--- Старт процесса обновления данных ---")
 
-        # 1. Запускаем сбор данных из API (создает test_all_tk.json)
-        jw.main()
+        if pipelined:
+            # 1-2. Каждая ТК парсится и пишется в БД сразу по приходу
+            import pipeline
+            timings = pipeline.run_pipelined()
+            logging.info(f"Конвейер по ТК: {timings}")
+        else:
+            # 1. Запускаем сбор данных из API (создает test_all_tk.json)
+            jw.main()
 
-        # 2. Парсим данные и создаем итоговый report_YYYY-MM-DD.json
-        mp.run_main_parser()
+            # 2. Парсим данные и создаем итоговый report_YYYY-MM-DD.json
+            mp.run_main_parser(parse_workers)
 
         logging.info("--- Парсинг завершен ---")
         print("Сбор и парсинг данных завершен успешно.\n")
@@ -56,5 +62,9 @@ def start_app():
         return
 
 if __name__ == "__main__":
-    start_app()
+    start_app(
+        pipelined=st.PIPELINED or "--pipelined" in sys.argv,
+        # --parallel-parse: блоки ТК парсятся в пуле процессов на все ядра
+        parse_workers=os.cpu_count() if "--parallel-parse" in sys.argv else st.PARSE_WORKERS,
+    )
 
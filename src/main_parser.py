@@ -22,12 +22,18 @@ import os
 import re
 from datetime import datetime
 from datetime import timedelta
-from bs4 import BeautifulSoup
 from database import CargoDB
+from cargo import Cargo, parse_params, to_float, to_int
+from normalizer import NameNormalizer
+from status import is_finished, is_ghost_final
+from snapshot import open_raw
 
 import settings as st
 
 
+_normalizer = NameNormalizer()
+
+
 class MemoryManager:
     def __init__(self, db, last_state_file):
         self.db = db
@@ -37,107 +43,74 @@ class MemoryManager:
         if os.path.exists(self.file):
             with open(self.file, 'r', encoding='utf-8') as f:
                 try:
-                    return json.load(f)
+                    return [Cargo.from_dict(item) for item in json.load(f)]
                 except:
                     return []
         return []
 
-    def restore_ghosts(self, current_results):
-        """Возвращает список грузов, которые пропали из API, но еще живы (48ч)"""
-        current_ids = {str(r['id']) for r in current_results}
+    def find_missing(self, current_results, tk=None):
+        """Грузы прошлого стейта, которых нет в текущем ответе API.
+        С tk сверяются только грузы этой ТК (конвейерный режим)."""
+        current_ids = {str(r.id) for r in current_results}
         last_active = self.get_last_active()
+        if tk:
+            last_active = [item for item in last_active if item.tk == tk]
+        return [item for item in last_active if str(item.id) not in current_ids]
 
+    def restore_ghosts(self, missing, recent_ids):
+        """Делит пропавшие из API грузы: живые призраки (видели в БД < 48ч,
+        recent_ids из CargoDB.reconcile) и кандидаты в автоархив."""
         ghosts = []
         to_archive_missing = []
 
-        for item in last_active:
-            cargo_id = str(item['id'])
-
-            if cargo_id in current_ids:
-                continue
-
-            # 1. Если статус уже финальный - не ждем, сразу в архив
-            status_upper = str(item.get('status', '')).upper()
-
-            # Уточняем список: "ДОСТАВЛЕН" для Мэджика - это промежуточный статус.
-            # Оставляем только те слова, которые гарантируют, что груз у нас/выдан.
-            # Если это Мэджик, мы игнорируем слово "ДОСТАВЛЕН" как повод для архива.
-            final_keywords = ["ВЫДАН", "АРХИВ", "ПОЛУЧЕН", "ЗАВЕРШЕН"]
-            # ГРУЗ ДОСТАВЛЕН НА СКЛАД ПОЛУЧАТЕЛЬ
-
-            # (17-03-2026) закомментил, чекаем мэджик
-            # Если это НЕ Мэджик, можно оставить "ДОСТАВЛЕН" (например для ДЛ)
-            # if item.get('tk') != 'МЭДЖИК':
-            #     final_keywords.append("ДОСТАВЛЕН")
-
-            is_finished = any(word in status_upper for word in final_keywords)
-
-            if is_finished:
-                item['status'] = "ВЫДАН (АВТОАРХИВ)"
+        for item in missing:
+            # 1. Если статус уже финальный - не ждем, сразу в архив.
+            # Список уже, чем у классификатора: "ДОСТАВЛЕН" у Мэджика - промежуточный
+            # статус (см. status.GHOST_FINAL_WORDS)
+            if is_ghost_final(item.status):
+                item.status = "ВЫДАН (АВТОАРХИВ)"
                 to_archive_missing.append(item)
                 continue
 
-            # 2. Проверка 48 часов через БД
-            try:
-                with self.db.get_connection() as conn:
-                    res = conn.execute("SELECT updated_at FROM cargo WHERE id = ?", (cargo_id,)).fetchone()
-                    if res and res[0]:
-                        last_seen = datetime.strptime(res[0], '%Y-%m-%d %H:%M:%S')
-                        if (datetime.now() - last_seen).total_seconds() < 48 * 3600:
-                            # Помечаем "призрака" восклицательным знаком
-                            if "!" not in str(item.get('status')):
-                                item['status'] = f"! {item.get('status')} (НЕ В API)"
-                            ghosts.append(item)
-                            continue
-            except Exception as e:
-                print(f"[Memory] Ошибка времени для {cargo_id}: {e}")
+            # 2. Видели в API меньше 48 часов назад - держим на главной
+            if str(item.id) in recent_ids:
+                # Помечаем "призрака" восклицательным знаком
+                if "!" not in str(item.status):
+                    item.status = f"! {item.status} (НЕ В API)"
+                ghosts.append(item)
+                continue
 
             # 3. Иначе - в архив (пропал давно или нет в БД)
-            item['status'] = "ВЫДАН (АВТОАРХИВ)"
+            item.status = "ВЫДАН (АВТОАРХИВ)"
             to_archive_missing.append(item)
 
         return ghosts, to_archive_missing
 
 
 class CargoClassifier:
-    def __init__(self, db, exclude_list):
+    def __init__(self, db):
         self.db = db
-        self.exclude = [k.lower() for k in exclude_list]
 
-    def _get_stuck_bsd_ids(self):
-        """Получаем ID БСД, которые база пометила архивными (28ч)"""
-        try:
-            with self.db.get_connection() as conn:
-                res = conn.execute("""
-                    SELECT id FROM cargo WHERE tk = 'БСД'
-                    AND (status LIKE '%ПРИБЫЛ%' OR status LIKE '%ДОСТАВКА%')
-                    AND archived_at IS NOT NULL
-                """).fetchall()
-                return {str(row[0]) for row in res}
-        except: return set()
-
-    def classify(self, results_pool, missing_from_api):
-        stuck_ids = self._get_stuck_bsd_ids()
+    def classify(self, results_pool, missing_from_api, stuck_ids=frozenset()):
+        """stuck_ids - БСД, которые база пометила архивными (28ч), из CargoDB.reconcile"""
         active, archive_api = [], []
         today_str = datetime.now().strftime('%Y-%m-%d')
 
         for r in results_pool:
-            cargo_id = str(r.get('id'))
-            status_low = str(r.get('status', '')).lower()
-
-            is_finished = any(k in status_low for k in self.exclude)
+            cargo_id = str(r.id)
+            finished = is_finished(r.tk, r.status)
             is_stuck = cargo_id in stuck_ids
 
-            if is_finished or is_stuck:
-                if is_stuck: r['status'] = "ВЫДАН (АВТОАРХИВ БСД)"
-                if r.get('tk') == "БСД" and r.get('arrival') == "САМОВЫВОЗ":
-                    r['arrival'] = today_str
+            if finished or is_stuck:
+                if is_stuck: r.status = "ВЫДАН (АВТОАРХИВ БСД)"
+                if r.tk == "БСД" and r.arrival == "САМОВЫВОЗ":
+                    r.arrival = today_str
                 archive_api.append(r)
             else:
                 active.append(r)
 
         full_archive = archive_api + missing_from_api
-        active.sort(key=lambda x: str(x.get('arrival') or "9999"))
+        active.sort(key=lambda x: str(x.arrival or "9999"))
         return active, full_archive
 
 
@@ -153,88 +126,24 @@ def cleanup_old_reports(keep_count=7):
         except:
             pass
 
-def update_permanent_archive(new_archive_items):
-    """Сохраняет завершенные заказы в JSON и в будущую БД"""
+def update_permanent_archive(db, new_archive_items):
+    """Дописывает завершенные заказы в постоянный архив (таблица history)"""
     if not new_archive_items:
         return
 
-    # Читаем существующий JSON архив
-    old_history = []
-    if os.path.exists(st.HISTORY_FILE):
-        try:
-            with open(st.HISTORY_FILE, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if content:
-                    old_history = json.loads(content)
-        except:
-            old_history = []
-
-    existing_ids = {str(item.get('id')) for item in old_history if item.get('id')}
-    added_count = 0
+    added_count = db.append_history(new_archive_items)
+    if added_count > 0:
+        print(f"[Archive] В историю добавлено: {added_count}. Всего: {db.history_count()}")
 
-    for item in new_archive_items:
-        cargo_id = str(item.get('id', ''))
-        if not cargo_id or cargo_id in existing_ids:
-            continue
 
-        item['archived_at'] = datetime.now().strftime('%d.%m.%Y')
-        old_history.append(item)
-        existing_ids.add(cargo_id)
-        added_count += 1
+def clean_name(text, is_city=False):
+    """Нормализует имя контрагента или город (см. normalizer.NameNormalizer)"""
+    return _normalizer(text, is_city)
 
-    if added_count > 0:
-        with open(st.HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(old_history, f, ensure_ascii=False, indent=4)
-        print(f"[Archive] В JSON добавлено: {added_count}. Всего: {len(old_history)}")
 
-def clean_name(text, is_city=False):
-    if not text or not isinstance(text, str): return "???"
-
-    # 1. Базовая очистка: убираем лишние символы и кавычки СРАЗУ
-    cleaned = text.replace('"', '').replace('«', '').replace('»', '').replace("'", "")
-    cleaned = re.sub(r'\(.*?\)', '', cleaned).lower()
-
-    if is_city:
-        # Убираем стандартные приставки
-        city_trash = ["г. ", "город ", "пгт. ", "поселок ", "область", "обл.", " край", " р-н", " мо", " г "]
-        for trash in city_trash:
-            cleaned = cleaned.replace(trash, "")
-
-        # Сокращаем терминалы и стороны света
-        city_replacements = {
-            "восток": "ВСТ", "запад": "ЗПД", "север": "СЕВ", "юг": "ЮГ",
-            "терминал": "ТЕРМ", "склад": "СКЛ", "центральный": "ЦЕНТР",
-            "юго-запад": "Ю-З", "северо-восток": "С-В"
-        }
-        for long, short in city_replacements.items():
-            cleaned = cleaned.replace(long, short)
-
-        # Маппинг городов из settings.py (Астрахань -> АСТРА и т.д.)
-        for full, short in st.CITY_MAP.items():
-            if full in cleaned:
-                cleaned = cleaned.replace(full, short)
-    else:
-        # 2. Сокращаем организационные формы
-        org_replacements = {
-            "общество с ограниченной ответственностью": "ООО",
-            "индивидуальный предприниматель": "ИП",
-            "акционерное общество": "АО",
-            "публичное акционерное общество": "ПАО",
-            "торговый дом": "ТД",
-            "группа компаний": "ГК",
-            "производственное объединение": "ПО"
-        }
-        for long, short in org_replacements.items():
-            cleaned = cleaned.replace(long, short)
-
-        # 3. Чистим "информационный шум" в именах компаний
-        # (Убираем слова, которые мешают быстрому поиску)
-        noise_words = ["компания", "корпорация", "предприятие", "лтд", "ltd"]
-        for word in noise_words:
-            cleaned = re.sub(rf'\b{word}\b', '', cleaned)
-
-    # Финальная сборка: убираем лишние пробелы и в UPPER CASE
-    return " ".join(cleaned.split()).strip().upper()
+def clean_name_stats():
+    """Попадания в кэш clean_name: hits, misses, size, hit_rate"""
+    return _normalizer.stats()
 
 
 # --- ОБРАБОТЧИКИ ТК ---
@@ -287,20 +196,22 @@ def parse_baikal(data):
         arrival_raw = first_item.get('dateArrivalPlane') or order.get('dateArrivalPlane') or "САМОВЫВОЗ"
         arrival = str(arrival_raw)[:10]
 
-        results.append({
-            "tk": "БАЙКАЛ СЕРВИС",
-            "id": order.get("tracking") or "Н/Д",
-            "sender": clean_name(consignor.get("name")),
-            "recipient": clean_name(consignee.get("name")),
-            "payer_type": payer_type,
-            "status": str(order.get("orderstatus", "Н/Д")).upper(), # В UPPER
-            "params": f"{places}М | {weight}КГ | {volume}М3", # В UPPER
-            "arrival": arrival, # YYYY-MM-DD
-            "payment": payment_status.upper(), # В UPPER
-            "total_price": total_sum, # ЧИСТОЕ ЧИСЛО ДЛЯ АНАЛИТИКИ
-            "is_manual": False,
-            "route": f"{clean_name(first_item.get('departure', {}).get('name'), True)} -> {clean_name(first_item.get('destination', {}).get('name'), True)}"
-        })
+        results.append(Cargo(
+            tk="БАЙКАЛ СЕРВИС",
+            id=order.get("tracking") or "Н/Д",
+            sender=clean_name(consignor.get("name")),
+            recipient=clean_name(consignee.get("name")),
+            payer_type=payer_type,
+            status=str(order.get("orderstatus", "Н/Д")).upper(), # В UPPER
+            places=places,
+            weight=weight,
+            volume=volume,
+            arrival=arrival, # YYYY-MM-DD
+            payment=payment_status.upper(), # В UPPER
+            total_price=total_sum, # ЧИСТОЕ ЧИСЛО ДЛЯ АНАЛИТИКИ
+            is_manual=False,
+            route=f"{clean_name(first_item.get('departure', {}).get('name'), True)} -> {clean_name(first_item.get('destination', {}).get('name'), True)}"
+        ))
     return results
 
 
@@ -347,21 +258,23 @@ def parse_dellin(data):
         arrival_raw = o.get("orderDates", {}).get("arrivalToOspReceiver") or "САМОВЫВОЗ"
         arrival = str(arrival_raw)[:10]
 
-        results.append({
-            "tk": "ДЕЛОВЫЕ ЛИНИИ",
-            "id": str(o.get("orderId", "Н/Д")),
-            "sender": clean_name(sender_data.get("name")),
-            "recipient": clean_name(receiver_data.get("name")),
-            "payer_type": payer_type,
+        results.append(Cargo(
+            tk="ДЕЛОВЫЕ ЛИНИИ",
+            id=str(o.get("orderId", "Н/Д")),
+            sender=clean_name(sender_data.get("name")),
+            recipient=clean_name(receiver_data.get("name")),
+            payer_type=payer_type,
             # Добавляем процент прогресса в UPPER статус
-            "status": f"{o.get('stateName')} ({o.get('progressPercent')}%)".upper(),
-            "params": f"{f.get('places', 1)}М | {f.get('weight', 0)}КГ | {f.get('volume', 0)}М3",
-            "arrival": arrival,
-            "payment": payment_status.upper(),
-            "total_price": round(total_sum, 2), # ЧИСТОЕ ЧИСЛО ДЛЯ АНАЛИЗА
-            "is_manual": False,                # ОБЯЗАТЕЛЬНОЕ ПОЛЕ
-            "route": f"{clean_name(o.get('derival', {}).get('terminalCity') or o.get('derival', {}).get('city'), True)} -> {clean_name(o.get('arrival', {}).get('terminalCity') or o.get('arrival', {}).get('city'), True)}"
-        })
+            status=f"{o.get('stateName')} ({o.get('progressPercent')}%)".upper(),
+            places=to_int(f.get('places', 1)),
+            weight=to_float(f.get('weight', 0)),
+            volume=to_float(f.get('volume', 0)),
+            arrival=arrival,
+            payment=payment_status.upper(),
+            total_price=round(total_sum, 2), # ЧИСТОЕ ЧИСЛО ДЛЯ АНАЛИЗА
+            is_manual=False,                # ОБЯЗАТЕЛЬНОЕ ПОЛЕ
+            route=f"{clean_name(o.get('derival', {}).get('terminalCity') or o.get('derival', {}).get('city'), True)} -> {clean_name(o.get('arrival', {}).get('terminalCity') or o.get('arrival', {}).get('city'), True)}"
+        ))
     return results
 
 
@@ -403,105 +316,211 @@ def parse_pecom(data):
         arrival_raw = info.get("arrivalPlanDateTime") or "САМОВЫВОЗ"
         arrival = str(arrival_raw)[:10]
 
-        results.append({
-            "tk": "ПЭК",
-            "id": str(c.get("cargoBarCode", "Н/Д")),
-            "sender": clean_name(i.get("sender", {}).get("sender")),
-            "recipient": clean_name(i.get("receiver", {}).get("receiver")),
-            "payer_type": payer_type,
-            "status": str(info.get("cargoStatus", "Н/Д")).upper(),
-            "params": f"{int(c.get('amount', 0))}М | {c.get('weight', 0)}КГ | {c.get('volume', 0)}М3",
-            "arrival": arrival,
-            "payment": payment_status.upper(),
-            "total_price": round(total_sum, 2),
-            "is_manual": False,
-            "route": f"{clean_name(i.get('sender', {}).get('branch'), True)} -> {clean_name(i.get('receiver', {}).get('branch', {}).get('city'), True)}"
-        })
+        results.append(Cargo(
+            tk="ПЭК",
+            id=str(c.get("cargoBarCode", "Н/Д")),
+            sender=clean_name(i.get("sender", {}).get("sender")),
+            recipient=clean_name(i.get("receiver", {}).get("receiver")),
+            payer_type=payer_type,
+            status=str(info.get("cargoStatus", "Н/Д")).upper(),
+            places=int(c.get('amount', 0)),
+            weight=to_float(c.get('weight', 0)),
+            volume=to_float(c.get('volume', 0)),
+            arrival=arrival,
+            payment=payment_status.upper(),
+            total_price=round(total_sum, 2),
+            is_manual=False,
+            route=f"{clean_name(i.get('sender', {}).get('branch'), True)} -> {clean_name(i.get('receiver', {}).get('branch', {}).get('city'), True)}"
+        ))
     return results
 
 
-def parse_viteka(html_list):
-    """Парсинг БСД с глубокой очисткой получателя и статусов"""
+# БСД: шаблоны компилируются один раз на модуль, а не на каждую строку
+VT_ROWS_ID = 'orders-table-body'
+VT_ORDER_RE = re.compile(r'([А-ЯA-Z]{2}\d{2}-\d+)')
+VT_RECIPIENT_CUT_RE = re.compile(r'ИЗМЕНИТЬ|ПОМЕНЯТЬ')
+VT_DATE_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{2,4})')
+VT_PRICE_JUNK_RE = re.compile(r'[^\d.]')
+VT_PLACES_RE = re.compile('мест')
+VT_WEIGHT_RE = re.compile('Вес')
+VT_VOLUME_RE = re.compile('Объем')
+# Теги, текст которых BeautifulSoup не отдает в get_text()
+VT_SKIP_TAGS = ('script', 'style', 'template')
+
+
+class _SoupRow:
+    """Строка таблицы БСД поверх BeautifulSoup (запасной путь без lxml)"""
+
+    def __init__(self, tds):
+        self.tds = tds
+
+    def text(self, i, sep=""):
+        return self.tds[i].get_text(sep, strip=True)
+
+    def param(self, label_re):
+        found = self.tds[3].find('span', string=label_re)
+        following = found.find_next('span') if found else None
+        return following.get_text(strip=True) if following else "0"
+
+
+class _LxmlRow:
+    """
+    Строка таблицы БСД поверх lxml с семантикой BeautifulSoup:
+    text() ведет себя как get_text(sep, strip=True), param() - как поиск
+    span по .string и find_next('span').
+    """
+
+    def __init__(self, tds):
+        self.tds = tds
+        self._spans = None
+
+    @staticmethod
+    def _text(el, sep=""):
+        return sep.join(t for t in (s.strip() for s in el.itertext()) if t)
+
+    def text(self, i, sep=""):
+        return self._text(self.tds[i], sep)
+
+    @classmethod
+    def _string(cls, el):
+        """Аналог Tag.string: единственный потомок-строка (рекурсивно), иначе None"""
+        children = list(el)
+        count = (1 if el.text else 0) + len(children) + sum(1 for c in children if c.tail)
+        if count != 1:
+            return None
+        if el.text:
+            return el.text
+        child = children[0]
+        return cls._string(child) if isinstance(child.tag, str) else child.text
+
+    def param(self, label_re):
+        if self._spans is None:
+            self._spans = self.tds[3].xpath('.//span')
+        spans = self._spans
+        for i, span in enumerate(spans):
+            string = self._string(span)
+            if string is not None and label_re.search(string):
+                # Следующий span по документу: внутри ячейки или уже за ней
+                following = spans[i + 1:i + 2] or span.xpath('following::span[1]')
+                return self._text(following[0]) if following else "0"
+        return "0"
+
+
+def _viteka_rows_lxml(html):
+    from lxml import etree
+
+    if not html or not html.strip():
+        return
+    # Голый etree.HTMLParser: без прокси-классов lxml.html на каждый элемент
+    doc = etree.fromstring(html.encode('utf-8'), etree.HTMLParser(encoding='utf-8'))
+    if doc is None:
+        return
+    etree.strip_elements(doc, *VT_SKIP_TAGS, with_tail=False)
+    for row in doc.xpath(f'//*[@id="{VT_ROWS_ID}"]//tr'):
+        tds = row.xpath('.//td')
+        if len(tds) >= 12:
+            yield _LxmlRow(tds)
+
+
+def _viteka_rows_soup(html):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # Дерево строим только для тела таблицы заказов
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(id=VT_ROWS_ID))
+    for row in soup.select(f'#{VT_ROWS_ID} tr'):
+        tds = row.find_all('td')
+        if len(tds) >= 12:
+            yield _SoupRow(tds)
+
+
+def _viteka_rows(html):
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        return _viteka_rows_soup(html)
+    return _viteka_rows_lxml(html)
+
+
+def _viteka_record(row):
+    # 1. Поиск номера накладной через регулярное выражение
+    # Шаблон: 2 заглавные буквы, 2 цифры, дефис, цифры (например, СП00-1234)
+    match = VT_ORDER_RE.search(row.text(0).upper())
+    if not match:
+        # Если в ячейке только цифры (заявка) - пропускаем
+        return None
+    order_id = match.group(1)
+
+    # 2. ЧИСТКА ПОЛУЧАТЕЛЯ (Убираем "ИЗМЕНИТЬ ПОЛУЧАТЕЛЯ...")
+    # Отсекаем всё, что начинается со слова "ИЗМЕНИТЬ" или "ПОМЕНЯТЬ"
+    clean_recipient_raw = VT_RECIPIENT_CUT_RE.split(row.text(7, " "))[0].strip()
+    recipient = clean_name(clean_recipient_raw)
+
+    # 3. ЧИСТКА СТАТУСА (Делаем максимально просто для main.js)
+    status_raw = row.text(1, " ").upper()
+
+    if "ВЫДАН" in status_raw:
+        display_status = "ВЫДАН"
+    elif "ПРИБЫЛ" in status_raw or "СКЛАД" in status_raw:
+        display_status = "ПРИБЫЛ В ТК"
+    else:
+        # Для всех остальных состояний (пути, отправка, ожидается)
+        # Даем просто "В ПУТИ", чтобы main.js не рисовал (+4Д)
+        display_status = "В ПУТИ"
+
+    # 4. ДАТА ПРИБЫТИЯ (Чистая дата для БД)
+    arrival_match = VT_DATE_RE.search(status_raw)
+    if arrival_match:
+        d, m, y = arrival_match.groups()
+        full_year = f"20{y}" if len(y) == 2 else y
+        arrival = f"{full_year}-{m}-{d}"
+    else:
+        arrival = (datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d')
+
+    payment_raw = row.text(8) # Берем чистый текст из 8-й колонки
+
+    # Сначала проверяем на негативный статус, чтобы он не попал в "Оплачено"
+    if "Не оплачена" in payment_raw:
+        payment_display = "К оплате"
+    elif "Оплачена" in payment_raw:
+        payment_display = "Оплачено"
+    else:
+        # На случай, если БСД пришлет пустую строку или "В обработке"
+        payment_display = "Н/Д"
+
+    # 5. ПАРАМЕТРЫ
+    places = to_int(row.param(VT_PLACES_RE))
+    weight = to_float(row.param(VT_WEIGHT_RE).replace('кг', ''))
+    volume = to_float(row.param(VT_VOLUME_RE).replace('м3', ''))
+
+    return Cargo(
+        tk="БСД",
+        id=order_id,
+        sender=clean_name(row.text(6)),
+        recipient=recipient, # ТЕПЕРЬ ТУТ ТОЛЬКО "ЮЖНЫЙ ФОРПОСТ"
+        route=f"{clean_name(row.text(4), True)} -> {clean_name(row.text(5), True)}",
+        status=display_status,
+        places=places,
+        weight=weight,
+        volume=volume,
+        arrival=arrival,
+        payment=payment_display,
+        total_price=float(VT_PRICE_JUNK_RE.sub('', row.text(11).replace(',', '.')) or 0),
+        payer_type="recipient",
+        is_manual=False
+    )
+
+
+def parse_viteka(html_list, rows=_viteka_rows):
+    """Парсинг БСД с глубокой очисткой получателя и статусов.
+    Строки таблицы разбирает lxml, без него - BeautifulSoup по телу таблицы."""
     results = []
     if not html_list: return results
 
     for html in html_list:
-        soup = BeautifulSoup(html, 'html.parser')
-        rows = soup.select('#orders-table-body tr')
-
-        for row in rows:
-            tds = row.find_all('td')
-            if len(tds) < 12: continue
-
-            # 1. Поиск номера накладной через регулярное выражение
-            # Шаблон: 2 заглавные буквы, 2 цифры, дефис, цифры (например, СП00-1234)
-            order_text = tds[0].get_text(strip=True).upper()
-            match = re.search(r'([А-ЯA-Z]{2}\d{2}-\d+)', order_text)
-
-            if match:
-                order_id = match.group(1) # Забираем найденный номер целиком
-            else:
-                # Если в ячейке только цифры (заявка) - пропускаем
-                continue
-
-            # 2. ЧИСТКА ПОЛУЧАТЕЛЯ (Убираем "ИЗМЕНИТЬ ПОЛУЧАТЕЛЯ...")
-            # Берем только текст ДО кнопок/форм внутри ячейки
-            raw_recipient = tds[7].get_text(" ", strip=True)
-            # Отсекаем всё, что начинается со слова "ИЗМЕНИТЬ" или "ПОМЕНЯТЬ"
-            clean_recipient_raw = re.split(r'ИЗМЕНИТЬ|ПОМЕНЯТЬ', raw_recipient)[0].strip()
-            recipient = clean_name(clean_recipient_raw)
-
-            # 3. ЧИСТКА СТАТУСА (Делаем максимально просто для main.js)
-            status_raw = tds[1].get_text(" ", strip=True).upper()
-
-            if "ВЫДАН" in status_raw:
-                display_status = "ВЫДАН"
-            elif "ПРИБЫЛ" in status_raw or "СКЛАД" in status_raw:
-                display_status = "ПРИБЫЛ В ТК"
-            else:
-                # Для всех остальных состояний (пути, отправка, ожидается)
-                # Даем просто "В ПУТИ", чтобы main.js не рисовал (+4Д)
-                display_status = "В ПУТИ"
-
-            # 4. ДАТА ПРИБЫТИЯ (Чистая дата для БД)
-            arrival_match = re.search(r'(\d{2})\.(\d{2})\.(\d{2,4})', status_raw)
-            if arrival_match:
-                d, m, y = arrival_match.groups()
-                full_year = f"20{y}" if len(y) == 2 else y
-                arrival = f"{full_year}-{m}-{d}"
-            else:
-                arrival = (datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d')
-
-            # 5. ПАРАМЕТРЫ
-            def get_val(label):
-                found = tds[3].find('span', string=re.compile(label))
-                return found.find_next('span').get_text(strip=True) if found else "0"
-
-            payment_raw = tds[8].get_text(strip=True) # Берем чистый текст из 8-й колонки
-
-            # Сначала проверяем на негативный статус, чтобы он не попал в "Оплачено"
-            if "Не оплачена" in payment_raw:
-                payment_display = "К оплате"
-            elif "Оплачена" in payment_raw:
-                payment_display = "Оплачено"
-            else:
-                # На случай, если БСД пришлет пустую строку или "В обработке"
-                payment_display = "Н/Д"
-
-            results.append({
-                "tk": "БСД",
-                "id": order_id,
-                "sender": clean_name(tds[6].get_text(strip=True)),
-                "recipient": recipient, # ТЕПЕРЬ ТУТ ТОЛЬКО "ЮЖНЫЙ ФОРПОСТ"
-                "route": f"{clean_name(tds[4].get_text(strip=True), True)} -> {clean_name(tds[5].get_text(strip=True), True)}",
-                "status": display_status,
-                "params": f"{get_val('мест')}М | {get_val('Вес').replace('кг','')}КГ | {get_val('Объем').replace('м3','')}М3",
-                "arrival": arrival,
-                "payment": payment_display,
-                "total_price": float(re.sub(r'[^\d.]', '', tds[11].get_text(strip=True).replace(',','.')) or 0),
-                "payer_type": "recipient",
-                "is_manual": False
-            })
+        for row in rows(html):
+            record = _viteka_record(row)
+            if record is not None:
+                results.append(record)
     return results
 
 
@@ -552,20 +571,28 @@ def parse_magic(items_list):
         else:
             p_type = "sender"
 
-        results.append({
-            "tk": tk_name,
-            "id": item.get('id'),
-            "sender": clean_name(item.get('sender', 'Н/Д')),
-            "recipient": clean_name(item.get('recipient', 'ЮЖНЫЙ ФОРПОСТ')),
-            "route": route,
-            "status": display_status,
-            "params": item.get('params'),
-            "arrival": arrival_db,
-            "payment": item.get('payment'),
-            "total_price": float(item.get('total_price', 0)),
-            "payer_type": p_type,
-            "is_manual": False
-        })
+        # 6. ПАРАМЕТРЫ: числа из выгрузки, а в старых снапшотах - только строка params
+        if 'places' in item:
+            places, weight, volume = to_int(item['places']), to_float(item.get('weight')), to_float(item.get('volume'))
+        else:
+            places, weight, volume = parse_params(item.get('params'))
+
+        results.append(Cargo(
+            tk=tk_name,
+            id=item.get('id'),
+            sender=clean_name(item.get('sender', 'Н/Д')),
+            recipient=clean_name(item.get('recipient', 'ЮЖНЫЙ ФОРПОСТ')),
+            route=route,
+            status=display_status,
+            places=places,
+            weight=weight,
+            volume=volume,
+            arrival=arrival_db,
+            payment=item.get('payment'),
+            total_price=float(item.get('total_price', 0)),
+            payer_type=p_type,
+            is_manual=False
+        ))
     return results
 
 
@@ -583,67 +610,149 @@ def save_json_report(data, file_path):
         json.dump(data, f, ensure_ascii=False, indent=4)
 
 
-def run_main_parser():
-    db = CargoDB()
-    memory = MemoryManager(db, st.LAST_STATE_FILE)
-    classifier = CargoClassifier(db, ["выдан", "доставлен", "завершен", "архив", "выдача", "получен"])
-
-    if not os.path.exists(st.RAW_DATA_FILE):
-        return print(f"Ошибка: Файл не найден: {st.RAW_DATA_FILE}")
+# Блок снапшота сбора -> (парсер, название ТК в отчете)
+CARRIER_PARSERS = {
+    "Baikal": (parse_baikal, "БАЙКАЛ СЕРВИС"),
+    "Dellin": (parse_dellin, "ДЕЛОВЫЕ ЛИНИИ"),
+    "Pecom": (parse_pecom, "ПЭК"),
+    "BSD": (parse_viteka, "БСД"),
+    "Magic": (parse_magic, "МЭДЖИК"),
+}
+
+# Где в блоке лежит список грузов (None - блок сам список): по нему блок режется на куски
+CARRIER_ITEMS_KEY = {"Baikal": None, "Dellin": "orders", "Pecom": "cargos", "BSD": None, "Magic": None}
+
+
+def _parse_block(block, data):
+    """Разбор одного блока (или куска блока) ТК: (грузы, сек.). Выполняется и в дочернем процессе."""
+    parser, _ = CARRIER_PARSERS[block]
+    s_block = time.time()
+    results = parser(data)
+    return results, round(time.time() - s_block, 2)
+
+
+def _split_block(block, data, parts):
+    """Режет блок на parts кусков по списку грузов; парсеры обрабатывают грузы независимо"""
+    key = CARRIER_ITEMS_KEY.get(block)
+    items = data if key is None else (data.get(key) if isinstance(data, dict) else None)
+    if parts <= 1 or not isinstance(items, list) or len(items) < 2:
+        return [data]
+    step = -(-len(items) // parts)
+    chunks = [items[i:i + step] for i in range(0, len(items), step)]
+    return chunks if key is None else [{**data, key: chunk} for chunk in chunks]
+
+
+def parse_blocks(raw_json, workers=st.PARSE_WORKERS, size=None):
+    """
+    Разбирает все блоки ТК последнего сбора.
+
+    При workers > 1 и входе не меньше PARSE_PROCESS_MIN_BYTES блоки режутся
+    на куски по грузам и парсятся в пуле процессов (HTML БСД и clean_name
+    держат GIL). Результат склеивается в порядке CARRIER_PARSERS и исходном
+    порядке грузов - такой же, как при разборе в текущем процессе.
+
+    :param raw_json: блоки ТК (dict или snapshot.RawSnapshot)
+    :type raw_json: dict
+    :param workers: размер пула процессов (0/1 - в текущем процессе), не больше числа ядер
+    :type workers: int
+    :param size: размер входа в байтах (для порога), None - без порога
+    :type size: int
+    :returns: список грузов всех ТК
+    :rtype: list
+    """
+    blocks = [block for block in CARRIER_PARSERS if block in raw_json]
+    # Процессов больше, чем ядер, - только лишние накладные расходы
+    workers = min(workers, os.cpu_count() or 1)
+    use_pool = workers > 1 and (size is None or size >= st.PARSE_PROCESS_MIN_BYTES)
+    s_all = time.time()
+
+    parsed = None
+    if use_pool:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
 
-    with open(st.RAW_DATA_FILE, 'r', encoding='utf-8') as f:
-        try: raw_json = json.load(f)
-        except Exception as e: return print(f"Ошибка чтения JSON: {e}")
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    block: [pool.submit(_parse_block, block, chunk)
+                            for chunk in _split_block(block, raw_json[block], workers)]
+                    for block in blocks
+                }
+                parsed = {block: [f.result() for f in shards] for block, shards in futures.items()}
+        except (OSError, BrokenProcessPool) as e:
+            print(f"[Parser] Пул процессов недоступен ({e!r}), парсим в текущем процессе")
+            use_pool = False
+    if parsed is None:
+        parsed = {block: [_parse_block(block, raw_json[block])] for block in blocks}
 
-    # 1. Сбор данных
     raw_results = []
-    if "Baikal" in raw_json: raw_results.extend(parse_baikal(raw_json["Baikal"]))
-    if "Dellin" in raw_json: raw_results.extend(parse_dellin(raw_json["Dellin"]))
-    if "Pecom" in raw_json: raw_results.extend(parse_pecom(raw_json["Pecom"]))
-    if "BSD" in raw_json: raw_results.extend(parse_viteka(raw_json["BSD"]))
-    if "Magic" in raw_json: raw_results.extend(parse_magic(raw_json["Magic"]))
-
-    # 2. Подготовка базы (28ч для БСД)
-    try: db.archive_stuck_bsd()
-    except Exception as e: print(f"[Parser] Ошибка авто-архивации БСД: {e}")
-
-    # 3. Обработка "памяти" и Классификация
-    ghosts, missing_from_api = memory.restore_ghosts(raw_results)
+    for block in blocks:
+        count = 0
+        for results, _ in parsed[block]:
+            raw_results.extend(results)
+            count += len(results)
+        elapsed = round(sum(sec for _, sec in parsed[block]), 2)
+        print(f"[Parser] {block}: {count} грузов, {elapsed} сек. ЦП ({len(parsed[block])} кусков)")
+
+    mode = f"пул из {workers} процессов" if use_pool else "в текущем процессе"
+    print(f"[Parser] Разбор блоков ({mode}): {round(time.time() - s_all, 2)} сек.")
+    return raw_results
+
+
+def init_stages():
+    db = CargoDB()
+    memory = MemoryManager(db, st.LAST_STATE_FILE)
+    classifier = CargoClassifier(db)
+    return db, memory, classifier
+
+
+def process_results(db, memory, classifier, raw_results, tk=None):
+    """Призраки, классификация и запись в БД для набора грузов (всех или одной ТК)"""
+    missing = memory.find_missing(raw_results, tk)
+    # Все обращения к БД сверки - одной транзакцией; без tk (весь сбор) там же
+    # и авто-архивация БСД (28ч), конвейер делает ее сам до прихода блоков
+    try:
+        facts = db.reconcile({str(r.id) for r in raw_results}, {str(item.id) for item in missing}, archive_bsd=tk is None)
+    except Exception as e:
+        # Как раньше при ошибке БД: пропавшие - в архив, зависших БСД нет
+        print(f"[Parser] Ошибка сверки с БД: {e}")
+        facts = {"recent": set(), "stuck": set()}
+
+    ghosts, missing_from_api = memory.restore_ghosts(missing, facts["recent"])
     raw_results.extend(ghosts)
 
-    active, to_archive = classifier.classify(raw_results, missing_from_api)
+    active, to_archive = classifier.classify(raw_results, missing_from_api, facts["stuck"])
 
-    # 4. Сохранение в БД
-    for item in to_archive: db.upsert_cargo(item, is_archived=1)
-    for item in active: db.upsert_cargo(item, is_archived=0)
+    stats = db.save_cargos(to_archive, active)
+    print(f"[DB]{f' {tk}:' if tk else ''} новых {stats['inserted']}, изменилось {stats['changed']}, "
+          f"без изменений {stats['unchanged']}" + (f", ошибок записи {stats['errors']}" if stats['errors'] else ""))
+    return active, to_archive
 
-    # 5. Обновление архивов и стейта
-    update_permanent_archive(to_archive)
+
+def finalize_run(active, to_archive, db=None):
+    """Архив, стейт для призраков и итоговые отчеты report_*.json"""
+    db = db or CargoDB()
+    update_permanent_archive(db, to_archive)
+    # Дальше только JSON для фронта и бота: грузы превращаются в словари с params
+    active = [item.to_dict() for item in active]
+    to_archive = [item.to_dict() for item in to_archive]
     with open(st.LAST_STATE_FILE, 'w', encoding='utf-8') as f:
         json.dump(active, f, ensure_ascii=False, indent=4)
 
-    # 6. Формирование истории и финальных отчетов
-    full_history = []
-    if os.path.exists(st.HISTORY_FILE):
-        with open(st.HISTORY_FILE, 'r', encoding='utf-8') as f:
-            try:
-                full_history = json.load(f)
-                full_history.sort(
-                    key=lambda x: datetime.strptime(x.get('archived_at', '01.01.2020'), '%d.%m.%Y'),
-                    reverse=True
-                )
-            except Exception as e:
-                print(f"[Error] Ошибка сортировки истории: {e}")
-                full_history = to_archive
-    else:
-        full_history = to_archive
+    # В отчет - архив по индексу archived_at, новые сверху (HISTORY_REPORT_LIMIT - только последние)
+    try:
+        full_history = db.latest_history(st.HISTORY_REPORT_LIMIT)
+        history_count = db.history_count()
+    except Exception as e:
+        print(f"[Error] Ошибка чтения истории: {e}")
+        full_history, history_count = to_archive, len(to_archive)
 
     report_time = datetime.now().strftime('%d.%m.%Y %H:%M:%S')
     json_data = {
         "metadata": {
             "created_at": report_time,
             "active_count": len(active),
-            "archive_count": len(full_history)
+            "archive_count": history_count
         },
         "active": active,
         "archive": full_history
@@ -655,8 +764,51 @@ def run_main_parser():
     save_json_report(json_data, st.CURRENT_STATE_FILE)
 
     cleanup_old_reports(7)
+    cache = clean_name_stats()
+    print(f"[clean_name] Кэш: {cache['hits']} попаданий, {cache['misses']} промахов "
+          f"({cache['hit_rate']:.0%}), записей {cache['size']}")
     print(f"\n[✓] Обработка завершена. Активно: {len(active)}, В архив: {len(to_archive)}")
 
 
+def run_main_parser(workers=st.PARSE_WORKERS, raw_path=st.RAW_SNAPSHOT_FILE):
+    """
+    Разбор сохраненного сбора и запись результата.
+
+    :returns: время этапов {этап: сек.} (для replay из raw_archive)
+    :rtype: dict
+    """
+    timings = {}
+    s_stage = time.perf_counter()
+
+    def lap(stage):
+        nonlocal s_stage
+        now = time.perf_counter()
+        timings[stage] = round(now - s_stage, 3)
+        s_stage = now
+
+    db, memory, classifier = init_stages()
+
+    try: raw_blocks, raw_size = open_raw(raw_path)
+    except Exception as e: return print(f"Ошибка чтения снапшота: {e}")
+    if raw_blocks is None:
+        return print(f"Ошибка: Файл не найден: {raw_path}")
+    lap("init")
+
+    # 1. Сбор данных (блоки ТК читаются из снапшота по одному)
+    raw_results = parse_blocks(raw_blocks, workers, size=raw_size)
+    lap("parse")
+
+    # 2-4. Сверка с БД (28ч для БСД, призраки), классификация и сохранение в БД
+    active, to_archive = process_results(db, memory, classifier, raw_results)
+    lap("process")
+
+    # 5-6. Обновление архивов, стейта и отчетов
+    finalize_run(active, to_archive, db)
+    lap("finalize")
+
+    print("[Parser] Этапы: " + ", ".join(f"{stage} {sec} сек." for stage, sec in timings.items()))
+    return timings
+
+
 if __name__ == "__main__":
     run_main_parser()
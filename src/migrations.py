@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import argparse
+import re
+import sys
+from datetime import datetime
+
+try:
+    from src import db_pool
+    from src import settings as st
+    from src.queries import SERVER_QUERIES
+except ImportError:
+    import db_pool
+    import settings as st
+    from queries import SERVER_QUERIES
+
+
+# Версии схемы БД. Базовые таблицы (cargo, driver_tasks, history) создает
+# CargoDB.init_*; все, что меняется после, - шаги MIGRATIONS. Каждый шаг
+# идемпотентен и выполняется в своей транзакции вместе с записью в schema_version.
+#
+#   python migrations.py status
+#   python migrations.py upgrade [--to N]
+#   python migrations.py explain        # планы запросов server.py, код 1 при полном скане
+#   python migrations.py reindex        # перестроить поисковый индекс cargo_fts
+
+# Хранимые генерируемые колонки cargo: считаются при записи, а не в каждом SELECT
+CARGO_GENERATED = {
+    "params": "TEXT GENERATED ALWAYS AS (places || 'М | ' || weight || 'КГ | ' || volume || 'М3') STORED",
+    "weight_category": """TEXT GENERATED ALWAYS AS (CASE
+            WHEN weight <= 15 THEN '📦 Ультра-малые (до 15кг)'
+            WHEN weight > 15 AND weight <= 35 THEN '📦 Малые (15-35кг)'
+            WHEN weight > 35 AND weight <= 75 THEN '📦 Средние (35-75кг)'
+            WHEN weight > 75 AND weight <= 150 THEN '📦 Премиум (75-150кг)'
+            WHEN weight > 150 AND weight <= 400 THEN '🚚 Крупные (150-400кг)'
+            WHEN weight > 400 AND weight <= 1000 THEN '🚚 Тяжелые (400кг-1т)'
+            ELSE '🚜 Тонники (свыше 1т)'
+        END) STORED""",
+    # Наш груз (мы отправитель или получатель) - фильтр аналитики
+    "is_own": """INTEGER GENERATED ALWAYS AS (
+            COALESCE(sender LIKE '%ЮЖНЫЙ ФОРПОСТ%' OR recipient LIKE '%ЮЖНЫЙ ФОРПОСТ%', 0)
+        ) STORED""",
+}
+
+
+def _columns(conn, table, generated=True):
+    # table_info не показывает генерируемые колонки, table_xinfo - показывает
+    pragma = "table_xinfo" if generated else "table_info"
+    return [row[1] for row in conn.execute(f"PRAGMA {pragma}({table})")]
+
+
+def add_cargo_generated_columns(conn):
+    """
+    STORED-колонку нельзя добавить через ALTER TABLE, поэтому cargo
+    пересобирается: та же схема + генерируемые колонки, перенос строк,
+    замена таблицы.
+    """
+    missing = [name for name in CARGO_GENERATED if name not in _columns(conn, "cargo")]
+    if not missing:
+        return
+    plain = _columns(conn, "cargo", generated=False)
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'cargo'").fetchone()[0]
+    body = re.sub(r'^CREATE TABLE\s+"?cargo"?', 'CREATE TABLE cargo_new', sql.rstrip()[:-1].rstrip())
+    extra = ",\n    ".join(f"{name} {CARGO_GENERATED[name]}" for name in missing)
+    # Перевод строки до запятой: последняя колонка может заканчиваться комментарием --
+    conn.execute(f"{body}\n    , {extra}\n)")
+    cols = ", ".join(plain)
+    conn.execute(f"INSERT INTO cargo_new ({cols}) SELECT {cols} FROM cargo")
+    conn.execute("DROP TABLE cargo")
+    conn.execute("ALTER TABLE cargo_new RENAME TO cargo")
+
+
+def add_server_indexes(conn):
+    """Индексы под запросы queries.SERVER_QUERIES (проверка - `explain`)"""
+    for sql in (
+        # актив по дате прибытия и последние архивные
+        "CREATE INDEX IF NOT EXISTS idx_cargo_active ON cargo(is_archived, arrival)",
+        "CREATE INDEX IF NOT EXISTS idx_cargo_archived ON cargo(is_archived, updated_at)",
+        # MAX(updated_at) для метаданных отчета
+        "CREATE INDEX IF NOT EXISTS idx_cargo_updated ON cargo(updated_at)",
+        # аналитика ТК: наши грузы за период. Покрывающим его не сделать:
+        # запрос с генерируемой колонкой SQLite всегда дочитывает из таблицы
+        "CREATE INDEX IF NOT EXISTS idx_cargo_own ON cargo(is_own, updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_date ON driver_tasks(task_date, task_time)",
+    ):
+        conn.execute(sql)
+
+
+# Поиск по номеру, контрагентам, маршруту и статусу (/api/search).
+# Внешнее содержимое: текст берется из cargo по rowid, в индексе только триграммы
+SEARCH_COLUMNS = ("id", "sender", "recipient", "route", "status")
+
+
+def add_search_index(conn):
+    """
+    FTS5 (trigram) над cargo и триггеры, которые держат его в актуальном
+    состоянии. touch_cargo (только updated_at) индекс не трогает.
+    """
+    cols = ", ".join(SEARCH_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS cargo_fts USING fts5(
+            {cols}, content='cargo', content_rowid='rowid', tokenize='trigram'
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS cargo_fts_insert AFTER INSERT ON cargo BEGIN
+            INSERT INTO cargo_fts (rowid, {cols}) VALUES (new.rowid, {new});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS cargo_fts_delete AFTER DELETE ON cargo BEGIN
+            INSERT INTO cargo_fts (cargo_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS cargo_fts_update AFTER UPDATE OF {cols} ON cargo BEGIN
+            INSERT INTO cargo_fts (cargo_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old});
+            INSERT INTO cargo_fts (rowid, {cols}) VALUES (new.rowid, {new});
+        END
+    """)
+    rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """
+    Перестроить cargo_fts по текущей cargo. Нужно после VACUUM (у cargo нет
+    INTEGER PRIMARY KEY, rowid могут смениться) и после пересборки cargo.
+    """
+    conn.execute("INSERT INTO cargo_fts (cargo_fts) VALUES ('rebuild')")
+
+
+# (версия, описание, шаг) - только дописывать в конец
+MIGRATIONS = [
+    (1, "cargo: генерируемые колонки params, weight_category, is_own", add_cargo_generated_columns),
+    (2, "индексы под запросы server.py", add_server_indexes),
+    (3, "cargo_fts: полнотекстовый поиск (trigram) и триггеры", add_search_index),
+]
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def current_version(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not exists:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def upgrade(conn, target=None):
+    """
+    Применить недостающие миграции (до target включительно).
+
+    :returns: номера примененных версий
+    :rtype: list
+    """
+    ensure_version_table(conn)
+    current = current_version(conn)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current or (target is not None and version > target):
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().isoformat(timespec='seconds')),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"[DB] Миграция {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+def explain(conn, queries=SERVER_QUERIES):
+    """{имя запроса: строки EXPLAIN QUERY PLAN}"""
+    return {
+        name: [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        for name, (sql, params) in queries.items()
+    }
+
+
+def full_scans(plans):
+    """{имя: строки SCAN} для запросов, которые читают таблицу или индекс целиком"""
+    found = {}
+    for name, plan in plans.items():
+        # FTS5 с MATCH - поиск по индексу, хоть план и пишет SCAN (0:M...)
+        scans = [line for line in plan if line.startswith("SCAN") and not re.search(r"VIRTUAL TABLE INDEX \d+:M", line)]
+        if scans:
+            found[name] = scans
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы cargo_system.db")
+    parser.add_argument("command", choices=["status", "upgrade", "explain", "reindex"])
+    parser.add_argument("--db", default=st.DB_PATH)
+    parser.add_argument("--to", type=int, help="upgrade: до этой версии включительно")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        try:
+            from src import database
+        except ImportError:
+            import database
+        database.DB_PATH = args.db
+        db = database.CargoDB(migrate=False)
+        with db.get_connection() as conn:
+            applied = upgrade(conn, args.to)
+            print(f"Версия схемы: {current_version(conn)} (применено: {len(applied)})")
+        return
+
+    if args.command == "reindex":
+        with db_pool.connect(args.db) as conn:
+            rebuild_search_index(conn)
+            count = conn.execute("SELECT COUNT(*) FROM cargo").fetchone()[0]
+        print(f"Поисковый индекс перестроен: {count} грузов")
+        return
+
+    conn = db_pool.connect(args.db, readonly=True)
+    try:
+        if args.command == "status":
+            done = {}
+            if current_version(conn):
+                done = {v: at for v, at in conn.execute("SELECT version, applied_at FROM schema_version")}
+            print(f"Версия схемы: {current_version(conn)} из {MIGRATIONS[-1][0]}")
+            for version, description, _ in MIGRATIONS:
+                print(f"  {version:>3}  {done.get(version, 'ожидает'):<20}  {description}")
+            return
+
+        plans = explain(conn)
+        for name, plan in plans.items():
+            print(f"{name}:")
+            for line in plan:
+                print(f"    {line}")
+        scans = full_scans(plans)
+        if scans:
+            print(f"\n❌ Полный скан: {', '.join(scans)}")
+            sys.exit(1)
+        print(f"\n✅ Полных сканов нет ({len(plans)} запросов)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+import settings as st
+from detail_cache import BaikalDetailCache
+from http_session import PoolStats, report_pool_stats
+
+
+def _now():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+class AsyncCollector:
+    """
+    Асинхронный сбор данных API-ТК (ДЛ, ПЭК, Байкал, БСД) на одном event loop.
+
+    Использует описания эндпоинтов и тела запросов из синхронных клиентов
+    api_classes, но ходит в сеть через один httpx.AsyncClient: keep-alive
+    и HTTP/2-мультиплексирование там, где ТК его поддерживает. Детализация
+    Байкала (по запросу на заказ) идет под общим семафором, а не через
+    фиксированный пул из 10 потоков, и только для заказов, изменившихся
+    с прошлого запуска (BaikalDetailCache).
+
+    :param pecom: клиент PecomApiV1
+    :param dellin: клиент DellinApiV1 (сессия поднимается лениво)
+    :param baikal: клиент BaikalApiV2
+    :param viteka: клиент VitekaApiV1
+    :param max_connections: лимит одновременных запросов
+    :type max_connections: int
+    :param http2: разрешить HTTP/2
+    :type http2: bool
+    :param timeout: дедлайн на одну ТК (сек.)
+    :type timeout: int
+    :param known_archived: номера БСД, уже лежащие в архиве (ранняя остановка пагинации)
+    :type known_archived: set
+    """
+
+    def __init__(self, pecom, dellin, baikal, viteka,
+                 max_connections=st.ASYNC_MAX_CONNECTIONS,
+                 http2=st.ASYNC_HTTP2, timeout=st.CARRIER_TIMEOUT,
+                 known_archived=None):
+        self.p = pecom
+        self.d = dellin
+        self.b = baikal
+        self.vt = viteka
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.timeout = timeout
+        self.known_archived = known_archived or set()
+        # Счетчики как у make_session (report_pool_stats): запросы и новые соединения по ТК
+        self.pool_stats = {type(c).__name__: PoolStats() for c in (pecom, dellin, baikal, viteka)}
+        self._stats_by_host = {
+            urlsplit(c.host).hostname: self.pool_stats[type(c).__name__]
+            for c in (pecom, dellin, baikal, viteka)
+        }
+
+    def _client(self, **kwargs):
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        return httpx.AsyncClient(
+            http2=self.http2, limits=limits, timeout=self.timeout,
+            event_hooks={"request": [self._count_request]}, **kwargs
+        )
+
+    async def _count_request(self, request):
+        """Запрос - в счетчик его ТК; новое TCP-соединение видно по trace-событию httpcore"""
+        stats = self._stats_by_host.get(request.url.host)
+        if stats is None:
+            return
+        stats.add_request()
+
+        async def trace(event, info):
+            if event == "connection.connect_tcp.started":
+                stats.add_connection()
+
+        request.extensions["trace"] = trace
+
+    async def _post_json(self, client, url, data, headers, auth=None, timeout=httpx.USE_CLIENT_DEFAULT):
+        r = await client.post(url, content=json.dumps(data), headers=headers, auth=auth, timeout=timeout)
+        return r.json()
+
+    # --- ТК ---
+
+    async def dellin(self, client):
+        d = self.d
+        # Вход (если сессии нет ни в памяти, ни на диске) - блокирующий, уводим в поток
+        await asyncio.to_thread(d.ensure_session)
+        r = await client.post(d.url_orders, content=json.dumps(d.orders_query()), headers=d.headers)
+        try:
+            payload = r.json()
+        except ValueError:
+            payload = None
+        if d.is_auth_error(r.status_code, payload):
+            await asyncio.to_thread(d.refresh_session)
+            r = await client.post(d.url_orders, content=json.dumps(d.orders_query()), headers=d.headers)
+            payload = r.json()
+        return payload
+
+    async def pecom(self, client):
+        p = self.p
+        auth = (p.login or "", p.appKey or "")
+        orders = await self._post_json(client, p.url_cargos_list, p.get_period(), p.headers, auth, p.timeout)
+        codes = [i['code'] for i in orders.get('cargos') or [] if i and 'code' in i]
+
+        # cargos/status кусками, параллельно; упавший кусок повторяется отдельно
+        sem = asyncio.Semaphore(st.PC_CHUNK_WORKERS)
+
+        async def fetch_chunk(chunk):
+            async with sem:
+                for attempt in range(1, st.PC_CHUNK_RETRIES + 1):
+                    try:
+                        return await self._post_json(
+                            client, p.url_cargos_status, {"cargoCodes": chunk}, p.headers, auth, p.timeout
+                        )
+                    except Exception as e:
+                        print(f"[Pecom] Кусок из {len(chunk)} номеров, попытка {attempt}: {e!r}")
+                return None
+
+        chunks = p.chunks(codes)
+        responses = await asyncio.gather(*(fetch_chunk(c) for c in chunks))
+        failed = sum(1 for r in responses if r is None)
+        if failed:
+            print(f"[Pecom] ⚠️ Не получено кусков: {failed} из {len(chunks)}")
+        return p.merge_statuses(responses)
+
+    async def baikal(self, client):
+        b = self.b
+        s_bk = time.time()
+        auth = (b.apiKey or "", "")
+        orders = await self._post_json(client, b.url_cargos_list, b.get_period(), b.headers, auth)
+        order_list = orders['orderList']
+        if not order_list:
+            print(f"[{_now()}] [3/5] Байкал Сервис: Заказов не обнаружено.")
+            return []
+
+        # order/detail только для новых и изменившихся заказов
+        cache = BaikalDetailCache()
+        stale = cache.stale_numbers(order_list)
+
+        sem = asyncio.Semaphore(self.max_connections)
+
+        async def detail(number):
+            async with sem:
+                try:
+                    return await self._post_json(
+                        client, b.url_cargos_detail, {"number": number}, b.headers, auth
+                    )
+                except Exception as e:
+                    print(f"[Baikal] order/detail {number}: {e!r}")
+                    return None
+
+        details = await asyncio.gather(*(detail(n) for n in stale))
+        results = cache.update(order_list, dict(zip(stale, details)))
+        cache.save()
+        print(f"[{_now()}] [3/5] Байкал Сервис: ОК ({len(order_list)} зак., обновлено {len(stale)}, {round(time.time() - s_bk, 2)} сек.)")
+        return results
+
+    async def viteka(self, retries=3):
+        """БСД - HTML-кабинет с cookie-сессией, поэтому свой клиент.
+        Пагинация как в VitekaApiV1.get_raw_html_pages, но страницы под семафором."""
+        vt = self.vt
+        async with self._client(headers=vt.headers, follow_redirects=True) as client:
+            logged_in = False
+            for attempt in range(1, retries + 1):
+                try:
+                    r_init = await client.get(vt.url_login)
+                    payload = vt.login_payload(r_init.text)
+                    if not payload: continue
+                    r_post = await client.post(
+                        vt.url_login, data=payload, headers={"Referer": vt.url_login}
+                    )
+                    if "cabinet" in str(r_post.url) or r_post.status_code == 200:
+                        print(f"[Viteka] Вход выполнен с попытки {attempt}")
+                        logged_in = True
+                        break
+                except Exception as e:
+                    print(f"[Viteka] Попытка {attempt} не удалась: {e}")
+                    await asyncio.sleep(2)
+            if not logged_in:
+                print("[Viteka] Ошибка: Все попытки авторизации провалены.")
+                return []
+
+            sem = asyncio.Semaphore(st.VT_CONCURRENCY)
+
+            async def get_page(p):
+                async with sem:
+                    try:
+                        await asyncio.sleep(vt.rate_limiter.reserve())
+                        r = await client.get(vt.url_orders, params={"page": p})
+                        if r.status_code == 200:
+                            return r.text
+                        print(f"[Viteka] Страница {p}: HTTP {r.status_code}")
+                    except Exception as e:
+                        print(f"[Viteka] Ошибка на странице {p}: {e}")
+                    return None
+
+            first = await get_page(1)
+            if first is None:
+                return []
+            known = self.known_archived
+            if known and vt.only_archived(first, known):
+                return [first]
+
+            last = min(vt.page_count(first), st.VT_MAX_PAGES)
+            pages = {1: first}
+            for start in range(2, last + 1, st.VT_CONCURRENCY):
+                wave = list(range(start, min(start + st.VT_CONCURRENCY, last + 1)))
+                fetched = dict(zip(wave, await asyncio.gather(*(get_page(p) for p in wave))))
+                pages.update({p: html for p, html in fetched.items() if html is not None})
+                if known and any(
+                    html is not None and vt.only_archived(html, known) for html in fetched.values()
+                ):
+                    print(f"[Viteka] Стр. {wave[-1]}: дальше только архив, остановка.")
+                    break
+
+            print(f"[Viteka] Загружено страниц: {len(pages)} из {last}")
+            return [pages[p] for p in sorted(pages)]
+
+    # --- СБОРКА ---
+
+    async def _run_carrier(self, name, coro):
+        """Свой дедлайн и изоляция ошибок: падение одной ТК не обнуляет остальные"""
+        try:
+            timeout = st.CARRIER_TIMEOUTS.get(name, self.timeout)
+            return name, await asyncio.wait_for(coro, timeout=timeout), None
+        except Exception as e:
+            print(f"⚠️ Ошибка в параллельном блоке ({name}): {e!r}")
+            return name, [], e
+
+    def _carriers(self, client):
+        return [
+            self._run_carrier("Dellin", self.dellin(client)),
+            self._run_carrier("Pecom", self.pecom(client)),
+            self._run_carrier("Baikal", self.baikal(client)),
+            self._run_carrier("BSD", self.viteka()),
+        ]
+
+    async def collect(self):
+        """
+        Собирает все API-ТК параллельно.
+
+        :returns: блоки Dellin, Pecom, Baikal, BSD как в снапшоте сбора
+        :rtype: dict
+        """
+        async with self._client() as client:
+            results = await asyncio.gather(*self._carriers(client))
+        data = {name: payload for name, payload, _ in results}
+        errors = {name: error for name, _, error in results}
+        for name, title in (("Dellin", "[1/5] Деловые Линии"), ("Pecom", "[2/5] ПЭК"), ("BSD", "[4/5] БСД")):
+            if errors[name] is not None:
+                print(f"[{_now()}] {title}: ОШИБКА ({errors[name]!r})")
+            else:
+                print(f"[{_now()}] {title}: ОК ({len(data[name])} зак.)")
+        report_pool_stats(self.pool_stats)
+        return data
+
+    async def collect_each(self, on_result):
+        """Вызывает on_result(имя, данные, ошибка) по мере завершения каждой ТК"""
+        async with self._client() as client:
+            for next_done in asyncio.as_completed(self._carriers(client)):
+                on_result(*await next_done)
+        report_pool_stats(self.pool_stats)
+
+
+def collect_api_data(pecom, dellin, baikal, viteka, **kwargs):
+    """Синхронная обертка над AsyncCollector.collect для json_write"""
+    return asyncio.run(AsyncCollector(pecom, dellin, baikal, viteka, **kwargs).collect())
+
+
+def iter_api_data(pecom, dellin, baikal, viteka, **kwargs):
+    """
+    Синхронный генератор (имя, данные, ошибка) в порядке завершения ТК.
+
+    Event loop крутится в отдельном потоке, поэтому вызывающий код может
+    парсить и писать в БД блок одной ТК, пока остальные еще качаются.
+    Сбой самого сбора (не отдельной ТК) поднимается здесь, в потоке
+    вызывающего, а не выглядит как обычный конец генератора.
+    """
+    results = queue.Queue()
+    collector = AsyncCollector(pecom, dellin, baikal, viteka, **kwargs)
+
+    def run():
+        try:
+            asyncio.run(collector.collect_each(lambda *item: results.put(item)))
+        except BaseException as e:
+            results.put(e)
+        finally:
+            results.put(None)
+
+    threading.Thread(target=run, name="async-collector", daemon=True).start()
+    while (item := results.get()) is not None:
+        if isinstance(item, BaseException):
+            raise item
+        yield item
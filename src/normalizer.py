@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import re
+from functools import lru_cache
+
+import settings as st
+
+
+# --- ТАБЛИЦЫ ПРАВИЛ (порядок важен: так работал прежний clean_name) ---
+
+QUOTES = '"«»\''
+
+# Убираем стандартные приставки
+CITY_TRASH = ["г. ", "город ", "пгт. ", "поселок ", "область", "обл.", " край", " р-н", " мо", " г "]
+
+# Сокращаем терминалы и стороны света
+CITY_REPLACEMENTS = [
+    ("восток", "ВСТ"), ("запад", "ЗПД"), ("север", "СЕВ"), ("юг", "ЮГ"),
+    ("терминал", "ТЕРМ"), ("склад", "СКЛ"), ("центральный", "ЦЕНТР"),
+    ("юго-запад", "Ю-З"), ("северо-восток", "С-В"),
+]
+
+# Сокращаем организационные формы
+ORG_REPLACEMENTS = [
+    ("общество с ограниченной ответственностью", "ООО"),
+    ("индивидуальный предприниматель", "ИП"),
+    ("акционерное общество", "АО"),
+    ("публичное акционерное общество", "ПАО"),
+    ("торговый дом", "ТД"),
+    ("группа компаний", "ГК"),
+    ("производственное объединение", "ПО"),
+]
+
+# "Информационный шум" в именах компаний (удаляются как целые слова)
+NOISE_WORDS = ["компания", "корпорация", "предприятие", "лтд", "ltd"]
+
+
+class ReplaceStage:
+    """
+    Цепочка последовательных str.replace, подготовленная один раз.
+
+    Правила применяются по порядку, как прежде, и только если шаблон есть в
+    тексте. Сокращение одно: если замены доказуемо не порождают новых
+    вхождений шаблонов (см. _no_creation), правила, чей шаблон содержит
+    шаблон более раннего правила ("юго-запад" после "юг"), отбрасываются -
+    к их очереди такого текста уже нет. Иначе цепочка остается полной.
+
+    :param rules: список пар (что заменить, на что) в исходном порядке
+    :type rules: list
+    """
+
+    def __init__(self, rules):
+        rules = list(rules)
+        self.rules = self._prune_dead(rules) if self._no_creation(rules) else rules
+
+    @staticmethod
+    def _no_creation(rules):
+        """
+        Замена не может стать частью нового вхождения ни одного шаблона.
+
+        Новое вхождение после замены либо пересекает границу вставки (тогда
+        в нем первый или последний символ замены), либо целиком лежит внутри
+        нее. Поэтому достаточно: замена непуста (удаление склеивает соседей),
+        ее крайние символы не встречаются в шаблонах, и ни один шаблон не
+        входит в нее как подстрока.
+        """
+        patterns = [old for old, _ in rules]
+        pattern_chars = set(''.join(patterns))
+        for _, new in rules:
+            if not new or new[0] in pattern_chars or new[-1] in pattern_chars:
+                return False
+            if any(old in new for old in patterns):
+                return False
+        return True
+
+    @staticmethod
+    def _prune_dead(rules):
+        """Правило мертво, если его шаблон содержит шаблон более раннего правила"""
+        return [
+            (old, new) for i, (old, new) in enumerate(rules)
+            if not any(prev in old for prev, _ in rules[:i])
+        ]
+
+    def __call__(self, text):
+        for old, new in self.rules:
+            if old in text:
+                text = text.replace(old, new)
+        return text
+
+
+class NameNormalizer:
+    """
+    Нормализатор названий контрагентов и городов для clean_name.
+
+    Все таблицы (включая settings.CITY_MAP) готовятся один раз, шумовые
+    слова сведены в одну регулярку, а результат кэшируется в LRU: одни и
+    те же несколько сотен имен и терминалов повторяются на каждом запуске.
+
+    :param city_map: маппинг городов (по умолчанию settings.CITY_MAP)
+    :type city_map: dict
+    :param cache_size: размер LRU-кэша
+    :type cache_size: int
+    """
+
+    def __init__(self, city_map=None, cache_size=st.CLEAN_NAME_CACHE_SIZE):
+        city_map = st.CITY_MAP if city_map is None else city_map
+        self.quotes = str.maketrans('', '', QUOTES)
+        self.parens = re.compile(r'\(.*?\)')
+        self.city_trash = ReplaceStage((trash, "") for trash in CITY_TRASH)
+        self.city_replacements = ReplaceStage(CITY_REPLACEMENTS)
+        self.city_map = ReplaceStage(city_map.items())
+        self.org_replacements = ReplaceStage(ORG_REPLACEMENTS)
+        # Удаление целых слов \b...\b не склеивает соседние слова, поэтому
+        # одна регулярка эквивалентна прежним пяти re.sub подряд
+        self.noise = re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in NOISE_WORDS) + r')\b')
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _normalize(self, text, is_city):
+        # 1. Базовая очистка: убираем лишние символы и кавычки СРАЗУ
+        cleaned = self.parens.sub('', text.translate(self.quotes)).lower()
+
+        if is_city:
+            cleaned = self.city_trash(cleaned)
+            cleaned = self.city_replacements(cleaned)
+            cleaned = self.city_map(cleaned)
+        else:
+            cleaned = self.org_replacements(cleaned)
+            cleaned = self.noise.sub('', cleaned)
+
+        # Финальная сборка: убираем лишние пробелы и в UPPER CASE
+        return " ".join(cleaned.split()).upper()
+
+    def __call__(self, text, is_city=False):
+        if not text or not isinstance(text, str): return "???"
+        return self.normalize(text, bool(is_city))
+
+    def stats(self):
+        info = self.normalize.cache_info()
+        total = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "hit_rate": round(info.hits / total, 4) if total else 0.0,
+        }
@@ -4,6 +4,7 @@ import requests
 import json
 from datetime import datetime
 from settings import CURRENT_STATE_FILE, HASH_FILE, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID
+from status import is_ready
 
 # Используем токены напрямую из настроек
 tg_bot_token = TELEGRAM_TOKEN
@@ -24,14 +25,10 @@ def send_tg_summary(report_json_path=CURRENT_STATE_FILE, force=False):
 
     active_items = data.get("active", [])
 
-    # Ключевые слова-маркеры готовности
-    READY_STATUSES = ["прибыл", "готов", "выдаче", "терминал", "хранение", "складе"]
-
     grouped_by_tk = {}
     ready_count = 0
 
     for item in active_items:
-        status_text = str(item.get('status', '')).lower()
         sender = str(item.get('sender', '')).upper()
         route = str(item.get('route', '')).upper()
         tk = str(item.get('tk', ''))
@@ -45,10 +42,8 @@ def send_tg_summary(report_json_path=CURRENT_STATE_FILE, force=False):
 
         if "БСД" in tk: continue
 
-        if "ГРУЗ НА ТРАНЗИТНОМ СКЛАДЕ".lower() in status_text: continue
-
-        # Проверка готовности
-        if any(word in status_text for word in READY_STATUSES):
+        # Проверка готовности: прибыл / готов к выдаче (транзитный склад - еще в пути)
+        if is_ready(tk, item.get('status')):
             tk_name = item['tk']
             if tk_name not in grouped_by_tk:
                 grouped_by_tk[tk_name] = []
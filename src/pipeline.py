@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import time
+from datetime import datetime
+
+import json_write as jw
+import main_parser as mp
+import settings as st
+from snapshot import SnapshotWriter, dump_json
+
+
+class CarrierPipeline:
+    """
+    Конвейер сбор -> парсинг -> запись в БД по каждой ТК отдельно.
+
+    Блок ТК парсится и пишется в cargo сразу, как только пришел (в порядке
+    завершения), а не после того, как соберутся все ТК. Сырой блок тут же
+    уходит сжатой секцией в снапшот и в памяти не копится. Ошибка или таймаут
+    одной ТК не трогают остальные: ее грузы из прошлого стейта переносятся
+    как есть, без архивации и без "призраков".
+    """
+
+    def __init__(self):
+        self.db, self.memory, self.classifier = mp.init_stages()
+        self.last_active = self.memory.get_last_active()
+        self.snapshot = None
+        # Сырые блоки целиком держим только ради отладочного JSON-дампа
+        self.raw = {} if st.RAW_DEBUG_JSON else None
+        self.active = []
+        self.to_archive = []
+        self.timings = {}
+        self.started = time.time()
+
+    def handle(self, block, data, error):
+        parser, tk = mp.CARRIER_PARSERS[block]
+        arrived = round(time.time() - self.started, 2)
+
+        if error is not None:
+            kept = [item for item in self.last_active if item.tk == tk]
+            self.active.extend(kept)
+            self.timings[block] = {"arrived": arrived, "processed": 0.0, "error": repr(error)}
+            print(f"[Pipeline] {block}: ОШИБКА ({error!r}), оставлено из прошлого стейта: {len(kept)}")
+            return
+
+        s_proc = time.time()
+        try:
+            results = parser(data)
+            active, to_archive = mp.process_results(self.db, self.memory, self.classifier, results, tk)
+        except Exception as e:
+            # Битый блок одной ТК не должен ронять весь конвейер
+            return self.handle(block, data, e)
+
+        self.active.extend(active)
+        self.to_archive.extend(to_archive)
+        processed = round(time.time() - s_proc, 2)
+        self.timings[block] = {"arrived": arrived, "processed": processed, "error": None}
+        print(f"[Pipeline] {block}: пришел на {arrived} сек., записан за {processed} сек. "
+              f"(актив {len(active)}, в архив {len(to_archive)})")
+
+    def save_block(self, block, data):
+        if self.snapshot is not None:
+            self.snapshot.add(block, data)
+        if self.raw is not None:
+            self.raw[block] = data
+
+    def run(self, engine=st.COLLECT_ENGINE):
+        # Подготовка базы (28ч для БСД) - до того, как пойдут блоки
+        try: self.db.archive_stuck_bsd()
+        except Exception as e: print(f"[Pipeline] Ошибка авто-архивации БСД: {e}")
+
+        with SnapshotWriter(st.RAW_SNAPSHOT_FILE) as self.snapshot:
+            self.save_block("Timestamp", datetime.now().strftime("%d-%m-%Y %H:%M:%S"))
+
+            print(f"--- Конвейер: API-ТК [{engine}] ---")
+            for block, data, error in jw.iter_api_data(engine):
+                self.save_block(block, data)
+                self.handle(block, data, error)
+
+            # Magic Trans - браузер, запускаем последним в основном потоке
+            print("--- Конвейер: Magic Trans ---")
+            mt_data, mt_error = jw.fetch_magic()
+            self.save_block("Magic", mt_data)
+            self.handle("Magic", mt_data, mt_error)
+
+        jw.report_raw_saved(self.snapshot.raw_size, mt_data)
+        if self.raw is not None:
+            dump_json(self.raw, st.RAW_DATA_FILE)
+        self.active.sort(key=lambda x: str(x.arrival or "9999"))
+        mp.finalize_run(self.active, self.to_archive, self.db)
+        print(f"[Pipeline] Всего: {round(time.time() - self.started, 2)} сек.")
+        return self.timings
+
+
+def run_pipelined(engine=st.COLLECT_ENGINE):
+    return CarrierPipeline().run(engine)
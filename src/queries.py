@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+# Запросы server.py. Лежат отдельно, чтобы `migrations.py explain` проверял
+# их планы (индексы под них - в migrations.MIGRATIONS).
+
+# Главная: актив по дате прибытия (params - генерируемая колонка)
+REPORT_ACTIVE = """
+    SELECT * FROM cargo
+    WHERE is_archived = 0
+    ORDER BY arrival ASC
+"""
+
+# Главная: последние архивные
+REPORT_ARCHIVE = """
+    SELECT * FROM cargo
+    WHERE is_archived = 1
+    ORDER BY updated_at DESC LIMIT 200
+"""
+
+REPORT_LAST_UPDATE = "SELECT MAX(updated_at) FROM cargo"
+
+# Аналитика ТК: наши грузы за N дней (параметр - модификатор даты, '-30 days')
+TK_COMPARE = """
+    SELECT
+        tk,
+        weight_category as category,
+        total_price,
+        weight,
+        volume,
+        places,
+        ABS(JULIANDAY(COALESCE(archived_at, date('now'))) - JULIANDAY(created_at)) as days_diff
+    FROM cargo
+    WHERE is_own = 1
+      AND updated_at >= date('now', ?)
+
+      -- ВОТ ЭТА СТРОКА ОТСЕКАЕТ АНОМАЛИИ (Грузы тяжелее 5 тонн):
+      AND weight > 0 AND weight < 5000
+
+      AND total_price > 0
+"""
+
+TASKS_UPCOMING = """
+    SELECT * FROM driver_tasks
+    WHERE task_date >= date('now', '-1 day')
+    ORDER BY task_date, task_time
+"""
+
+# Поиск по всей базе (cargo_fts): выражение MATCH (fts_match), лимит, смещение.
+# Веса bm25 по колонкам id, sender, recipient, route, status: номер важнее всего
+SEARCH = """
+    SELECT c.*, bm25(cargo_fts, 10.0, 3.0, 3.0, 2.0, 1.0) AS score
+    FROM cargo_fts JOIN cargo c ON c.rowid = cargo_fts.rowid
+    WHERE cargo_fts MATCH ?
+    ORDER BY score, c.updated_at DESC
+    LIMIT ? OFFSET ?
+"""
+
+SEARCH_COUNT = "SELECT COUNT(*) FROM cargo_fts WHERE cargo_fts MATCH ?"
+
+
+def fts_match(text):
+    """
+    Строка поиска -> выражение MATCH: каждое слово ищется как подстрока
+    (фраза в кавычках), слова через AND. Слова короче 3 символов триграммам
+    не найти - они отбрасываются; пустая строка - искать нечего.
+    """
+    terms = [term for term in str(text or "").split() if len(term) >= 3]
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+# {имя: (sql, параметры для EXPLAIN QUERY PLAN)}
+SERVER_QUERIES = {
+    "report_active": (REPORT_ACTIVE, ()),
+    "report_archive": (REPORT_ARCHIVE, ()),
+    "report_last_update": (REPORT_LAST_UPDATE, ()),
+    "tk_compare": (TK_COMPARE, ("-30 days",)),
+    "tasks_upcoming": (TASKS_UPCOMING, ()),
+    "search": (SEARCH, ('"ФОРПОСТ"', 50, 0)),
+    "search_count": (SEARCH_COUNT, ('"ФОРПОСТ"',)),
+}
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import settings as st
+from snapshot import RawSnapshot
+
+
+# Архив:
+#   RAW_ARCHIVE_DIR/<sha256>.snap  - снапшот сбора (RawSnapshot.digest), один файл на содержимое
+#   RAW_ARCHIVE_DIR/index.jsonl    - журнал запусков: {"digest", "saved_at", "collected", "raw"}
+INDEX_NAME = "index.jsonl"
+
+
+def object_path(digest, root=st.RAW_ARCHIVE_DIR):
+    return os.path.join(root, f"{digest}.snap")
+
+
+def read_index(root=st.RAW_ARCHIVE_DIR):
+    """Записи журнала, от старых к новым; битые строки (оборванная запись) пропускаются"""
+    path = os.path.join(root, INDEX_NAME)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if isinstance(entry, dict) and "digest" in entry:
+                entries.append(entry)
+            else:
+                print(f"[Архив] {INDEX_NAME}:{number}: битая строка пропущена")
+    return entries
+
+
+def _write_index(entries, root):
+    path = os.path.join(root, INDEX_NAME)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(f"{path}.tmp", path)
+
+
+def archive_snapshot(path=st.RAW_SNAPSHOT_FILE, root=st.RAW_ARCHIVE_DIR):
+    """
+    Кладет снапшот сбора в архив. Повтор уже сохраненного содержимого
+    добавляет только строку в журнал, файл не копируется.
+
+    :returns: (хэш, скопирован ли новый файл)
+    :rtype: tuple
+    """
+    snapshot = RawSnapshot(path)
+    digest = snapshot.digest()
+    os.makedirs(root, exist_ok=True)
+
+    target = object_path(digest, root)
+    is_new = not os.path.exists(target)
+    if is_new:
+        shutil.copyfile(path, f"{target}.tmp")
+        os.replace(f"{target}.tmp", target)
+
+    entry = {
+        "digest": digest,
+        "saved_at": datetime.now().isoformat(timespec='seconds'),
+        "collected": snapshot.get("Timestamp"),
+        "raw": snapshot.raw_size,
+    }
+    with open(os.path.join(root, INDEX_NAME), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    prune(root)
+    return digest, is_new
+
+
+def prune(root=st.RAW_ARCHIVE_DIR, keep=st.RAW_ARCHIVE_KEEP, keep_days=st.RAW_ARCHIVE_KEEP_DAYS):
+    """
+    Ретеншн: в журнале остаются keep последних запусков не старше keep_days,
+    снапшоты, на которые журнал больше не ссылается, удаляются.
+
+    :returns: сколько файлов снапшотов удалено
+    :rtype: int
+    """
+    entries = read_index(root)
+    border = (datetime.now() - timedelta(days=keep_days)).isoformat(timespec='seconds')
+    kept = [e for e in entries[-keep:] if e["saved_at"] >= border] if keep > 0 else []
+    if len(kept) != len(entries):
+        _write_index(kept, root)
+
+    alive = {e["digest"] for e in kept}
+    removed = 0
+    for name in os.listdir(root):
+        if name.endswith(".snap") and name[:-len(".snap")] not in alive:
+            os.remove(os.path.join(root, name))
+            removed += 1
+    return removed
+
+
+def resolve(ref, root=st.RAW_ARCHIVE_DIR):
+    """
+    Путь к снапшоту по ссылке: путь к файлу, "latest", номер с конца журнала
+    ("-1" - последний, "-2" - предпоследний) или начало хэша.
+    """
+    if os.path.isfile(ref):
+        return ref
+    entries = read_index(root)
+    if ref == "latest":
+        ref = "-1"
+    if ref.lstrip("-").isdigit() and ref.startswith("-"):
+        if int(ref) < -len(entries):
+            raise ValueError(f"В архиве только {len(entries)} запусков: {ref}")
+        return object_path(entries[int(ref)]["digest"], root)
+
+    matches = {e["digest"] for e in entries if e["digest"].startswith(ref)}
+    if len(matches) != 1:
+        raise ValueError(f"Снапшот '{ref}': {'не найден' if not matches else 'неоднозначный префикс'}")
+    return object_path(matches.pop(), root)
+
+
+@contextmanager
+def scratch_paths(scratch):
+    """
+    Подменяет БД, стейт, историю и отчеты на файлы в папке scratch:
+    replay не трогает рабочие data/ и cargo_system.db.
+    """
+    import database  # noqa: F401 - main_parser берет CargoDB из голого database
+
+    paths = {
+        "DATA_DIR": scratch,
+        "DB_PATH": os.path.join(scratch, 'cargo_system.db'),
+        "LAST_STATE_FILE": os.path.join(scratch, 'last_active_state.json'),
+        "CURRENT_STATE_FILE": os.path.join(scratch, 'current_state.json'),
+        "HISTORY_FILE": os.path.join(scratch, 'history_archive.json'),
+    }
+    # database импортирует пути по имени, и в процессе он (как и settings)
+    # может быть загружен дважды: голым именем и как src.database - подменяем во всех
+    modules = [sys.modules[name] for name in ("settings", "src.settings", "database", "src.database")
+               if name in sys.modules]
+    saved = [(module, name, getattr(module, name)) for module in modules for name in paths if hasattr(module, name)]
+    try:
+        for module, name, _ in saved:
+            setattr(module, name, paths[name])
+        yield paths
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def replay(refs, workers=st.PARSE_WORKERS, scratch=None, root=st.RAW_ARCHIVE_DIR):
+    """
+    Прогоняет снапшоты из архива по очереди через run_main_parser на одной
+    временной БД (первый - холодная вставка, следующие - как обычные
+    запуски поверх нее) и печатает время этапов по каждому.
+
+    :returns: [(ссылка, {этап: сек.})]
+    :rtype: list
+    """
+    import main_parser as mp
+
+    paths = [resolve(ref, root) for ref in refs]
+    keep = scratch is not None
+    scratch = scratch or tempfile.mkdtemp(prefix="replay_")
+    os.makedirs(scratch, exist_ok=True)
+
+    results = []
+    try:
+        with scratch_paths(scratch):
+            for ref, path in zip(refs, paths):
+                print(f"\n=== Replay {ref}: {os.path.basename(path)} ===")
+                s_run = time.perf_counter()
+                timings = mp.run_main_parser(workers, raw_path=path) or {}
+                timings["total"] = round(time.perf_counter() - s_run, 3)
+                results.append((ref, timings))
+    finally:
+        if not keep:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    stages = list(dict.fromkeys(stage for _, timings in results for stage in timings))
+    print(f"\n{'снапшот':<12}" + "".join(f"{stage:>12}" for stage in stages))
+    for ref, timings in results:
+        print(f"{ref[:12]:<12}" + "".join(f"{timings.get(stage, 0):>12.3f}" for stage in stages))
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Архив сырых сборов и replay парсера")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("list", help="журнал архива")
+    sub.add_parser("add", help="положить текущий снапшот в архив").add_argument("path", nargs="?", default=st.RAW_SNAPSHOT_FILE)
+    sub.add_parser("prune", help="применить ретеншн")
+    rp = sub.add_parser("replay", help="прогнать снапшоты через run_main_parser на временной БД")
+    rp.add_argument("refs", nargs="*", default=["latest"], help="latest, -N, префикс хэша или путь")
+    rp.add_argument("--last", type=int, help="последние N запусков журнала, от старых к новым")
+    rp.add_argument("--workers", type=int, default=st.PARSE_WORKERS)
+    rp.add_argument("--scratch", help="папка для временной БД и отчетов (по умолчанию удаляется)")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        digest, is_new = archive_snapshot(args.path)
+        print(f"[Archive] {digest[:12]}: {'новый снапшот' if is_new else 'уже в архиве'}")
+    elif args.command == "prune":
+        print(f"[Archive] Удалено снапшотов: {prune()}")
+    elif args.command == "replay":
+        refs = [str(-i) for i in range(args.last, 0, -1)] if args.last else args.refs
+        try:
+            replay(refs, args.workers, args.scratch)
+        except ValueError as e:
+            print(f"[Replay] {e}")
+    else:
+        for i, entry in enumerate(reversed(read_index()), 1):
+            print(f"  -{i:<4} {entry['digest'][:12]}  {entry['saved_at']}  "
+                  f"сбор {entry['collected']}  {round(entry['raw'] / 1024, 1)} KB")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -16,8 +16,18 @@ load_dotenv(dotenv_path=env_path)
 DATA_DIR = os.path.normpath(os.path.join(BASE_DIR, '..', 'data'))
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# 1. СЫРЫЕ данные от API (замена test_all_tk.json)
+# 1. СЫРЫЕ данные от API: снапшот по блокам ТК (zstd), см. snapshot.py
+RAW_SNAPSHOT_FILE = os.path.join(DATA_DIR, 'raw_api_data.snap')
+RAW_SNAPSHOT_LEVEL = int(os.getenv("RAW_SNAPSHOT_LEVEL", "3"))
+# Человекочитаемый JSON (замена test_all_tk.json) - только для отладки: RAW_DEBUG_JSON=1
 RAW_DATA_FILE = os.path.join(DATA_DIR, 'raw_api_data.json')
+RAW_DEBUG_JSON = os.getenv("RAW_DEBUG_JSON", "0") == "1"
+# Архив снапшотов для replay (см. raw_archive.py): файлы по хэшу содержимого,
+# хранится RAW_ARCHIVE_KEEP последних сборов не старше RAW_ARCHIVE_KEEP_DAYS
+RAW_ARCHIVE = os.getenv("RAW_ARCHIVE", "1") == "1"
+RAW_ARCHIVE_DIR = os.getenv("RAW_ARCHIVE_DIR", os.path.join(DATA_DIR, 'raw_archive'))
+RAW_ARCHIVE_KEEP = int(os.getenv("RAW_ARCHIVE_KEEP", "100"))
+RAW_ARCHIVE_KEEP_DAYS = float(os.getenv("RAW_ARCHIVE_KEEP_DAYS", "14"))
 
 # 2. ТЕКУЩЕЕ СОСТОЯНИЕ для фронтенда (замена test_all_tk_processed.json)
 CURRENT_STATE_FILE = os.path.join(DATA_DIR, 'current_state.json')
@@ -27,9 +37,20 @@ LAST_STATE_FILE = os.path.join(DATA_DIR, 'last_active_state.json')
 
 # 4. ПУТЬ К БУДУЩЕЙ БАЗЕ ДАННЫХ (пока не используется)
 DB_PATH = os.path.join(DATA_DIR, 'cargo_system.db')
+# Соединения SQLite (db_pool): WAL - читатели (Flask) не ждут писателя (парсер)
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")              # в WAL без риска для целостности
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))      # кэш страниц на соединение
+DB_MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", "128"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))   # дольше - уже ошибка, а не ожидание
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))                  # свободных соединений на базу
 
 # 5. СЛУЖЕБНЫЕ ФАЙЛЫ
+# Старый JSON-архив: переносится в таблицу history при первом запуске
 HISTORY_FILE = os.path.join(DATA_DIR, 'history_archive.json')
+# Сколько последних грузов архива попадает в report_*.json (0 - весь архив, как раньше).
+# Вкладка "Архив" показывает только то, что есть в отчете
+HISTORY_REPORT_LIMIT = int(os.getenv("HISTORY_REPORT_LIMIT", "0"))
 HASH_FILE = os.path.join(DATA_DIR, 'last_report_hash.txt')
 LOG_FILE = os.path.join(DATA_DIR, 'process.log')
 
@@ -37,6 +58,72 @@ LOG_FILE = os.path.join(DATA_DIR, 'process.log')
 TELEGRAM_CHAT_ID = os.getenv("TG_CHAT_ID", "")
 TELEGRAM_TOKEN = os.getenv("TG_BOT_TOKEN")
 
+# --- СБОР ДАННЫХ ИЗ API ТК ---
+# "async" - единый event loop (new_api_engine), "threads" - старый ThreadPoolExecutor
+COLLECT_ENGINE = os.getenv("COLLECT_ENGINE", "async")
+# HTTP/2 включается только там, где ТК поддерживает его через ALPN
+ASYNC_HTTP2 = os.getenv("ASYNC_HTTP2", "1") == "1"
+# Сколько запросов одновременно в полете (общий лимит на все ТК)
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "20"))
+# Дедлайн на одну ТК (сек.), можно переопределить для каждой: CARRIER_TIMEOUT_BAIKAL=90
+CARRIER_TIMEOUT = int(os.getenv("CARRIER_TIMEOUT", "45"))
+CARRIER_TIMEOUTS = {
+    name: int(os.getenv(f"CARRIER_TIMEOUT_{name.upper()}", CARRIER_TIMEOUT))
+    for name in ("Dellin", "Pecom", "Baikal", "BSD", "Magic")
+}
+# Конвейер: каждая ТК парсится и пишется в БД сразу по приходу (main.py --pipelined)
+PIPELINED = os.getenv("PIPELINED", "0") == "1"
+
+# --- ПАРСИНГ БЛОКОВ ТК В ПРОЦЕССАХ (run_main_parser) ---
+# 0/1 - все ТК в текущем процессе; N - пул из N процессов (по блоку ТК на процесс)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))
+# Меньший сбор (в байтах несжатого JSON) парсится в текущем процессе: старт пула дороже выигрыша
+PARSE_PROCESS_MIN_BYTES = int(os.getenv("PARSE_PROCESS_MIN_BYTES", str(5 * 1024 * 1024)))
+
+# --- HTTP-ПУЛЫ СИНХРОННЫХ КЛИЕНТОВ (api_classes) ---
+# Размер keep-alive пула на ТК (для Байкала = числу потоков детализации)
+HTTP_POOL_SIZES = {
+    "Baikal": int(os.getenv("BK_POOL_SIZE", "10")),
+    "Pecom": int(os.getenv("PC_POOL_SIZE", "4")),
+    "Dellin": int(os.getenv("DL_POOL_SIZE", "4")),
+    "Viteka": int(os.getenv("VT_POOL_SIZE", "4")),
+}
+# Таймаут по умолчанию (connect, read), если метод не задал свой
+HTTP_TIMEOUT = (10, 30)
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+
+# --- ПЭК: cargos/status КУСКАМИ ---
+PC_CHUNK_SIZE = int(os.getenv("PC_CHUNK_SIZE", "50"))        # номеров в одном запросе
+PC_CHUNK_WORKERS = int(os.getenv("PC_CHUNK_WORKERS", "4"))   # кусков одновременно
+PC_CHUNK_RETRIES = int(os.getenv("PC_CHUNK_RETRIES", "3"))   # попыток на кусок
+
+# --- БСД (ВИТЕКА): ПАГИНАЦИЯ КАБИНЕТА ---
+VT_MAX_PAGES = int(os.getenv("VT_MAX_PAGES", "20"))      # предохранитель
+VT_CONCURRENCY = int(os.getenv("VT_CONCURRENCY", "3"))   # страниц одновременно
+VT_RATE = float(os.getenv("VT_RATE", "2"))               # запросов в секунду
+
+# --- КЭШ ДЕТАЛИЗАЦИИ БАЙКАЛА ---
+# order/detail перезапрашивается только для новых/изменившихся заказов;
+# max-age = 0 отключает кэш (полный рефреш на каждом запуске)
+BAIKAL_CACHE_FILE = os.getenv("BAIKAL_CACHE_FILE", os.path.join(DATA_DIR, 'baikal_detail_cache.json'))
+BAIKAL_CACHE_MAX_AGE_HOURS = float(os.getenv("BAIKAL_CACHE_MAX_AGE_HOURS", "24"))
+
+# --- СЕССИЯ ДЕЛОВЫХ ЛИНИЙ ---
+# sessionID переживает перезапуск; повторный вход - только по ошибке авторизации
+DL_SESSION_FILE = os.path.join(DATA_DIR, 'dellin_session.json')
+DL_SESSION_TTL_HOURS = float(os.getenv("DL_SESSION_TTL_HOURS", "12"))
+
+# --- MAGIC TRANS (Playwright) ---
+# Cookies/localStorage авторизованного браузера: пока они живы, вход пропускается
+MAGIC_STATE_FILE = os.path.join(DATA_DIR, 'magic_storage_state.json')
+# Держать один Chromium между запусками (только для долгоживущего процесса)
+MAGIC_KEEP_WARM = os.getenv("MAGIC_KEEP_WARM", "0") == "1"
+
+# --- НОРМАЛИЗАЦИЯ ИМЕН (clean_name) ---
+# Сколько разных (текст, город?) держать в LRU-кэше нормализатора
+CLEAN_NAME_CACHE_SIZE = int(os.getenv("CLEAN_NAME_CACHE_SIZE", "8192"))
+
 # --- МАППИНГ ГОРОДОВ ---
 CITY_MAP = {
     "астрахань": "АСТРА",
@@ -66,7 +153,7 @@ CITY_MAP = {
 
 def main():
     print(f"[Settings] DATA_DIR: {DATA_DIR}")
-    print(f"[Settings] RAW_DATA_FILE: {RAW_DATA_FILE}")
+    print(f"[Settings] RAW_SNAPSHOT_FILE: {RAW_SNAPSHOT_FILE}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import os
+import sys
+import json
+import struct
+import hashlib
+
+import settings as st
+
+
+# Формат файла:
+#   MAGIC | секция | секция | ...
+#   секция = длина заголовка (>I) | заголовок JSON {"name", "size", "raw"} | zstd(JSON блока)
+MAGIC = b"LGSNAP1\n"
+_HEADER_LEN = struct.Struct(">I")
+
+
+def _zstd():
+    """(compress, decompress): stdlib compression.zstd (Python 3.14+) или пакет zstandard"""
+    try:
+        from compression import zstd
+        return (lambda data, level: zstd.compress(data, level=level)), zstd.decompress
+    except ImportError:
+        import zstandard
+        return (
+            lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+            lambda data: zstandard.ZstdDecompressor().decompress(data),
+        )
+
+
+def _encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class SnapshotWriter:
+    """
+    Пишет снапшот сбора по блокам ТК: каждый блок сжимается и уходит на диск
+    сразу в add(), целиком в памяти ничего не держится. Файл появляется
+    атомарно при close(); при ошибке внутри with старый снапшот не трогается.
+
+    :param path: путь к снапшоту
+    :type path: str
+    :param level: уровень сжатия zstd
+    :type level: int
+    """
+
+    def __init__(self, path=st.RAW_SNAPSHOT_FILE, level=st.RAW_SNAPSHOT_LEVEL):
+        self.path = path
+        self.level = level
+        self.tmp_path = f"{path}.tmp"
+        self.compress, _ = _zstd()
+        self.names = []
+        self.raw_size = 0
+        self.f = open(self.tmp_path, 'wb')
+        self.f.write(MAGIC)
+
+    def add(self, name, data):
+        raw = _encode(data)
+        payload = self.compress(raw, self.level)
+        header = json.dumps({"name": name, "size": len(payload), "raw": len(raw)}).encode('utf-8')
+        self.f.write(_HEADER_LEN.pack(len(header)))
+        self.f.write(header)
+        self.f.write(payload)
+        self.names.append(name)
+        self.raw_size += len(raw)
+
+    def close(self):
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.f.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class RawSnapshot:
+    """
+    Ленивое чтение снапшота: при открытии читаются только заголовки секций,
+    блок ТК распаковывается по обращению snapshot[name] и не кэшируется.
+    Ведет себя как read-only словарь блоков (in, [], get, keys, items).
+
+    :param path: путь к снапшоту
+    :type path: str
+    """
+
+    def __init__(self, path=st.RAW_SNAPSHOT_FILE):
+        self.path = path
+        self.index = self._read_index()
+        _, self.decompress = _zstd()
+
+    def _read_index(self):
+        index = {}
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path}: не снапшот сбора (неверная сигнатура)")
+            while chunk := f.read(_HEADER_LEN.size):
+                (header_len,) = _HEADER_LEN.unpack(chunk)
+                header = json.loads(f.read(header_len))
+                index[header["name"]] = (f.tell(), header["size"], header["raw"])
+                f.seek(header["size"], os.SEEK_CUR)
+        return index
+
+    @property
+    def raw_size(self):
+        """Суммарный размер блоков в несжатом JSON (байт)"""
+        return sum(raw for _, _, raw in self.index.values())
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    def __getitem__(self, name):
+        offset, size, _ = self.index[name]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(self.decompress(f.read(size)))
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def items(self):
+        """Блоки по одному, в порядке записи"""
+        for name in self.index:
+            yield name, self[name]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def digest(self, skip=("Timestamp",)):
+        """
+        sha256 содержимого блоков (распакованный JSON, в порядке записи).
+        Метка времени сбора не учитывается: одинаковые сборы дают один хэш.
+        """
+        h = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for name, (offset, size, _) in self.index.items():
+                if name in skip:
+                    continue
+                f.seek(offset)
+                h.update(name.encode('utf-8') + b"\0")
+                h.update(self.decompress(f.read(size)))
+        return h.hexdigest()
+
+
+def write_snapshot(blocks, path=st.RAW_SNAPSHOT_FILE):
+    with SnapshotWriter(path) as writer:
+        for name, data in blocks.items():
+            writer.add(name, data)
+    return writer
+
+
+def dump_json(blocks, json_path=st.RAW_DATA_FILE):
+    """Человекочитаемый дамп (прежний формат raw_api_data.json) - только для отладки"""
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(blocks.items()), f, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def convert_json(json_path=st.RAW_DATA_FILE, path=st.RAW_SNAPSHOT_FILE):
+    """Конвертирует старый raw_api_data.json в снапшот"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        blocks = json.load(f)
+    return write_snapshot(blocks, path)
+
+
+def open_raw(path=st.RAW_SNAPSHOT_FILE, json_path=st.RAW_DATA_FILE):
+    """
+    Сырые данные последнего сбора: снапшот, а если его еще нет - старый
+    raw_api_data.json.
+
+    :returns: (блоки ТК, размер в несжатом JSON) или (None, 0), если данных нет
+    :rtype: tuple
+    """
+    if os.path.exists(path):
+        snapshot = RawSnapshot(path)
+        return snapshot, snapshot.raw_size
+    if os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f), os.path.getsize(json_path)
+    return None, 0
+
+
+def main(argv):
+    """
+    python snapshot.py info [снапшот]
+    python snapshot.py convert [raw_api_data.json] [снапшот]
+    python snapshot.py dump [снапшот] [raw_api_data.json]
+    """
+    command, args = (argv[0], argv[1:]) if argv else ("info", [])
+    if command == "convert":
+        writer = convert_json(*args)
+        print(f"[Snapshot] {writer.path}: {len(writer.names)} блоков, "
+              f"{round(writer.raw_size / 1024, 1)} KB -> {round(os.path.getsize(writer.path) / 1024, 1)} KB")
+    elif command == "dump":
+        snapshot = RawSnapshot(*args[:1])
+        dump_json(snapshot, *args[1:])
+        print(f"[Snapshot] JSON-дамп: {args[1] if len(args) > 1 else st.RAW_DATA_FILE}")
+    elif command == "info":
+        snapshot = RawSnapshot(*args[:1])
+        print(f"[Snapshot] {snapshot.path}: {round(os.path.getsize(snapshot.path) / 1024, 1)} KB")
+        for name, (_, size, raw) in snapshot.index.items():
+            print(f"  {name:<10} {round(raw / 1024, 1):>10} KB -> {round(size / 1024, 1)} KB")
+    else:
+        print(main.__doc__)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
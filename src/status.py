@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024-2026 RobertKano
+# Project: LogisticAPIs (https://github.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org>.
+
+
+import re
+from enum import IntEnum
+from functools import lru_cache
+
+
+class CargoState(IntEnum):
+    """Состояние груза по тексту статуса ТК; в БД - колонка cargo.state"""
+    IN_TRANSIT = 0   # в пути / принят / на транзитном складе
+    ARRIVED = 1      # прибыл в город, на терминале, на хранении
+    READY = 2        # готов к выдаче
+    DELIVERED = 3    # выдан, доставлен, получен, завершен
+    ARCHIVED = 4     # архив (в т.ч. автоархив)
+
+
+# Правила проверяются сверху вниз, побеждает первое совпавшее (по подстроке
+# в нижнем регистре). Порядок важен: "выдача" - уже выдан, а "к выдаче" - готов;
+# транзитный склад - еще в пути, хотя в нем есть "складе".
+STATUS_RULES = [
+    (CargoState.ARCHIVED, ["архив"]),
+    (CargoState.DELIVERED, ["выдан", "доставлен", "завершен", "выдача", "получен"]),
+    (CargoState.IN_TRANSIT, ["груз на транзитном складе"]),
+    (CargoState.READY, ["готов", "выдаче"]),
+    (CargoState.ARRIVED, ["прибыл", "терминал", "хранение", "складе"]),
+]
+
+# Дополнительные правила ТК: {"ПЭК": [(CargoState.READY, ["..."])]}. Проверяются
+# после финальных (архив, выдан - их ТК не переопределяет) и раньше остальных общих
+CARRIER_STATUS_RULES = {
+    # БСД: "прибыл" и "доставка" - груз в городе назначения (по этим же словам
+    # ищутся зависшие БСД), даже если в статусе есть "готов"
+    "БСД": [(CargoState.ARRIVED, ["прибыл", "доставка"])],
+}
+
+# Пропавший из API груз сразу уходит в автоархив только по этим словам
+# (MemoryManager.restore_ghosts). "ДОСТАВЛЕН" у Мэджика - промежуточный статус
+# ("ГРУЗ ДОСТАВЛЕН НА СКЛАД ПОЛУЧАТЕЛЯ"), такой груз остается на главной
+GHOST_FINAL_WORDS = ["ВЫДАН", "АРХИВ", "ПОЛУЧЕН", "ЗАВЕРШЕН"]
+
+
+class StatusEngine:
+    """
+    Сопоставление текста статуса с CargoState: на каждое состояние одна
+    скомпилированная регулярка, результат кэшируется (статусов у ТК десятки,
+    а проверок - тысячи на запуск).
+
+    :param rules: [(CargoState, [подстроки])] в порядке приоритета
+    :type rules: list
+    :param cache_size: размер LRU-кэша
+    :type cache_size: int
+    """
+
+    def __init__(self, rules, cache_size=1024):
+        self.rules = [
+            (state, re.compile("|".join(re.escape(word) for word in words)))
+            for state, words in rules
+        ]
+        self.state = lru_cache(maxsize=cache_size)(self._state)
+
+    def _state(self, status):
+        status = status.lower()
+        for state, pattern in self.rules:
+            if pattern.search(status):
+                return state
+        return CargoState.IN_TRANSIT
+
+    def __call__(self, status):
+        return self.state(str(status or ""))
+
+
+_engines = {}
+
+
+def engine_for(tk):
+    """Движок статусов ТК (общие правила + CARRIER_STATUS_RULES), собирается один раз"""
+    engine = _engines.get(tk)
+    if engine is None:
+        final = [rule for rule in STATUS_RULES if rule[0] >= CargoState.DELIVERED]
+        rest = [rule for rule in STATUS_RULES if rule[0] < CargoState.DELIVERED]
+        engine = _engines[tk] = StatusEngine(final + CARRIER_STATUS_RULES.get(tk, []) + rest)
+    return engine
+
+
+def cargo_state(tk, status):
+    return engine_for(tk)(status)
+
+
+def is_finished(tk, status):
+    """Груз выдан или в архиве - на главной ему не место"""
+    return cargo_state(tk, status) >= CargoState.DELIVERED
+
+
+def is_ready(tk, status):
+    """Груз можно забирать (прибыл / готов к выдаче)"""
+    return cargo_state(tk, status) in (CargoState.ARRIVED, CargoState.READY)
+
+
+def is_ghost_final(status):
+    """Статус пропавшего из API груза окончательный (см. GHOST_FINAL_WORDS)"""
+    status = str(status).upper()
+    return any(word in status for word in GHOST_FINAL_WORDS)
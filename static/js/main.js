@@ -207,8 +207,10 @@ function renderTable() {
         }
 
         // --- ДАТЫ ---
-        const rawDate = r.arrival ? r.arrival.split('T')[0] : (r.archived_at ? (r.archived_at.includes('.') ? r.archived_at.split('.').reverse().join('-') : r.archived_at) : '0000-00-00');
-        const displayDate = r.arrival ? r.arrival.split('T')[0] : (r.archived_at || '—');
+        // archived_at: ISO из БД (2026-03-12T10:15:00) или старое 12.03.2026; на экране - дд.мм.гггг
+        const archivedDate = r.archived_at ? (r.archived_at.includes('.') ? r.archived_at.split('.').reverse().join('-') : r.archived_at.split('T')[0]) : '';
+        const rawDate = r.arrival ? r.arrival.split('T')[0] : (archivedDate || '0000-00-00');
+        const displayDate = r.arrival ? r.arrival.split('T')[0] : (archivedDate ? archivedDate.split('-').reverse().join('.') : '—');
         tr.setAttribute('data-sender', (r.sender || "").toLowerCase());
         tr.setAttribute('data-receiver', (r.recipient || "").toLowerCase());
 
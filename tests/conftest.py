@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# Модули src/ импортируются по голому имени (как при запуске из src/)
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
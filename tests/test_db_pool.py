@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""db_pool: транзакции вложенных соединений и возврат в пул"""
+
+import gc
+import threading
+
+import pytest
+
+from db_pool import ConnectionManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = ConnectionManager(pool_size=2)
+    path = str(tmp_path / "pool.db")
+    conn = manager.get(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.close()
+    yield manager, path
+    manager.close_all()
+
+
+def count(manager, path):
+    conn = manager.get(path, readonly=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_nested_with_does_not_commit_outer(db):
+    manager, path = db
+    outer = manager.get(path)
+    with outer:
+        outer.execute("INSERT INTO t VALUES (1)")
+        inner = manager.get(path)
+        with inner:
+            # своя транзакция: незавершенной записи внешнего блока не видно
+            assert inner.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+        inner.close()
+        assert outer.in_transaction
+        assert count(manager, path) == 0
+    assert count(manager, path) == 1
+    outer.close()
+
+
+def test_inner_exception_keeps_outer_work(db):
+    manager, path = db
+    outer = manager.get(path)
+    with outer:
+        outer.execute("INSERT INTO t VALUES (1)")
+        with pytest.raises(ZeroDivisionError):
+            inner = manager.get(path)
+            with inner:
+                inner.execute("SELECT COUNT(*) FROM t")
+                1 / 0
+        inner.close()
+        outer.execute("INSERT INTO t VALUES (2)")
+    assert count(manager, path) == 2
+    outer.close()
+
+
+def test_outer_exception_rolls_back_outer_only(db):
+    manager, path = db
+    with pytest.raises(ZeroDivisionError):
+        with manager.get(path) as outer:
+            outer.execute("INSERT INTO t VALUES (1)")
+            1 / 0
+    assert count(manager, path) == 0
+
+
+def test_close_returns_connection_and_rolls_back(db):
+    manager, path = db
+    conn = manager.get(path)
+    raw = conn._conn
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+    again = manager.get(path)
+    assert again._conn is raw
+    assert not again.in_transaction
+    again.close()
+    assert count(manager, path) == 0
+    with pytest.raises(Exception, match="closed"):
+        conn.execute("SELECT 1")
+
+
+def test_unclosed_handle_goes_back_to_pool(db):
+    manager, path = db
+    key = next(iter(manager._idle))
+    before = len(manager._idle[key])
+
+    def worker():
+        # как обработчик Flask, забывший close()
+        with manager.get(path) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    gc.collect()
+    assert len(manager._idle[key]) == before
+    assert count(manager, path) == 1
+
+
+def test_row_factory_does_not_leak(db):
+    manager, path = db
+    conn = manager.get(path)
+    conn.row_factory = lambda cursor, row: {"x": row[0]}
+    conn.close()
+    again = manager.get(path)
+    assert again.row_factory is None
+    again.close()
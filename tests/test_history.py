@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Постоянный архив: таблица history"""
+
+import database
+from cargo import Cargo
+
+
+def make_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "cargo_system.db"))
+    monkeypatch.setattr(database, "HISTORY_FILE", str(tmp_path / "history_archive.json"))
+    return database.CargoDB()
+
+
+def test_whole_archive_by_default(tmp_path, monkeypatch):
+    db = make_db(tmp_path, monkeypatch)
+    assert db.append_history([Cargo(id=f"ID-{i}", tk="ПЭК") for i in range(5)]) == 5
+    assert db.append_history([Cargo(id="ID-0", tk="ПЭК")]) == 0
+    assert len(db.latest_history()) == 5
+    assert [item["id"] for item in db.latest_history(2)] == ["ID-4", "ID-3"]
+
+
+def test_count_is_rows_not_last_seq(tmp_path, monkeypatch):
+    db = make_db(tmp_path, monkeypatch)
+    db.append_history([Cargo(id=f"ID-{i}", tk="ПЭК") for i in range(3)])
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM history WHERE id = 'ID-1'")
+        conn.commit()
+    assert db.history_count() == 2
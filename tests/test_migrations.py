@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Миграции схемы и планы запросов server.py"""
+
+import re
+
+import pytest
+
+import database
+import migrations
+from queries import SERVER_QUERIES
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "cargo_system.db"))
+    db = database.CargoDB(migrate=False)
+    with db.get_connection() as conn:
+        assert migrations.upgrade(conn) == [version for version, _, _ in migrations.MIGRATIONS]
+        assert migrations.upgrade(conn) == []
+        yield conn
+    conn.close()
+
+
+def test_server_queries_have_no_full_scans(conn):
+    plans = migrations.explain(conn)
+    assert set(plans) == set(SERVER_QUERIES)
+    assert migrations.full_scans(plans) == {}
+
+
+@pytest.mark.parametrize("name", ["search", "search_count"])
+def test_search_uses_fts_index(conn, name):
+    plan = migrations.explain(conn)[name]
+    assert any(re.match(r"SCAN cargo_fts VIRTUAL TABLE INDEX \d+:M", line) for line in plan), plan
+
+
+def test_full_scans_flags_table_scan(conn):
+    plans = migrations.explain(conn, {"legacy": ("SELECT * FROM cargo WHERE sender LIKE ?", ("%ФОРПОСТ%",))})
+    assert migrations.full_scans(plans) == {"legacy": ["SCAN cargo"]}
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""NameNormalizer против прежней цепочки replace/re.sub из main_parser.clean_name"""
+
+import random
+import re
+
+import pytest
+
+import settings as st
+from normalizer import CITY_REPLACEMENTS, CITY_TRASH, NOISE_WORDS, ORG_REPLACEMENTS, NameNormalizer, ReplaceStage
+
+
+def legacy_clean_name(text, is_city=False):
+    """Прежняя реализация main_parser.clean_name (до normalizer.py)"""
+    if not text or not isinstance(text, str): return "???"
+
+    cleaned = text.replace('"', '').replace('«', '').replace('»', '').replace("'", "")
+    cleaned = re.sub(r'\(.*?\)', '', cleaned).lower()
+
+    if is_city:
+        city_trash = ["г. ", "город ", "пгт. ", "поселок ", "область", "обл.", " край", " р-н", " мо", " г "]
+        for trash in city_trash:
+            cleaned = cleaned.replace(trash, "")
+        city_replacements = {
+            "восток": "ВСТ", "запад": "ЗПД", "север": "СЕВ", "юг": "ЮГ",
+            "терминал": "ТЕРМ", "склад": "СКЛ", "центральный": "ЦЕНТР",
+            "юго-запад": "Ю-З", "северо-восток": "С-В"
+        }
+        for long, short in city_replacements.items():
+            cleaned = cleaned.replace(long, short)
+        for full, short in st.CITY_MAP.items():
+            if full in cleaned:
+                cleaned = cleaned.replace(full, short)
+    else:
+        org_replacements = {
+            "общество с ограниченной ответственностью": "ООО",
+            "индивидуальный предприниматель": "ИП",
+            "акционерное общество": "АО",
+            "публичное акционерное общество": "ПАО",
+            "торговый дом": "ТД",
+            "группа компаний": "ГК",
+            "производственное объединение": "ПО"
+        }
+        for long, short in org_replacements.items():
+            cleaned = cleaned.replace(long, short)
+        noise_words = ["компания", "корпорация", "предприятие", "лтд", "ltd"]
+        for word in noise_words:
+            cleaned = re.sub(rf'\b{word}\b', '', cleaned)
+
+    return " ".join(cleaned.split()).strip().upper()
+
+
+NAMES = [
+    ("Юго-Запад", True), ("Северо-Восток терминал", True), ("Владивосток", True),
+    ("гг. ород Самара", True), ("обл.асть", True), ("Московская обл.", True),
+    ("Железнодорожный мкр (Балашиха)", True), ("Нижний Новгород, склад Центральный", True),
+    ("москвастрахань", True), ("ПГТ. Поселок Юг", True), ("г. Санкт-Петербург", True),
+    ("Ростов-на-Дону, терминал Западный", True), ("", True), (None, True),
+    ("Публичное акционерное общество «Ростов»", False),
+    ("Акционерное обществообщество с ограниченной ответственностью", False),
+    ("ООО Компания-Лтд (ltd)", False), ("Предприятие'Корпорация'", False), ("компаниялтд", False),
+    ("ТД Торговый дом Группа компаний", False), ("  ИП   Сидоров  ", False), (123, False),
+    ('Общество с ограниченной ответственностью "ЮЖНЫЙ ФОРПОСТ"', False),
+    ("Индивидуальный предприниматель Петрова (склад 2)", False),
+]
+
+
+def random_corpus(count, seed=1):
+    """Склейки шаблонов, их замен и разделителей: перекрытия и стыки правил"""
+    rnd = random.Random(seed)
+    city_parts = CITY_TRASH + [old for old, _ in CITY_REPLACEMENTS] + list(st.CITY_MAP) \
+        + [new.lower() for _, new in CITY_REPLACEMENTS] + ["-", " ", ".", "о", "г", "(x)"]
+    org_parts = [old for old, _ in ORG_REPLACEMENTS] + NOISE_WORDS \
+        + [new.lower() for _, new in ORG_REPLACEMENTS] + ["-", " ", "«", "»", "'", "ооо"]
+    for _ in range(count):
+        yield "".join(rnd.choice(city_parts) for _ in range(rnd.randint(1, 6))), True
+        yield "".join(rnd.choice(org_parts) for _ in range(rnd.randint(1, 6))), False
+
+
+@pytest.mark.parametrize(("text", "is_city"), NAMES)
+def test_names_match_legacy(text, is_city):
+    assert NameNormalizer(cache_size=0)(text, is_city) == legacy_clean_name(text, is_city)
+
+
+def test_random_corpus_matches_legacy():
+    normalizer = NameNormalizer(cache_size=0)
+    for text, is_city in random_corpus(5000):
+        assert normalizer(text, is_city) == legacy_clean_name(text, is_city), text
+
+
+def test_pruning_only_when_replacements_cannot_create_patterns():
+    # шаблон внутри замены: новое вхождение возможно - цепочка остается полной
+    rules = [("ab", "XabX"), ("abc", "Y")]
+    assert ReplaceStage(rules).rules == rules
+    assert ReplaceStage(rules)("abc") == "abc".replace("ab", "XabX").replace("abc", "Y")
+    # удаление склеивает соседей: тоже без сокращений
+    rules = [(" г ", ""), ("ара", "Z")]
+    assert ReplaceStage(rules).rules == rules
+    # безопасные замены: мертвое "юго-запад" после "юг" отброшено
+    stage = ReplaceStage(CITY_REPLACEMENTS)
+    assert ("юго-запад", "Ю-З") not in stage.rules
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Журнал архива снапшотов и подмена путей для replay"""
+
+import importlib
+import json
+import os
+import sys
+
+import raw_archive
+
+
+def test_read_index_skips_broken_lines(tmp_path, capsys):
+    good = {"digest": "ab" * 32, "saved_at": "2026-03-12T10:15:00", "collected": "12-03-2026 10:15:00", "raw": 10}
+    (tmp_path / raw_archive.INDEX_NAME).write_text(
+        json.dumps(good) + "\n\n" + '{"digest": "cd' + "\n" + "[1, 2]\n" + json.dumps(good),
+        encoding="utf-8",
+    )
+    assert raw_archive.read_index(str(tmp_path)) == [good, good]
+    assert "битая строка" in capsys.readouterr().out
+
+
+def test_scratch_paths_patch_every_loaded_copy(tmp_path, monkeypatch):
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    monkeypatch.syspath_prepend(root)
+    bare = importlib.import_module("database")
+    packaged = importlib.import_module("src.database")
+    assert bare is not packaged
+    before = (bare.DB_PATH, packaged.DB_PATH, sys.modules["src.settings"].DB_PATH)
+
+    with raw_archive.scratch_paths(str(tmp_path)) as paths:
+        assert bare.DB_PATH == packaged.DB_PATH == paths["DB_PATH"]
+        assert sys.modules["src.settings"].DB_PATH == paths["DB_PATH"]
+        assert raw_archive.st.DB_PATH == paths["DB_PATH"]
+
+    assert (bare.DB_PATH, packaged.DB_PATH, sys.modules["src.settings"].DB_PATH) == before
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Классификация статусов: status.py против прежних списков слов на реальных статусах ТК"""
+
+import pytest
+
+import database
+from status import CargoState, cargo_state, is_finished, is_ghost_final, is_ready
+
+# Прежние списки (до status.py)
+LEGACY_EXCLUDE = ["выдан", "доставлен", "завершен", "архив", "выдача", "получен"]  # CargoClassifier
+LEGACY_GHOST_FINAL = ["ВЫДАН", "АРХИВ", "ПОЛУЧЕН", "ЗАВЕРШЕН"]  # MemoryManager
+LEGACY_READY = ["прибыл", "готов", "выдаче", "терминал", "хранение", "складе"]  # notifier
+
+
+def legacy_finished(status):
+    return any(k in str(status).lower() for k in LEGACY_EXCLUDE)
+
+
+def legacy_ghost_final(status):
+    return any(word in str(status).upper() for word in LEGACY_GHOST_FINAL)
+
+
+def legacy_ready(status):
+    text = str(status).lower()
+    if "груз на транзитном складе" in text:
+        return False
+    return any(word in text for word in LEGACY_READY)
+
+
+def legacy_stuck(status):
+    # SQLite LIKE '%ПРИБЫЛ%' OR LIKE '%ДОСТАВКА%': для кириллицы с учетом регистра
+    return "ПРИБЫЛ" in status or "ДОСТАВКА" in status
+
+
+# Статусы в том виде, в каком их пишут парсеры (и автоархив) в БД и отчет
+STATUSES = [
+    # БСД: parse_viteka сводит кабинет к трем статусам, остальное - автоархив
+    ("БСД", "ВЫДАН"),
+    ("БСД", "ПРИБЫЛ В ТК"),
+    ("БСД", "В ПУТИ"),
+    ("БСД", "Выдан (Авто)"),
+    ("БСД", "ВЫДАН (АВТОАРХИВ БСД)"),
+    ("БСД", "ДОСТАВКА ДО ПВЗ"),
+    ("БСД", "ПРИБЫЛ, ГОТОВ К ВЫДАЧЕ"),
+    # Мэджик: parse_magic + сырые статусы выгрузки в верхнем регистре
+    ("МЭДЖИК", "ДОСТАВКА ДО СКЛАДА"),
+    ("МЭДЖИК", "ПРИБЫЛ В ГОРОД НАЗНАЧЕНИЯ"),
+    ("МЭДЖИК", "ДОСТАВЛЕН"),
+    ("МЭДЖИК", "ГРУЗ ДОСТАВЛЕН НА СКЛАД ПОЛУЧАТЕЛЯ"),
+    ("МЭДЖИК", "В ПУТИ"),
+    ("МЭДЖИК", "ПРИНЯТ"),
+    ("МЭДЖИК", "ВЫДАН"),
+    ("МЭДЖИК", "ВЫДАН (АВТОАРХИВ)"),
+    ("МЭДЖИК", "! ДОСТАВЛЕН (НЕ В API)"),
+    # API-ТК
+    ("ПЭК", "Прибыл на терминал"),
+    ("ПЭК", "Готов к выдаче"),
+    ("ПЭК", "Выдача со склада"),
+    ("ПЭК", "Груз на транзитном складе"),
+    ("ДЛ", "Груз на складе"),
+    ("ДЛ", "Хранение"),
+    ("ДЛ", "Получен"),
+    ("ДЛ", "Перевозка завершена"),
+    ("Байкал", "В пути"),
+    ("Байкал", "Принят к перевозке"),
+    ("Байкал", "Прибыл в город назначения"),
+    ("Байкал", "Архив"),
+]
+
+
+@pytest.mark.parametrize(("tk", "status"), STATUSES)
+def test_classifier_matches_legacy(tk, status):
+    assert is_finished(tk, status) == legacy_finished(status)
+
+
+@pytest.mark.parametrize(("tk", "status"), STATUSES)
+def test_ghost_final_matches_legacy(tk, status):
+    assert is_ghost_final(status) == legacy_ghost_final(status)
+
+
+@pytest.mark.parametrize(("tk", "status"), [(tk, s) for tk, s in STATUSES if tk != "БСД"])
+def test_ready_matches_legacy(tk, status):
+    # notifier пропускает БСД, а на главной (active) только незавершенные грузы
+    # и призраки - их статусы тоже есть в таблице
+    assert is_ready(tk, status) == legacy_ready(status)
+
+
+@pytest.mark.parametrize(("status", "state"), [
+    ("ДОСТАВКА ДО ПВЗ", CargoState.ARRIVED),
+    ("ПРИБЫЛ, ГОТОВ К ВЫДАЧЕ", CargoState.ARRIVED),
+    # правило БСД проверяется после финальных: выдан - значит выдан
+    ("ВЫДАН, ДОСТАВКА ЗАВЕРШЕНА", CargoState.DELIVERED),
+    ("АРХИВ (ДОСТАВКА)", CargoState.ARCHIVED),
+])
+def test_bsd_rule_after_final_rules(status, state):
+    assert cargo_state("БСД", status) == state
+
+
+def test_magic_delivered_ghost_stays_on_main():
+    assert is_finished("МЭДЖИК", "ДОСТАВЛЕН")
+    assert not is_ghost_final("ДОСТАВЛЕН")
+    assert not is_ghost_final("ГРУЗ ДОСТАВЛЕН НА СКЛАД ПОЛУЧАТЕЛЯ")
+
+
+def test_stuck_bsd_matches_legacy(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "cargo_system.db"))
+    db = database.CargoDB()
+    rows = [(f"СП26-{i}", tk, status) for i, (tk, status) in enumerate(STATUSES)]
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO cargo (id, tk, status, archived_at) VALUES (?, ?, ?, '2026-03-12 10:15:00')", rows
+        )
+        conn.commit()
+
+    stuck = db.reconcile([cargo_id for cargo_id, _, _ in rows], [], archive_bsd=False)["stuck"]
+    assert stuck == {cargo_id for cargo_id, tk, status in rows if tk == "БСД" and legacy_stuck(status)}
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Строки таблицы БСД: адаптер lxml (_LxmlRow) против BeautifulSoup (_SoupRow)"""
+
+import pytest
+
+import main_parser as mp
+
+pytest.importorskip("lxml")
+pytest.importorskip("bs4")
+
+SEPS = ("", " ")
+PARAMS = (mp.VT_PLACES_RE, mp.VT_WEIGHT_RE, mp.VT_VOLUME_RE)
+
+
+def page(body):
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Заказы</title>'
+        '<style>.badge{color:red}</style><script src="/app.js"></script></head><body>'
+        '<nav><span>Кабинет</span></nav>'
+        '<table class="table"><thead><tr><th>Номер</th><th>Статус</th></tr></thead>'
+        f'<tbody id="orders-table-body">{body}</tbody></table>'
+        '<ul class="pagination"><li><span>2</span></li></ul>'
+        '</body></html>'
+    )
+
+
+def row(*cells):
+    return '<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>'
+
+
+PARAMS_CELL = (
+    '<div><span class="lbl">Кол-во мест:</span> <span>3</span></div>'
+    '<div><span class="lbl">Вес:</span><span>120.5кг</span></div>'
+    '<div><span class="lbl">Объем:</span><span>0.75м3</span></div>'
+)
+
+ROWS = {
+    "обычная": row(
+        '<a href="/o/1">СП26-100001</a><!-- id 1 --><br><small>Заявка 1</small>',
+        '<span class="badge">Прибыл на склад 12.03.26</span>', '10.03.2026', PARAMS_CELL,
+        'г. Москва', 'Краснодар', 'ООО "Ромашка"',
+        'ЮЖНЫЙ ФОРПОСТ ООО <button>ИЗМЕНИТЬ ПОЛУЧАТЕЛЯ</button><form><script>bind(1);</script></form>',
+        '<span class="pay">Оплачена</span>', '—', '&nbsp;', '12&nbsp;500,00&nbsp;₽',
+    ),
+    "пустые ячейки": row(
+        'СП26-100002', '', '', '', '', '', '', '', '', '', '', '',
+    ),
+    "вложенные теги": row(
+        '<div><b>СП<i>26</i>-100003</b></div>',
+        '<span><b>В пути</b> <em>до 14.03.2026</em></span>', '',
+        '<div><span><b>Кол-во мест:</b></span><span><i>5</i></span></div>'
+        '<div><span>Вес:<b>!</b></span><span>10кг</span></div>'
+        '<div><span>Объем:</span></div>',
+        '<p>Ростов-<b>на</b>-Дону</p>', '<p></p>', '<span><span>ИП  Петров </span></span>',
+        'ЮЖНЫЙ ФОРПОСТ<br>ООО', '<span>Не <b>оплачена</b></span>', '<template>x</template>', ' ', '<b>900</b>,50',
+    ),
+    "без параметров, span дальше по документу": row(
+        'СП26-100004', 'Выдан', '', '<span>Вес:</span>',
+        '<span>Самара</span>', 'Уфа', 'ООО', 'ЮЖНЫЙ ФОРПОСТ', '', '', '', '1',
+    ),
+    "мало ячеек": row('СП26-100005', 'Выдан', '', ''),
+}
+
+
+def adapters(html):
+    return list(mp._viteka_rows_lxml(html)), list(mp._viteka_rows_soup(html))
+
+
+@pytest.mark.parametrize("name", ROWS)
+def test_row_adapters_agree(name):
+    lxml_rows, soup_rows = adapters(page(ROWS[name]))
+    assert len(lxml_rows) == len(soup_rows)
+    for lx, soup in zip(lxml_rows, soup_rows):
+        for i in range(12):
+            for sep in SEPS:
+                assert lx.text(i, sep) == soup.text(i, sep), (i, sep)
+        for label_re in PARAMS:
+            assert lx.param(label_re) == soup.param(label_re), label_re.pattern
+
+
+@pytest.mark.parametrize("html", [
+    page(""),
+    page('<tr><td colspan="12">Заказов нет</td></tr>'),
+    '<html><body><p>Нет таблицы</p></body></html>',
+    "",
+    "   ",
+])
+def test_no_data_rows(html):
+    assert adapters(html) == ([], [])
+
+
+def test_parse_viteka_same_records():
+    html_list = [page("".join(ROWS.values())), page("")]
+    via_lxml = mp.parse_viteka(html_list, rows=mp._viteka_rows_lxml)
+    via_soup = mp.parse_viteka(html_list, rows=mp._viteka_rows_soup)
+    assert [c.to_dict() for c in via_lxml] == [c.to_dict() for c in via_soup]
+    assert [c.id for c in via_lxml] == ["СП26-100001", "СП26-100002", "СП26-100003", "СП26-100004"]